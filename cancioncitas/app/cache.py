@@ -0,0 +1,246 @@
+"""
+Cachés en memoria de respuestas ya generadas
+
+response_cache guarda las respuestas JSON de la API, fragment_cache el HTML
+renderizado de las páginas web (páginas enteras y filas de los listados) y
+count_cache el total de filas de cada listado paginado.
+Se guardan ya serializadas, por espacio de nombres (la entidad:
+canciones, conciertos...) y por ruta + parámetros. Las entradas caducan por
+tiempo (TTL), se descartan las menos usadas al llenarse (LRU) y las escrituras
+de los routers invalidan el espacio de nombres afectado en todas las cachés
+(y en la dimensión de artistas de app.dimensions) con invalidate().
+
+La caché es de cada proceso: con varios workers cada uno mantiene la suya y
+sólo ve sus propias escrituras, por eso el TTL acota lo que puede tardar en
+verse un cambio hecho por otro proceso.
+"""
+
+import threading
+import time
+from time import perf_counter
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.config import settings
+from app.dimensions import artist_dimension
+from app.serialization import dump_page
+
+# espacios de nombres de la caché
+SONGS = "songs"
+CONCERTS = "concerts"
+ARTISTS = "artists"
+
+# las respuestas de canciones y conciertos incluyen el nombre del artista:
+# al cambiar un artista también dejan de valer
+DEPENDENT_NAMESPACES = {
+    ARTISTS: (SONGS, CONCERTS),
+}
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+class ResponseCache:
+    """
+    Caché LRU + TTL de cuerpos de respuesta, segura entre hilos.
+
+    Cada espacio de nombres tiene un número de generación que aumenta al
+    invalidarlo. Una lectura anota la generación antes de consultar la base de
+    datos y sólo guarda su resultado si no ha cambiado, así una respuesta
+    calculada mientras se confirmaba una escritura nunca queda en la caché.
+    Cada entrada guarda también su generación: invalidar sólo aumenta el
+    contador (sin recorrer las entradas con el cerrojo tomado) y las entradas
+    de generaciones anteriores se descartan al leerlas o las expulsan el LRU y
+    el TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: OrderedDict[tuple[str, str], tuple[float, int, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # segundos dedicados a servir aciertos y a generar (serializar o
+        # renderizar) las respuestas que faltaban
+        self.hit_seconds = 0.0
+        self.build_seconds = 0.0
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+        start = perf_counter()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, generation, body = entry
+            if generation != self._generations.get(namespace, 0):
+                # invalidada: el espacio de nombres ha cambiado desde que se guardó
+                del self._entries[(namespace, key)]
+                self.misses += 1
+                return None
+            if expires_at <= time.monotonic():
+                del self._entries[(namespace, key)]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            self.hit_seconds += perf_counter() - start
+            return body
+
+    def set(
+        self, namespace: str, key: str, body: bytes, generation: int, build_seconds: float = 0.0
+    ) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.build_seconds += build_seconds
+            # hubo una escritura desde que empezó la lectura: el resultado puede ser antiguo
+            if self._generations.get(namespace, 0) != generation:
+                return
+            self._entries[(namespace, key)] = (time.monotonic() + self.ttl_seconds, generation, body)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *namespaces: str) -> None:
+        """
+        Invalida todas las entradas de los espacios de nombres indicados
+        (y de los que dependen de ellos) aumentando su generación; no recorre
+        las entradas, así que cuesta lo mismo con la caché llena.
+        """
+        affected = set(namespaces)
+        for namespace in namespaces:
+            affected.update(DEPENDENT_NAMESPACES.get(namespace, ()))
+        with self._lock:
+            for namespace in affected:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_seconds": self.hit_seconds,
+                "build_seconds": self.build_seconds,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    enabled=settings.response_cache_enabled,
+)
+
+fragment_cache = ResponseCache(
+    max_entries=settings.fragment_cache_max_entries,
+    ttl_seconds=settings.fragment_cache_ttl_seconds,
+    enabled=settings.fragment_cache_enabled,
+)
+
+count_cache = ResponseCache(
+    max_entries=settings.count_cache_max_entries,
+    ttl_seconds=settings.count_cache_ttl_seconds,
+    enabled=settings.count_cache_enabled,
+)
+
+
+def invalidate(*namespaces: str) -> None:
+    """
+    Invalida los espacios de nombres en todas las cachés; se llama tras
+    confirmar cualquier escritura.
+    """
+    response_cache.invalidate(*namespaces)
+    fragment_cache.invalidate(*namespaces)
+    count_cache.invalidate(*namespaces)
+    if ARTISTS in namespaces:
+        artist_dimension.invalidate()
+
+
+def cache_key(request: Request) -> str:
+    """
+    Ruta + parámetros ordenados, para que ?a=1&b=2 y ?b=2&a=1 compartan entrada.
+    Los parámetros se codifican de nuevo: un valor con & o = (?artist=X%26explicit%3Dtrue)
+    no puede dar la misma clave que dos parámetros (?artist=X&explicit=true).
+    """
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+@dataclass
+class CachedRead:
+    """
+    Lectura cacheable de un endpoint: se obtiene con la dependencia
+    cached(namespace), antes de que el endpoint consulte la base de datos.
+    """
+    namespace: str
+    key: str
+    generation: int
+
+    def hit(self) -> Response | None:
+        body = response_cache.get(self.namespace, self.key)
+        if body is None:
+            return None
+        return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"X-Cache": "HIT"})
+
+    def store(self, schema: type[BaseModel], data) -> Response:
+        """
+        Serializa data con schema, la guarda y la devuelve como respuesta.
+        """
+        start = perf_counter()
+        body = schema.__pydantic_serializer__.to_json(schema.model_validate(data, from_attributes=True))
+        return self._store(body, perf_counter() - start)
+
+    def store_page(self, schema: type[BaseModel], rows, next_cursor: str | None) -> Response:
+        """
+        Como store para una página Page[schema], por la vía rápida de
+        app.serialization (todas las filas en una sola llamada).
+        """
+        start = perf_counter()
+        body = dump_page(schema, rows, next_cursor)
+        return self._store(body, perf_counter() - start)
+
+    def _store(self, body: bytes, build_seconds: float) -> Response:
+        response_cache.set(self.namespace, self.key, body, self.generation, build_seconds)
+        return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"X-Cache": "MISS"})
+
+
+def cached(namespace: str):
+    """
+    Dependencia para los endpoints GET cacheables:
+
+        async def find_by_id(id: int, cache: CachedRead = Depends(cached(SONGS)), ...):
+            if (response := cache.hit()) is not None:
+                return response
+            ...
+            return cache.store(SongResponse, song)
+    """
+    def dependency(request: Request) -> CachedRead:
+        return CachedRead(namespace, cache_key(request), response_cache.generation(namespace))
+    return dependency
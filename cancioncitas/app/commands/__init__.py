@@ -0,0 +1,3 @@
+"""
+Comandos de mantenimiento (se ejecutan con python -m app.commands.<comando>)
+"""
@@ -0,0 +1,282 @@
+"""
+Genera un catálogo sintético de artistas, canciones y conciertos para pruebas
+de carga y de escala.
+
+Las distribuciones intentan parecerse a un catálogo real:
+  - canciones por artista según una ley de Zipf (unos pocos artistas tienen
+    muchas canciones y la mayoría muy pocas); los conciertos también se
+    reparten así
+  - títulos formados con palabras de un vocabulario, para que la búsqueda de
+    texto completo tenga coincidencias variadas
+  - duraciones log-normales, algunas sin especificar
+  - conciertos repartidos entre --date-from y --date-to; los anteriores a
+    --today están completados o cancelados, los posteriores programados o
+    cancelados
+
+El resultado sólo depende de --seed (y de los tamaños): cada tabla usa su
+propio generador, así cambiar el número de conciertos no cambia las canciones.
+
+Las filas se insertan con INSERT de core en lotes. Durante la carga se quitan
+los triggers y los índices secundarios de las tablas, y al terminar se crean
+de nuevo y se reconstruyen el índice de búsqueda y las tablas de resumen de
+una sola vez.
+
+Uso (desde la carpeta del proyecto, sobre DATABASE_URL):
+    python -m app.commands.generate_catalogue --artists 20000 --songs 1000000 --concerts 200000 --seed 42
+    python -m app.commands.generate_catalogue --reset ...   # borra antes el catálogo existente
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, bindparam, func, insert, select, text
+from sqlalchemy.schema import CreateIndex
+
+from app.database import create_schema, engine
+from app.etag import create_table_versions
+from app.models import Artist, Concert, ConcertStatus, Song
+from app.search import create_search_index, rebuild_search_index
+from app.stats import create_stats_tables, rebuild_stats
+
+CATALOGUE_TABLES = (Artist.__table__, Song.__table__, Concert.__table__)
+
+WORDS = (
+    "amor noche luna sol mar cielo fuego corazón camino ciudad tiempo sueño "
+    "lluvia viento verano invierno canción baile luz sombra silencio río "
+    "estrella tierra agua libertad memoria olvido vida muerte destino alma "
+    "beso mirada azul rojo negro blanco oro plata último primer nuevo viejo "
+    "eterno salvaje perdido dulce frío solo juntos siempre nunca mañana ayer "
+    "love night moon fire heart road city dream rain wind summer dance light "
+    "shadow river star soul kiss blue black gold lost sweet wild forever"
+).split()
+
+FIRST_NAMES = (
+    "Ana Carlos Lucía Javier Marta Pablo Elena Diego Sara Hugo Laura Daniel "
+    "Irene Álvaro Paula Mario Carmen Sergio Julia Andrés Nora Iván Alba Rubén"
+).split()
+
+LAST_NAMES = (
+    "García Fernández López Martínez Sánchez Pérez Gómez Martín Jiménez Ruiz "
+    "Hernández Díaz Moreno Álvarez Romero Navarro Torres Domínguez Vázquez Ramos"
+).split()
+
+BAND_PREFIXES = ("Los", "Las", "The", "La", "El")
+
+# aforos típicos de salas y recintos (y su peso relativo)
+CAPACITIES = (150, 300, 800, 2000, 5000, 15000, 50000)
+CAPACITY_WEIGHTS = (20, 25, 20, 15, 10, 7, 3)
+
+
+def zipf_cum_weights(n: int, exponent: float) -> list[float]:
+    """
+    Pesos acumulados de una distribución de Zipf sobre n rangos: el de rango k
+    pesa 1 / k^exponent.
+    """
+    return list(itertools.accumulate(1 / (k ** exponent) for k in range(1, n + 1)))
+
+
+class ZipfSampler:
+    """
+    Elige artistas (ids 1..n) con probabilidad de Zipf. El rango de cada
+    artista se baraja con rng, así los más prolíficos no son siempre los
+    primeros ids.
+    """
+
+    def __init__(self, rng: random.Random, n: int, exponent: float):
+        self.rng = rng
+        self.cum_weights = zipf_cum_weights(n, exponent)
+        self.total = self.cum_weights[-1]
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+
+    def sample(self) -> int:
+        rank = bisect.bisect_left(self.cum_weights, self.rng.random() * self.total)
+        return self.ids[min(rank, len(self.ids) - 1)]
+
+
+def table_rng(seed: int, name: str) -> random.Random:
+    # generador independiente por tabla (las semillas de texto son deterministas)
+    return random.Random(f"{seed}:{name}")
+
+
+def title(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.choice((1, 2, 2, 3, 3, 4)))
+    return " ".join(words).capitalize()
+
+
+def artist_rows(seed: int, count: int):
+    rng = table_rng(seed, "artists")
+    for artist_id in range(1, count + 1):
+        if rng.random() < 0.4:
+            name = f"{rng.choice(BAND_PREFIXES)} {title(rng)}"
+        else:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        birth_date = None
+        if rng.random() < 0.7:
+            birth_date = datetime(1940, 1, 1) + timedelta(days=rng.randrange(65 * 365))
+        yield {"id": artist_id, "name": f"{name} {artist_id}", "birth_date": birth_date}
+
+
+def song_rows(seed: int, count: int, artists: int, exponent: float):
+    rng = table_rng(seed, "songs")
+    sampler = ZipfSampler(table_rng(seed, "songs-artists"), artists, exponent)
+    for song_id in range(1, count + 1):
+        duration = None
+        if rng.random() < 0.95:
+            # mediana de unos 3:30, con cola larga (piezas clásicas, directos)
+            duration = max(30, min(3600, int(rng.lognormvariate(5.35, 0.35))))
+        explicit = rng.random()
+        yield {
+            "id": song_id,
+            "title": title(rng),
+            "artist_id": sampler.sample(),
+            "duration_seconds": duration,
+            "explicit": None if explicit < 0.1 else explicit > 0.85,
+        }
+
+
+def concert_rows(
+    seed: int, count: int, artists: int, exponent: float,
+    date_from: datetime, date_to: datetime, today: datetime
+):
+    rng = table_rng(seed, "concerts")
+    sampler = ZipfSampler(table_rng(seed, "concerts-artists"), artists, exponent)
+    span_minutes = int((date_to - date_from).total_seconds() // 60)
+    for concert_id in range(1, count + 1):
+        # a la hora en punto o a la media, entre las 17:00 y las 23:30
+        day = date_from + timedelta(minutes=rng.randrange(span_minutes))
+        date_time = day.replace(hour=rng.randrange(17, 24), minute=rng.choice((0, 30)), second=0, microsecond=0)
+        if date_time < today:
+            status = ConcertStatus.CANCELLED if rng.random() < 0.08 else ConcertStatus.COMPLETED
+        else:
+            status = ConcertStatus.CANCELLED if rng.random() < 0.05 else ConcertStatus.SCHEDULED
+        capacity = rng.choices(CAPACITIES, CAPACITY_WEIGHTS)[0] if rng.random() < 0.95 else None
+        yield {
+            "id": concert_id,
+            "name": f"{title(rng)} Tour {date_time.year}",
+            "price": round(rng.lognormvariate(3.4, 0.6), 2),
+            "capacity": capacity,
+            "status": status,
+            "is_sold_out": status != ConcertStatus.CANCELLED and rng.random() < 0.25,
+            "date_time": date_time,
+            "img_url": None,
+            "artist_id": sampler.sample(),
+        }
+
+
+def insert_batches(connection: Connection, table, rows, total: int, batch_size: int) -> None:
+    """
+    Inserta rows en lotes de batch_size (un executemany y un commit por lote).
+    """
+    stmt = insert(table)
+    start = time.perf_counter()
+    inserted = 0
+    while batch := list(itertools.islice(rows, batch_size)):
+        connection.execute(stmt, batch)
+        connection.commit()
+        inserted += len(batch)
+        if inserted % (batch_size * 20) == 0 or inserted == total:
+            elapsed = time.perf_counter() - start
+            print(f"  {table.name}: {inserted}/{total} ({inserted / elapsed:,.0f} filas/s)", flush=True)
+
+
+def drop_triggers_and_indexes(connection: Connection) -> None:
+    """
+    Quita los triggers (búsqueda, versiones, resúmenes) y los índices
+    secundarios de las tablas del catálogo: se recrean al final en bloque.
+    """
+    names = [table.name for table in CATALOGUE_TABLES]
+    triggers = connection.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN :names")
+        .bindparams(bindparam("names", expanding=True)),
+        {"names": names}
+    ).scalars().all()
+    for trigger in triggers:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for table in CATALOGUE_TABLES:
+        for index in table.indexes:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+
+def restore_triggers_and_indexes(connection: Connection) -> None:
+    for table in CATALOGUE_TABLES:
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+    create_search_index(connection)
+    rebuild_search_index(connection)
+    create_table_versions(connection)
+    create_stats_tables(connection)
+    rebuild_stats(connection)
+    # los datos han cambiado sin pasar por los triggers: invalidar los ETags
+    connection.execute(text("UPDATE table_versions SET version = version + 1"))
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artists", type=int, default=5000)
+    parser.add_argument("--songs", type=int, default=200_000)
+    parser.add_argument("--concerts", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf", type=float, default=1.1, help="exponente de la ley de Zipf (1 = clásica)")
+    parser.add_argument("--date-from", type=parse_date, default=datetime(2015, 1, 1))
+    parser.add_argument("--date-to", type=parse_date, default=datetime(2028, 1, 1))
+    parser.add_argument("--today", type=parse_date, default=datetime(2026, 1, 1),
+                        help="fecha que separa conciertos pasados y futuros (fija para que sea reproducible)")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--reset", action="store_true", help="borra antes artistas, canciones y conciertos")
+    args = parser.parse_args()
+
+    if args.artists < 1 and (args.songs or args.concerts):
+        parser.error("hace falta al menos un artista para generar canciones o conciertos")
+
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        # la carga se puede repetir si falla: no hace falta esperar al disco
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        create_schema(connection)
+        connection.commit()
+
+        existing = sum(
+            connection.scalar(select(func.count()).select_from(table)) for table in CATALOGUE_TABLES
+        )
+        if existing and not args.reset:
+            parser.error(f"la base de datos ya tiene {existing} filas en el catálogo (usar --reset para borrarlas)")
+
+        drop_triggers_and_indexes(connection)
+        if args.reset:
+            for table in reversed(CATALOGUE_TABLES):
+                connection.execute(table.delete())
+        connection.commit()
+
+        try:
+            print(f"Generando catálogo (seed={args.seed})", flush=True)
+            insert_batches(connection, Artist.__table__, artist_rows(args.seed, args.artists), args.artists, args.batch_size)
+            insert_batches(
+                connection, Song.__table__,
+                song_rows(args.seed, args.songs, args.artists, args.zipf),
+                args.songs, args.batch_size
+            )
+            insert_batches(
+                connection, Concert.__table__,
+                concert_rows(args.seed, args.concerts, args.artists, args.zipf, args.date_from, args.date_to, args.today),
+                args.concerts, args.batch_size
+            )
+        finally:
+            print("Reconstruyendo índices, búsqueda y estadísticas...", flush=True)
+            restore_triggers_and_indexes(connection)
+            connection.commit()
+        connection.exec_driver_sql("PRAGMA optimize")
+
+    print(f"Catálogo generado en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Migración: Song.artist (texto libre) -> Song.artist_id (clave foránea a artists)
+
+Crea un Artist por cada nombre de artista que aún no exista, reconstruye la
+tabla songs con la columna artist_id indexada y vuelve a generar el índice de
+búsqueda. Si la tabla ya está migrada no hace nada.
+
+Uso: python -m app.commands.migrate_song_artists
+"""
+
+from sqlalchemy import Connection, inspect, text
+
+from app.database import engine
+from app.models import Artist, Song
+from app.search import create_search_index, drop_search_triggers, rebuild_search_index
+
+
+def needs_migration(connection: Connection) -> bool:
+    inspector = inspect(connection)
+    if not inspector.has_table("songs"):
+        return False
+    columns = {column["name"] for column in inspector.get_columns("songs")}
+    return "artist" in columns and "artist_id" not in columns
+
+
+def migrate_song_artists(connection: Connection) -> int:
+    """
+    Ejecuta la migración sobre connection y devuelve el número de canciones migradas.
+    """
+    if not needs_migration(connection):
+        return 0
+
+    # los triggers de búsqueda usan songs.artist: se quitan y se recrean al final
+    drop_search_triggers(connection)
+
+    # índice por nombre para que el mapeo nombre -> id no recorra artists por cada canción
+    for index in Artist.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+    # crear los artistas que sólo existían como texto en las canciones
+    connection.execute(text("""
+        INSERT INTO artists (name)
+        SELECT DISTINCT artist FROM songs
+        WHERE artist NOT IN (SELECT name FROM artists)
+    """))
+
+    # SQLite no permite añadir una columna NOT NULL con clave foránea:
+    # se reconstruye la tabla con el esquema nuevo y se copian los datos
+    connection.execute(text("ALTER TABLE songs RENAME TO songs_old"))
+    Song.__table__.create(connection)
+    migrated = connection.execute(text("""
+        INSERT INTO songs (id, title, artist_id, duration_seconds, explicit)
+        SELECT s.id, s.title,
+               (SELECT min(a.id) FROM artists a WHERE a.name = s.artist),
+               s.duration_seconds, s.explicit
+        FROM songs_old s
+    """)).rowcount
+    connection.execute(text("DROP TABLE songs_old"))
+
+    create_search_index(connection)
+    rebuild_search_index(connection)
+
+    return migrated
+
+
+if __name__ == "__main__":
+    with engine.begin() as connection:
+        count = migrate_song_artists(connection)
+    print(f"Canciones migradas: {count}")
@@ -0,0 +1,21 @@
+"""
+Reconstruye las tablas de resumen de las estadísticas (app/stats.py) a partir
+de songs y concerts. Los triggers las mantienen al día en cada escritura; este
+comando sólo hace falta si se han desincronizado.
+
+Uso: python -m app.commands.rebuild_stats
+"""
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.stats import create_stats_tables, rebuild_stats
+
+
+if __name__ == "__main__":
+    with engine.begin() as connection:
+        create_stats_tables(connection)
+        rebuild_stats(connection)
+        artists = connection.execute(text("SELECT count(*) FROM artist_song_stats")).scalar()
+        groups = connection.execute(text("SELECT count(*) FROM concert_stats")).scalar()
+    print(f"Resúmenes reconstruidos: {artists} artistas con canciones, {groups} grupos de conciertos")
@@ -0,0 +1,108 @@
+"""
+Configuración de la aplicación a partir de variables de entorno
+"""
+
+import os
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value is not None and value.strip() else default
+
+
+class Settings:
+    # perfil de ejecución: "development" o "production"
+    app_env: str = os.getenv("APP_ENV", "development").strip().lower()
+    is_production: bool = app_env == "production"
+
+    # url de la base de datos para el motor síncrono
+    database_url: str = os.getenv("DATABASE_URL", "sqlite:///cancioncitas.db")
+    # url de la base de datos para el motor asíncrono (aiosqlite)
+    async_database_url: str = os.getenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///cancioncitas.db")
+    # True: sesiones AsyncSession sobre aiosqlite
+    # False: sesiones síncronas ejecutadas en el threadpool (para comparar ambos modos)
+    db_async: bool = env_bool("DB_ASYNC", True)
+
+    # log de cada sentencia SQL (sólo por defecto en desarrollo)
+    db_echo: bool = env_bool("DB_ECHO", not is_production)
+
+    # tamaño del pool de conexiones de cada motor
+    db_pool_size: int = env_int("DB_POOL_SIZE", 10)
+    db_max_overflow: int = env_int("DB_MAX_OVERFLOW", 10)
+    # segundos que se espera a que quede libre una conexión del pool
+    db_pool_timeout: int = env_int("DB_POOL_TIMEOUT", 30)
+
+    # PRAGMAs de SQLite que se aplican al abrir cada conexión
+    # WAL: los lectores no bloquean al escritor ni al revés
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    # NORMAL es seguro con WAL y evita un fsync en cada commit
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    # milisegundos que una conexión espera un bloqueo antes de fallar
+    sqlite_busy_timeout_ms: int = env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    # bytes de la base de datos mapeados en memoria (256 MB)
+    sqlite_mmap_size: int = env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+    # caché de páginas por conexión en KiB (64 MB); SQLite lo espera en negativo
+    sqlite_cache_size_kb: int = env_int("SQLITE_CACHE_SIZE_KB", 64 * 1024)
+
+    # comprobar las claves foráneas (songs.artist_id y concerts.artist_id -> artists.id)
+    # no es un ajuste de rendimiento: cambia qué escrituras se aceptan, por eso
+    # está desactivado por defecto, como en SQLite. Las canciones y conciertos
+    # con un artista inexistente se rechazan con 422 en ambos casos (la API lo
+    # comprueba); con SQLITE_FOREIGN_KEYS=1 además los artistas con canciones o
+    # conciertos no se pueden borrar (409), sin él se borran y esas filas
+    # quedan huérfanas
+    sqlite_foreign_keys: bool = env_bool("SQLITE_FOREIGN_KEYS", False)
+
+    # caché en memoria de las respuestas GET de la API (por proceso)
+    response_cache_enabled: bool = env_bool("RESPONSE_CACHE_ENABLED", True)
+    # número máximo de respuestas guardadas (se descartan las menos usadas)
+    response_cache_max_entries: int = env_int("RESPONSE_CACHE_MAX_ENTRIES", 2048)
+    # segundos que una respuesta guardada sigue siendo válida
+    response_cache_ttl_seconds: int = env_int("RESPONSE_CACHE_TTL_SECONDS", 60)
+
+    # caché del HTML renderizado de las páginas web (páginas y filas de listados)
+    fragment_cache_enabled: bool = env_bool("FRAGMENT_CACHE_ENABLED", True)
+    fragment_cache_max_entries: int = env_int("FRAGMENT_CACHE_MAX_ENTRIES", 20000)
+    fragment_cache_ttl_seconds: int = env_int("FRAGMENT_CACHE_TTL_SECONDS", 300)
+    # páginas más grandes que esto (en caracteres) no se guardan enteras, sólo sus filas
+    fragment_cache_max_page_chars: int = env_int("FRAGMENT_CACHE_MAX_PAGE_CHARS", 2 * 1024 * 1024)
+
+    # totales de los listados web paginados (uno por combinación de filtros)
+    count_cache_enabled: bool = env_bool("COUNT_CACHE_ENABLED", True)
+    count_cache_max_entries: int = env_int("COUNT_CACHE_MAX_ENTRIES", 1024)
+    count_cache_ttl_seconds: int = env_int("COUNT_CACHE_TTL_SECONDS", 300)
+
+    # tabla de artistas en memoria con la que se completan los conciertos
+    artist_dimension_enabled: bool = env_bool("ARTIST_DIMENSION_ENABLED", True)
+    artist_dimension_ttl_seconds: int = env_int("ARTIST_DIMENSION_TTL_SECONDS", 300)
+
+    # métricas de las peticiones en /metrics (formato de Prometheus)
+    metrics_enabled: bool = env_bool("METRICS_ENABLED", True)
+    # cabecera Server-Timing con el tiempo de base de datos, plantillas y total
+    server_timing_enabled: bool = env_bool("SERVER_TIMING_ENABLED", True)
+
+    # presupuesto de consultas por ruta y detector de N+1 (app/query_budget.py):
+    # "off", "warn" (avisos en el log) o "raise" (la petición falla, para las pruebas)
+    query_budget_mode: str = os.getenv("QUERY_BUDGET", "off" if is_production else "warn").strip().lower()
+    # repeticiones de una misma sentencia en una petición a partir de las que se avisa
+    query_repeat_threshold: int = env_int("QUERY_REPEAT_THRESHOLD", 3)
+
+    # enviar los listados web a medida que se renderizan, en lugar de
+    # renderizar la página completa antes de responder
+    web_stream_lists: bool = env_bool("WEB_STREAM_LISTS", True)
+
+    # recargar las plantillas si cambian en disco (sólo por defecto en desarrollo)
+    templates_auto_reload: bool = env_bool("TEMPLATES_AUTO_RELOAD", not is_production)
+    # carpeta del bytecode compilado de las plantillas, compartida por los workers
+    # (por defecto una carpeta del usuario dentro del directorio temporal)
+    templates_bytecode_dir: str | None = os.getenv("TEMPLATES_BYTECODE_DIR") or None
+
+
+settings = Settings()
@@ -5,15 +5,73 @@ Configuración de la base de datos
 
 
 # crear motor de conexión a base de datos
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import column, create_engine, event, exists, select, table
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.schema import CreateIndex
+
+from app.config import settings
+from app.metrics import instrument_engine
+
+# opciones comunes del pool de conexiones para ambos motores
+POOL_OPTIONS = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+}
+
+
+def apply_sqlite_pragmas(engine: Engine) -> None:
+    """
+    Registra los PRAGMAs de rendimiento de SQLite en cada conexión nueva del motor.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+        cursor.close()
+
+
+def apply_foreign_keys(engine: Engine) -> None:
+    """
+    Activa (con SQLITE_FOREIGN_KEYS=1) o desactiva la comprobación de claves
+    foráneas en cada conexión nueva del motor; por defecto no se comprueban,
+    como en SQLite. Activas, las escrituras con un artista inexistente fallan
+    en la base de datos (422 con artist_must_exist) y borrar un artista con
+    canciones o conciertos responde 409.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if settings.sqlite_foreign_keys else 'OFF'}")
+        cursor.close()
 
 
 engine = create_engine(
-    "sqlite:///cancioncitas.db",
-    echo=True,
-    connect_args={"check_same_thread": False}
+    settings.database_url,
+    echo=settings.db_echo,
+    connect_args={"check_same_thread": False},
+    **POOL_OPTIONS
 )
+apply_sqlite_pragmas(engine)
+apply_foreign_keys(engine)
+instrument_engine(engine)
 
 # crear fábrica de sesiones de base de datos
 SessionLocal = sessionmaker(
@@ -23,124 +81,322 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# motor y fábrica de sesiones asíncronas (aiosqlite)
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.db_echo,
+    **POOL_OPTIONS
+)
+apply_sqlite_pragmas(async_engine.sync_engine)
+apply_foreign_keys(async_engine.sync_engine)
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=True,
+    expire_on_commit=False
+)
+
 # clase base para modelos sqlalchemy
 class Base(DeclarativeBase):
     pass
 
+
+class ThreadedResultStream:
+    """
+    Equivalente a AsyncResult / AsyncScalarResult para ThreadedSession:
+    cada lote se obtiene del cursor síncrono dentro del threadpool.
+    """
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size: int | None = None):
+        partitions = self._result.partitions(size)
+        while (batch := await run_in_threadpool(next, partitions, None)) is not None:
+            yield batch
+
+    async def close(self) -> None:
+        await run_in_threadpool(self._result.close)
+
+
+class ThreadedSession:
+    """
+    Sesión síncrona con la misma interfaz await-able que AsyncSession.
+    Cada operación contra la base de datos se ejecuta en el threadpool de
+    Starlette, como hacían los endpoints síncronos. Se usa cuando DB_ASYNC=0
+    para poder comparar los dos modos con el mismo código de endpoints.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def stream(self, statement, params=None, **kwargs):
+        result = await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+        return ThreadedResultStream(result)
+
+    async def stream_scalars(self, statement, params=None, **kwargs):
+        result = await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+        return ThreadedResultStream(result)
+
+    async def refresh(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+@asynccontextmanager
+async def session_scope():
+    """
+    Abre una sesión según la configuración (DB_ASYNC) y la cierra al salir.
+    """
+    if settings.db_async:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedSession(SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
 # DEPENDENCIA DE FASTAPI
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with session_scope() as db:
         yield db # entrega la sesión al endpoint
-    finally:
-        db.close()
+
+
+class ArtistNotFound(Exception):
+    """
+    La escritura referencia un artista que no existe y la base de datos no lo
+    ha impedido (SQLITE_FOREIGN_KEYS=0): se lanza dentro de artist_must_exist
+    antes del commit.
+    """
+
+
+artists_table = table("artists", column("id"))
+
+
+async def check_new_artist(db: AsyncSession, update_data: dict) -> None:
+    """
+    Escrituras masivas que cambian el artista (UPDATE ... WHERE): sin claves
+    foráneas (SQLITE_FOREIGN_KEYS=0) nada impide un artista inexistente, así
+    que se comprueba antes; con ellas lo hace SQLite sin consulta extra.
+    Se llama dentro de artist_must_exist.
+    """
+    if settings.sqlite_foreign_keys or update_data.get("artist_id") is None:
+        return
+    if not await db.scalar(select(exists().where(artists_table.c.id == update_data["artist_id"]))):
+        raise ArtistNotFound()
+
+
+@asynccontextmanager
+async def artist_must_exist(db: AsyncSession):
+    """
+    Escrituras que referencian un artista (canciones y conciertos): si no
+    existe, la clave foránea falla (o se lanza ArtistNotFound) y se deshace la
+    escritura y se responde 422 en lugar de un error 500.
+    El resto de restricciones (NOT NULL...) las comprueban antes los esquemas:
+    si fallan aquí es un error del servidor y se propaga.
+    """
+    try:
+        yield
+    except (IntegrityError, ArtistNotFound) as e:
+        await db.rollback()
+        if isinstance(e, IntegrityError) and "FOREIGN KEY" not in str(e.orig):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="El artista indicado no existe"
+        )
 
 
 # INICIALIZACIÓN BASE DE DATOS
 
+def schema_marker() -> int:
+    """
+    Marca del despliegue actual para PRAGMA user_version (un entero de 32
+    bits): cambia con el código y las plantillas, igual que los ETags.
+    """
+    from app.etag import DEPLOYMENT_FINGERPRINT
+
+    return int(DEPLOYMENT_FINGERPRINT[:7], 16)
+
+
+def init_db() -> bool:
+    """
+    Crea o actualiza el esquema y carga los datos por defecto si no hay
+    canciones, una sola vez por despliegue.
+
+    Al terminar se guarda la marca del despliegue en PRAGMA user_version: los
+    arranques siguientes (y el resto de workers) sólo leen ese valor. El
+    trabajo se hace dentro de BEGIN IMMEDIATE, así con varios workers
+    arrancando a la vez uno lo hace y los demás esperan y encuentran la marca.
+    Devuelve True si ha hecho algo.
+    """
+    marker = schema_marker()
+
+    with engine.connect() as connection:
+        # sin transacción implícita del driver: se controla con BEGIN/COMMIT
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        if connection.exec_driver_sql("PRAGMA user_version").scalar() == marker:
+            return False
+
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            # otro worker puede haberlo hecho mientras se esperaba el bloqueo
+            if connection.exec_driver_sql("PRAGMA user_version").scalar() == marker:
+                connection.exec_driver_sql("COMMIT")
+                return False
+            create_schema(connection)
+            seed_defaults(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {marker}")
+            connection.exec_driver_sql("COMMIT")
+        except Exception:
+            connection.exec_driver_sql("ROLLBACK")
+            raise
+    return True
+
+
+def create_schema(connection) -> None:
+    """
+    Tablas, índices, índice de búsqueda, versiones de tablas y resúmenes.
+    Todo es idempotente (IF NOT EXISTS), se puede ejecutar sobre una base de
+    datos ya creada.
+    """
+    from app.commands.migrate_song_artists import migrate_song_artists
+    from app.search import create_search_index
+    from app.etag import create_table_versions
+    from app.stats import create_stats_tables
+
+    # crear todas las tablas
+    Base.metadata.create_all(connection)
+    # migrar bases de datos antiguas con songs.artist en texto
+    migrate_song_artists(connection)
+    # create_all sólo crea índices junto a tablas nuevas: añadir los que
+    # falten en tablas que ya existían (IF NOT EXISTS también sirve para
+    # los índices de expresiones, que la reflexión de SQLite no ve)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+    # crear el índice de búsqueda FTS5 y sus triggers
+    create_search_index(connection)
+    # versiones por tabla para los ETags
+    create_table_versions(connection)
+    # tablas de resumen para las estadísticas y sus triggers
+    create_stats_tables(connection)
+
+
 # método inicializar con canciones por defecto
-def init_db():
+def seed_defaults(connection) -> None:
     """
     Inicializa la base de datos con canciones por defecto si está vacía.
-    Sólo crea las canciones si no existen ya en la base de datos.
+    Sólo crea las canciones si no existen ya en la base de datos
+    (un EXISTS, sin leer la tabla).
     """
-    from app.models import Song, Artist
     from datetime import datetime
-    from sqlalchemy import create_engine, select
-    from sqlalchemy.orm import sessionmaker, DeclarativeBase
+    from sqlalchemy import exists, insert, select
+
+    from app.models import Artist, ConcertStatus, Song
+
+    if connection.scalar(select(exists().where(Song.id.is_not(None)))):
+        return
+
+    default_artists = [
+        {"name": "ABBA", "birth_date": datetime(1972, 1, 1)},
+        {"name": "Amaral", "birth_date": datetime(1972, 8, 4)},
+        {"name": "Ludwig van Beethoven", "birth_date": None},
+        {"name": "Joan Manuel Serrat", "birth_date": None},
+        {"name": "Darren Korb", "birth_date": None},
+        {"name": "Michael Jackson", "birth_date": None},
+        {"name": "Nirvana", "birth_date": None}
+    ]
+
+    # INSERT ... RETURNING para tener los ids de los artistas sin volver a leerlos
+    artist_dict = {
+        row.name: row.id
+        for row in connection.execute(
+            insert(Artist).returning(Artist.id, Artist.name, sort_by_parameter_order=True),
+            default_artists
+        )
+    }
+
+    default_songs = [
+        {"title": "Mamma Mia", "artist_id": artist_dict["ABBA"], "duration_seconds": 300, "explicit": False},
+        {"title": "Sin ti no soy nada", "artist_id": artist_dict["Amaral"], "duration_seconds": 250, "explicit": False},
+        {"title": "Sonata para piano nº 14", "artist_id": artist_dict["Ludwig van Beethoven"], "duration_seconds": 800, "explicit": False},
+        {"title": "Mediterráneo", "artist_id": artist_dict["Joan Manuel Serrat"], "duration_seconds": 400, "explicit": False},
+        {"title": "Never to Return", "artist_id": artist_dict["Darren Korb"], "duration_seconds": 300, "explicit": False},
+        {"title": "Billie Jean", "artist_id": artist_dict["Michael Jackson"], "duration_seconds": 294, "explicit": False},
+        {"title": "Smells Like Teen Spirit", "artist_id": artist_dict["Nirvana"], "duration_seconds": 301, "explicit": True}
+    ]
+
+    # agregar las canciones
+    connection.execute(insert(Song), default_songs)
+
+    default_concerts = [
+        {
+            "name": "ABBA - Primera gira",
+            "price": 85.00,
+            "capacity": 50000,
+            "status": ConcertStatus.SCHEDULED,
+            "is_sold_out": False,
+            "date_time": datetime(2026, 6, 15, 20, 0),
+            "img_url": "https://placehold.co/600x400?text=ABBA+Primera+Gira",
+            "artist_id": artist_dict.get("ABBA")
+        },
+        {
+            "name": "Amaral - Hacia lo salvaje",
+            "price": 5.00,
+            "capacity": 500000,
+            "status": ConcertStatus.SCHEDULED,
+            "is_sold_out": False,
+            "date_time": datetime(2026, 10, 12, 17, 30),
+            "img_url": "https://placehold.co/600x400?text=Amaral+Concierto",
+            "artist_id": artist_dict.get("Amaral")
+        },
+        {
+            "name": "Metallica - Master of Puppets",
+            "price": 50.00,
+            "capacity": 200000,
+            "status": ConcertStatus.COMPLETED,
+            "is_sold_out": True,
+            "date_time": datetime(2026, 10, 12, 17, 30),
+            "img_url": "https://placehold.co/600x400?text=Amaral+Concierto",
+            "artist_id": artist_dict.get("Metallica")
+        },
+        {
+            "name": "Muse - Supermassive black hole",
+            "price": 150.00,
+            "capacity": 3400000,
+            "status": ConcertStatus.CANCELLED,
+            "is_sold_out": False,
+            "date_time": datetime(2026, 11, 11, 21, 30),
+            "img_url": "https://placehold.co/600x400?text=Muse+Concert",
+            "artist_id": artist_dict.get("Muse")
+        },
+    ]
 
-    from app.models.concert import Concert, ConcertStatus
-    
-    # crear todas las tablas
-    Base.metadata.create_all(engine)
-    
-    db = SessionLocal()
-    try:
-        existing_songs = db.execute(select(Song)).scalars().all()
-        
-        if existing_songs:
-            return
-        
-        default_artists = [
-            Artist(name="ABBA", birth_date=datetime(1972, 1, 1)),
-            Artist(name="Amaral", birth_date=datetime(1972, 8, 4)),
-            Artist(name="Ludwig van Beethoven", birth_date=None),
-            Artist(name="Joan Manuel Serrat", birth_date=None),
-            Artist(name="Darren Korb", birth_date=None),
-            Artist(name="Michael Jackson", birth_date=None),
-            Artist(name="Nirvana", birth_date=None)
-        ]
-        
-        db.add_all(default_artists)
-        db.commit()
-        
-        #obtener los artistas para tener sus ids
-        artists = db.execute(select(Artist)).scalars().all()
-        artist_dict = {artist.name: artist.id for artist in artists}
-        
-        # refresca los artistas para obtener su id
-        for artist in default_artists:
-            db.refresh(artist)
-        
-        default_songs = [
-            Song(title="Mamma Mia", artist="ABBA", duration_seconds=300, explicit=False),
-            Song(title="Sin ti no soy nada", artist="Amaral", duration_seconds=250, explicit=False),
-            Song(title="Sonata para piano nº 14", artist="Ludwig van Beethoven", duration_seconds=800, explicit=False),
-            Song(title="Mediterráneo", artist="Joan Manuel Serrat", duration_seconds=400, explicit=False),
-            Song(title="Never to Return", artist="Darren Korb", duration_seconds=300, explicit=False),
-            Song(title="Billie Jean", artist="Michael Jackson", duration_seconds=294, explicit=False),
-            Song(title="Smells Like Teen Spirit", artist="Nirvana", duration_seconds=301, explicit=True)
-        ]
-        
-        # agregar las canciones
-        db.add_all(default_songs)
-        db.commit()
-        
-        default_concerts = [
-            Concert(
-                name="ABBA - Primera gira",
-                price=85.00,
-                capacity=50000,
-                status=ConcertStatus.SCHEDULED,
-                is_sold_out=False,
-                date_time=(2026, 6, 15, 20, 0),
-                img_url="https://placehold.co/600x400?text=ABBA+Primera+Gira",
-                artist_id=artist_dict.get("ABBA")
-            ),
-            Concert(
-                name="Amaral - Hacia lo salvaje",
-                price=5.00,
-                capacity=500000,
-                status=ConcertStatus.SCHEDULED,
-                is_sold_out=False,
-                date_time=(2026, 10, 12, 17, 30),
-                img_url="https://placehold.co/600x400?text=Amaral+Concierto",
-                artist_id=artist_dict.get("Amaral")
-            ),
-             Concert(
-                name="Metallica - Master of Puppets",
-                price=50.00,
-                capacity=200000,
-                status=ConcertStatus.COMPLETED,
-                is_sold_out=True,
-                date_time=(2026, 10, 12, 17, 30),
-                img_url="https://placehold.co/600x400?text=Amaral+Concierto",
-                artist_id=artist_dict.get("Metallica")
-            ),
-            Concert(
-                name="Muse - Supermassive black hole",
-                price=150.00,
-                capacity=3400000,
-                status=ConcertStatus.CANCELLED,
-                is_sold_out=False,
-                date_time=(2026, 11, 11, 21, 30),
-                img_url="https://placehold.co/600x400?text=Muse+Concert",
-                artist_id=artist_dict.get("Muse")
-            ),
-            
-        ]
-        
-        
-    finally:
-        db.close()
\ No newline at end of file
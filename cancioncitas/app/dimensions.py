@@ -0,0 +1,111 @@
+"""
+Dimensión de artistas en memoria
+
+Los conciertos se devuelven con su artista anidado. En lugar de unir cada
+consulta de conciertos con artists (y repetir los mismos pocos cientos de
+artistas en cada listado), la tabla de artistas se carga una vez por proceso y
+se consulta por id al serializar.
+
+Como las cachés de app.cache, la dimensión se invalida con las escrituras de
+artistas (invalidate(ARTISTS)) y caduca por tiempo para acotar lo que tarda en
+verse un cambio hecho por otro proceso.
+"""
+
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Artist
+
+
+@dataclass(slots=True, frozen=True)
+class ArtistRecord:
+    id: int
+    name: str
+    birth_date: datetime | None
+
+
+def artist_columns():
+    return select(Artist.id, Artist.name, Artist.birth_date)
+
+
+class ArtistDimension:
+    """
+    id -> ArtistRecord de todos los artistas, segura entre hilos.
+
+    Usa el mismo esquema de generaciones que ResponseCache: una carga sólo se
+    guarda si no ha habido una escritura de artistas mientras se leía.
+    """
+
+    def __init__(self, ttl_seconds: float, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._records: dict[int, ArtistRecord] = {}
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _current(self) -> dict[int, ArtistRecord] | None:
+        with self._lock:
+            if self._expires_at <= time.monotonic():
+                return None
+            return self._records
+
+    async def lookup(self, db: AsyncSession, ids: Iterable[int]) -> dict[int, ArtistRecord]:
+        """
+        Artistas con los ids indicados. La primera llamada (y la siguiente a
+        una invalidación) carga la tabla entera; los ids que no estén, p. ej.
+        artistas creados por otro proceso, se leen de la base de datos.
+        """
+        ids = set(ids)
+        if not self.enabled:
+            return await self._fetch(db, artist_columns().where(Artist.id.in_(ids)))
+
+        generation = self._generation
+        records = self._current()
+        if records is None:
+            records = await self._fetch(db, artist_columns())
+            self._store(records, generation, replace=True)
+
+        missing = ids - records.keys()
+        if not missing:
+            return records
+        found = await self._fetch(db, artist_columns().where(Artist.id.in_(missing)))
+        self._store(found, generation, replace=False)
+        return {**records, **found}
+
+    async def _fetch(self, db: AsyncSession, stmt) -> dict[int, ArtistRecord]:
+        rows = (await db.execute(stmt)).all()
+        return {row.id: ArtistRecord(row.id, row.name, row.birth_date) for row in rows}
+
+    def _store(self, records: dict[int, ArtistRecord], generation: int, replace: bool) -> None:
+        with self._lock:
+            # hubo una escritura de artistas desde que empezó la lectura
+            if self._generation != generation:
+                return
+            if replace:
+                self._records = records
+                self._expires_at = time.monotonic() + self.ttl_seconds
+                self.loads += 1
+            else:
+                # copia: quien ya tenga el diccionario anterior no lo ve cambiar
+                self._records = {**self._records, **records}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._records = {}
+            self._expires_at = 0.0
+
+
+artist_dimension = ArtistDimension(
+    ttl_seconds=settings.artist_dimension_ttl_seconds,
+    enabled=settings.artist_dimension_enabled,
+)
@@ -0,0 +1,180 @@
+"""
+ETags y GET condicionales (304 Not Modified)
+
+Cada tabla tiene un número de versión en table_versions que los triggers
+aumentan en cada INSERT/UPDATE/DELETE, también los hechos por otros procesos.
+El ETag de una respuesta se forma con las versiones de las tablas de las que
+depende y con la huella del despliegue, sin serializar ni renderizar nada:
+si coincide con If-None-Match se responde 304 antes de consultar el ORM.
+
+La versión es de la tabla, no de cada fila: en las rutas de un solo recurso
+(/{id}) el ETag coincide también para ids que no existen, así que allí el 304
+se decide en ETagMiddleware, sólo si el endpoint ha encontrado el recurso
+(respuesta 200); si no, la respuesta es el 404 de siempre.
+"""
+
+import hashlib
+from pathlib import Path
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import Connection, column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import get_db
+
+# tablas cuya versión se controla
+VERSIONED_TABLES = ("songs", "artists", "concerts")
+
+table_versions = table("table_versions", column("name"), column("version"))
+
+TABLE_VERSIONS_DDL = """
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+
+# un trigger por tabla y operación (SQLite no tiene triggers por sentencia)
+TABLE_VERSION_TRIGGERS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {name}_version_{suffix} AFTER {operation} ON {name} BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE name = '{name}';
+    END
+    """
+    for name in VERSIONED_TABLES
+    for suffix, operation in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+
+def create_table_versions(connection: Connection) -> None:
+    """
+    Crea table_versions, sus filas y los triggers que las mantienen si no existen.
+    """
+    connection.execute(text(TABLE_VERSIONS_DDL))
+    for name in VERSIONED_TABLES:
+        connection.execute(
+            text("INSERT OR IGNORE INTO table_versions (name, version) VALUES (:name, 0)"),
+            {"name": name}
+        )
+    for ddl in TABLE_VERSION_TRIGGERS_DDL:
+        connection.execute(text(ddl))
+
+
+def deployment_fingerprint() -> str:
+    """
+    Huella del código y las plantillas desplegadas: un cambio en cualquiera de
+    ellos invalida los ETags aunque los datos no hayan cambiado.
+    Se calcula con el contenido de los ficheros y su ruta dentro de app, no
+    con sus fechas: otra copia o checkout del mismo código da la misma huella
+    (y no vuelve a ejecutar init_db, ver schema_marker).
+    """
+    root = Path(__file__).parent
+    digest = hashlib.sha1()
+    for path in sorted(root.rglob("*")):
+        if path.suffix in (".py", ".html"):
+            digest.update(path.relative_to(root).as_posix().encode() + b"\0")
+            digest.update(path.read_bytes() + b"\0")
+    return digest.hexdigest()[:12]
+
+
+DEPLOYMENT_FINGERPRINT = deployment_fingerprint()
+
+
+def if_none_match(request: Request) -> set[str]:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def etag_for(*tables: str, resource: bool = False):
+    """
+    Dependencia para los endpoints GET: calcula el ETag a partir de las
+    versiones de tables y responde 304 si el cliente ya lo tiene. El ETag se
+    añade a la respuesta con ETagMiddleware.
+
+        @router.get("")
+        async def find_all(_: str = Depends(etag_for("songs", "artists")), ...):
+
+    Con resource=True (rutas de un solo recurso, que puede no existir) no se
+    responde aquí: ETagMiddleware cambia la respuesta por un 304 sólo si el
+    endpoint devuelve 200.
+
+        @router.get("/{id}")
+        async def find_by_id(id: int, _: str = Depends(etag_for("songs", "artists", resource=True)), ...):
+    """
+    def check(request: Request, versions: dict) -> str:
+        tag = "-".join([DEPLOYMENT_FINGERPRINT, *(str(versions.get(name, 0)) for name in tables)])
+        etag = f'"{tag}"'
+        request.state.etag = etag
+
+        candidates = if_none_match(request)
+        if etag in candidates or "*" in candidates:
+            if resource:
+                request.state.etag_matched = True
+                return etag
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "no-cache"}
+            )
+        return etag
+
+    async def dependency(request: Request, db: AsyncSession = Depends(get_db)) -> str:
+        versions = dict((await db.execute(
+            select(table_versions.c.name, table_versions.c.version)
+            .where(table_versions.c.name.in_(tables))
+        )).all())
+        return check(request, versions)
+
+    # páginas que no dependen de ningún dato: sin sesión de base de datos
+    async def static_dependency(request: Request) -> str:
+        return check(request, {})
+
+    return dependency if tables else static_dependency
+
+
+class ETagMiddleware:
+    """
+    Añade la cabecera ETag calculada por etag_for a las respuestas 200.
+    Cache-Control: no-cache hace que el cliente la revalide en cada petición.
+    Si etag_for(resource=True) ha visto que el cliente ya tiene el recurso,
+    la respuesta 200 se sustituye por un 304 sin cuerpo.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        not_modified = False
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal not_modified
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                state = scope.get("state", {})
+                etag = state.get("etag")
+                if etag is not None and state.get("etag_matched"):
+                    not_modified = True
+                    message = {"type": "http.response.start", "status": 304, "headers": [
+                        (b"etag", etag.encode()),
+                        (b"cache-control", b"no-cache"),
+                    ]}
+                elif etag is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"],
+                        (b"etag", etag.encode()),
+                        (b"cache-control", b"no-cache"),
+                    ]
+            elif not_modified:
+                # el cuerpo del 200 se descarta: un único mensaje vacío al final
+                if message["type"] != "http.response.body" or message.get("more_body", False):
+                    return
+                message = {"type": "http.response.body", "body": b""}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
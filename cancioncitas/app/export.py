@@ -0,0 +1,55 @@
+"""
+Exportación del catálogo en formato NDJSON (un objeto JSON por línea)
+"""
+
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import session_scope
+from app.serialization import list_adapter
+
+# filas que se traen de la base de datos en cada lote del cursor
+EXPORT_BATCH_SIZE = 1000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+# convierte un lote de filas en los objetos que se serializan
+Records = Callable[[AsyncSession, list], Awaitable[list]]
+
+
+async def iter_ndjson(
+    stmt: Select, schema: type[BaseModel], records: Records | None = None
+) -> AsyncIterator[bytes]:
+    """
+    Recorre stmt (una consulta de columnas, ver app.queries) con un cursor en
+    lotes (yield_per) y va generando las filas serializadas con schema, un lote
+    por cada trozo de la respuesta. records convierte cada lote antes de
+    serializarlo si el esquema no coincide con sus columnas.
+    Sólo hay un lote en memoria a la vez, sea cual sea el tamaño de la tabla.
+    """
+    adapter = list_adapter(schema)
+    serializer = schema.__pydantic_serializer__
+    # la sesión es propia del generador: la respuesta sigue enviándose
+    # después de que el endpoint haya terminado
+    async with session_scope() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for batch in result.partitions():
+            if records is not None:
+                batch = await records(db, batch)
+            items = adapter.validate_python(batch, from_attributes=True)
+            yield b"".join(serializer.to_json(item) + b"\n" for item in items)
+
+
+def ndjson_response(
+    stmt: Select, schema: type[BaseModel], filename: str, records: Records | None = None
+) -> StreamingResponse:
+    return StreamingResponse(
+        iter_ndjson(stmt, schema, records),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,196 @@
+"""
+Caché del HTML renderizado de las páginas web
+
+Las páginas se guardan enteras por ruta + parámetros y, además, cada fila de
+los listados se guarda por separado: una página con otros filtros u orden que
+aún no está en la caché reutiliza las filas ya renderizadas y sólo ejecuta la
+plantilla de las que faltan.
+
+Los listados se envían en streaming: la plantilla se renderiza por partes (en
+modo asíncrono, async_environment) y las filas se leen con la sesión de la
+petición cuando la plantilla llega a la tabla, así la cabecera de la página
+llega al navegador antes de consultar las filas. Las filas se leen del cursor
+en lotes de STREAM_ROW_BATCH y cada una se renderiza y se envía en cuanto
+llega, sin esperar al resto de la página.
+
+Las respuestas indican en Server-Timing el tiempo de renderizado (fallo) o el
+de servir desde la caché (acierto). Las que van en streaming lo envían en el
+trailer Server-Timing si el servidor lo admite (ver app.metrics) y siempre
+queda en /metrics.
+"""
+
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from time import perf_counter
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from markupsafe import Markup
+from sqlalchemy import Select
+
+from app.cache import cache_key, fragment_cache
+from app.config import settings
+from app.pagination import WebPager
+from app.templating import async_environment, templates
+
+# trozos de salida de la plantilla que se agrupan en cada envío
+STREAM_BUFFER_SIZE = 256
+
+# filas que se leen del cursor cada vez en los listados en streaming
+STREAM_ROW_BATCH = 25
+
+HTML_MEDIA_TYPE = "text/html; charset=utf-8"
+
+
+@dataclass
+class CachedPage:
+    """
+    Página web cacheable: se obtiene con la dependencia cached_page(namespace)
+    antes de que el endpoint consulte la base de datos.
+    """
+    request: Request
+    namespace: str
+    key: str
+    generation: int
+    # segundos renderizando filas que no estaban en la caché
+    row_seconds: float = 0.0
+
+    def hit(self) -> HTMLResponse | None:
+        start = perf_counter()
+        body = fragment_cache.get(self.namespace, self.key)
+        if body is None:
+            return None
+        elapsed_ms = (perf_counter() - start) * 1000
+        return HTMLResponse(
+            content=body,
+            headers={"X-Cache": "HIT", "Server-Timing": f"cache;dur={elapsed_ms:.3f}"}
+        )
+
+    def row(self, name: str, item, item_name: str) -> Markup:
+        """
+        Renderiza la fila de item con la plantilla name (item disponible como
+        item_name), o la toma de la caché si ya está.
+        """
+        row_key = f"{name}:{item.id}"
+        body = fragment_cache.get(self.namespace, row_key)
+        if body is None:
+            start = perf_counter()
+            body = templates.get_template(name).render({item_name: item}).encode()
+            elapsed = perf_counter() - start
+            self.row_seconds += elapsed
+            fragment_cache.set(self.namespace, row_key, body, self.generation, elapsed)
+        return Markup(body.decode())
+
+    def iter_rows(self, name: str, items: Iterable, item_name: str) -> Iterator[Markup]:
+        """
+        Renderiza con la plantilla name una fila por cada elemento de items
+        (disponible en la plantilla como item_name), reutilizando las que ya
+        estén en la caché.
+        """
+        for item in items:
+            yield self.row(name, item, item_name)
+
+    def rows(self, name: str, items: Iterable, item_name: str) -> list[Markup]:
+        return list(self.iter_rows(name, items, item_name))
+
+    def render(self, name: str, context: dict) -> HTMLResponse:
+        """
+        Renderiza la página, la guarda y la devuelve como respuesta.
+        """
+        start = perf_counter()
+        body = templates.get_template(name).render({"request": self.request, **context}).encode()
+        elapsed = perf_counter() - start
+        fragment_cache.set(self.namespace, self.key, body, self.generation, elapsed)
+        return HTMLResponse(
+            content=body,
+            headers={
+                "X-Cache": "MISS",
+                "Server-Timing": f"render;dur={(elapsed + self.row_seconds) * 1000:.3f}"
+            }
+        )
+
+    def stream(
+        self, db, name: str, context: dict, stmt: Select, row_name: str, item_name: str, pager: WebPager
+    ) -> StreamingResponse:
+        """
+        Respuesta que renderiza la página name por partes y lee stmt con la
+        sesión db de la petición (sigue abierta hasta terminar la respuesta)
+        cuando la plantilla llega a las filas; las filas (plantilla row_name)
+        llegan a la página como rows y la paginación como pager (sus enlaces
+        se conocen tras las filas).
+        La página se guarda entera al terminar si no supera el tamaño máximo.
+        """
+        async def rows() -> AsyncIterator[Markup]:
+            # cada fila se renderiza en cuanto llega su lote del cursor;
+            # pager.stream_rows() las recorre para calcular los enlaces
+            result = await db.stream(stmt.execution_options(yield_per=STREAM_ROW_BATCH))
+            try:
+                items = (item async for batch in result.partitions() for item in batch)
+                async for item in pager.stream_rows(items):
+                    yield self.row(row_name, item, item_name)
+            finally:
+                await result.close()
+
+        async def buffered() -> AsyncIterator[str]:
+            # como TemplateStream.enable_buffering(): se agrupan los trozos de
+            # salida de la plantilla en cada envío
+            buffer = []
+            async for chunk in async_environment.get_template(name).generate_async({
+                "request": self.request,
+                **context,
+                "rows": rows(),
+                "pager": pager,
+            }):
+                buffer.append(chunk)
+                if len(buffer) == STREAM_BUFFER_SIZE:
+                    yield "".join(buffer)
+                    buffer = []
+            if buffer:
+                yield "".join(buffer)
+
+        async def chunks() -> AsyncIterator[str]:
+            start = perf_counter()
+            body, size = [], 0
+            async for chunk in buffered():
+                if body is not None:
+                    body.append(chunk)
+                    size += len(chunk)
+                    if size > settings.fragment_cache_max_page_chars:
+                        body = None
+                yield chunk
+
+            if body is not None:
+                fragment_cache.set(
+                    self.namespace, self.key, "".join(body).encode(), self.generation,
+                    perf_counter() - start
+                )
+
+        return StreamingResponse(chunks(), media_type=HTML_MEDIA_TYPE, headers={"X-Cache": "MISS"})
+
+    async def render_list(
+        self, db, name: str, context: dict, stmt: Select, row_name: str, item_name: str, pager: WebPager
+    ) -> HTMLResponse | StreamingResponse:
+        """
+        Página de listado: en streaming (WEB_STREAM_LISTS) o renderizada entera.
+        stmt es la consulta de columnas de la página ya preparada por pager.
+        """
+        if settings.web_stream_lists:
+            return self.stream(db, name, context, stmt, row_name, item_name, pager)
+        items = (await db.execute(stmt)).all()
+        rows = self.rows(row_name, pager.rows(items), item_name)
+        return self.render(name, {**context, "rows": rows, "pager": pager})
+
+
+def cached_page(namespace: str):
+    """
+    Dependencia para las páginas web cacheables:
+
+        async def list_songs(request: Request, page: CachedPage = Depends(cached_page(SONGS)), ...):
+            if (response := page.hit()) is not None:
+                return response
+            ...
+            return page.render("songs/list.html", {...})
+    """
+    def dependency(request: Request) -> CachedPage:
+        return CachedPage(request, namespace, cache_key(request), fragment_cache.generation(namespace))
+    return dependency
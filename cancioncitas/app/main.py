@@ -1,18 +1,72 @@
 """
 Configuración de la aplicación FastAPI
 """
+import logging
+from contextlib import asynccontextmanager
+from time import perf_counter
+
 from fastapi import FastAPI
-from app.database import init_db
+from fastapi.concurrency import run_in_threadpool
+from app.database import async_engine, engine, init_db
+from app.config import settings
+from app.etag import ETagMiddleware
+from app.metrics import MetricsMiddleware
+from app.query_budget import QueryBudgetMiddleware
+from app.templating import compile_templates
 from app.routers.api import router as api_router
 from app.routers.web import router as web_router
 
+logger = logging.getLogger("uvicorn.error")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque y parada de cada proceso. Importar app.main no toca la base de
+    datos: el esquema y los datos por defecto se preparan aquí, antes de
+    atender la primera petición, y se mide cuánto tarda cada paso.
+    """
+    start = perf_counter()
+    #inicializa la base de datos (sólo hace algo la primera vez en cada despliegue)
+    initialized = await run_in_threadpool(init_db)
+    db_seconds = perf_counter() - start
+
+    #compila todas las plantillas antes de atender la primera petición
+    templates = await run_in_threadpool(compile_templates)
+    total_seconds = perf_counter() - start
+
+    app.state.startup = {
+        "init_db": initialized,
+        "init_db_seconds": db_seconds,
+        "templates": templates,
+        "total_seconds": total_seconds,
+    }
+    logger.info(
+        "Arranque en %.3fs (base de datos %.3fs%s, %d plantillas)",
+        total_seconds, db_seconds, "" if initialized else ", sin cambios", templates
+    )
+
+    yield
+
+    #cerrar las conexiones de los pools
+    await async_engine.dispose()
+    engine.dispose()
 
 
 #Crea la instancia de la aplicación FastAPI
-app = FastAPI(title="Cancioncitas API", version="1.0.0")
+app = FastAPI(title="Cancioncitas API", version="1.0.0", lifespan=lifespan)
+
+#añade el ETag calculado por cada endpoint GET a su respuesta
+app.add_middleware(ETagMiddleware)
 
-#inicializa la base de datos con canciones por defecto
-init_db()
+#comprueba el presupuesto de consultas de cada ruta (desarrollo y pruebas)
+if settings.query_budget_mode != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+
+#mide cada petición (Server-Timing y /metrics); se añade la última para que
+#envuelva a las demás y su tiempo cuente también
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 #incluir routers de la API
 app.include_router(api_router)
@@ -23,4 +77,4 @@ app.include_router(web_router)
 @app.get("/")
 def home():
     return {"mensaje": "Bienvenido a la app Cancioncitas"}
-"""
\ No newline at end of file
+"""
@@ -0,0 +1,310 @@
+"""
+Métricas de las peticiones: Server-Timing y /metrics
+
+MetricsMiddleware mide cada petición y reparte su tiempo entre:
+  - db: sentencias SQL (eventos before/after_cursor_execute de ambos motores)
+  - tpl: renderizado de plantillas Jinja2 (ver TimedTemplate en app.templating)
+  - app: tiempo total hasta enviar las cabeceras
+
+Los tiempos de la petición en curso se guardan en una ContextVar: los eventos
+del motor se disparan en la misma tarea (AsyncSession, a través de greenlet) o
+en el threadpool (ThreadedSession), que copia el contexto, así que todos ven
+el mismo RequestTimings.
+
+Las cabeceras se envían antes que el cuerpo, por eso en los listados en
+streaming la cabecera Server-Timing sólo cuenta hasta la primera parte de la
+página. Si el servidor admite trailers (extensión http.response.trailers de
+ASGI), las respuestas en streaming llevan además un trailer Server-Timing con
+los tiempos de la respuesta completa. Las métricas de /metrics (también el
+tiempo de plantillas de cada petición) siempre la incluyen.
+
+Los contadores son de cada proceso: con varios workers, Prometheus debe
+consultar cada uno (o sumar sus series).
+"""
+
+import bisect
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+# límites superiores (segundos) de los intervalos de los histogramas
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# etiqueta de las peticiones que no corresponden a ninguna ruta (404): la ruta
+# real no se usa como etiqueta para no crear una serie por cada url inventada
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestTimings:
+    """
+    Tiempos acumulados de la petición en curso.
+    """
+    __slots__ = ("db_seconds", "db_queries", "template_seconds", "template_depth", "statements")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.template_seconds = 0.0
+        # plantillas anidadas (filas renderizadas dentro de la página): sólo cuenta la exterior
+        self.template_depth = 0
+        # texto de cada sentencia, sólo si se comprueba el presupuesto de consultas (app.query_budget)
+        self.statements: list[str] | None = None
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+# ---------------------------------------------------------------------------
+# base de datos y plantillas
+# ---------------------------------------------------------------------------
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registra en el motor los eventos que suman a la petición en curso el
+    número de sentencias y el tiempo que tardan en el driver.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_timings.get() is not None:
+            conn.info.setdefault("query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = current_timings.get()
+        starts = conn.info.get("query_start")
+        if timings is not None and starts:
+            timings.db_seconds += perf_counter() - starts.pop()
+            timings.db_queries += 1
+            if timings.statements is not None:
+                timings.statements.append(statement)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # la sentencia ha fallado: no habrá after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+
+@contextmanager
+def template_timer():
+    """
+    Suma a la petición en curso el tiempo de renderizado del bloque, sin
+    contar el de las consultas que se hagan dentro (los listados en streaming
+    leen las filas mientras se renderiza la plantilla).
+    """
+    timings = current_timings.get()
+    if timings is None or timings.template_depth:
+        yield
+        return
+
+    timings.template_depth += 1
+    db_before = timings.db_seconds
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.template_depth -= 1
+        timings.template_seconds += perf_counter() - start - (timings.db_seconds - db_before)
+
+
+# ---------------------------------------------------------------------------
+# registro de métricas y formato de Prometheus
+# ---------------------------------------------------------------------------
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        # una posición por límite de LATENCY_BUCKETS más la de +Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas por ruta (plantilla de la ruta, no la url) y
+    método. Sólo se actualiza desde el bucle de eventos, sin bloqueos.
+    """
+
+    def __init__(self):
+        self.requests: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.duration: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.db_duration: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.db_queries: dict[tuple[str, str], int] = defaultdict(int)
+        self.template_seconds: dict[tuple[str, str], float] = defaultdict(float)
+        self.template_duration: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings) -> None:
+        key = (method, route)
+        self.requests[(method, route, status)] += 1
+        self.duration[key].observe(seconds)
+        self.db_duration[key].observe(timings.db_seconds)
+        self.db_queries[key] += timings.db_queries
+        self.template_seconds[key] += timings.template_seconds
+        if timings.template_seconds:
+            self.template_duration[key].observe(timings.template_seconds)
+
+    def render(self) -> str:
+        """
+        Todas las métricas en el formato de texto de Prometheus (0.0.4).
+        """
+        lines = [
+            "# HELP cancioncitas_requests_total Peticiones atendidas por ruta, método y código de estado.",
+            "# TYPE cancioncitas_requests_total counter",
+        ]
+        for (method, route, status), value in sorted(self.requests.items()):
+            lines.append(f"cancioncitas_requests_total{{{labels(method, route)},status=\"{status}\"}} {value}")
+
+        render_histogram(
+            lines, "cancioncitas_request_duration_seconds",
+            "Duración de las peticiones hasta enviar la respuesta completa.", self.duration
+        )
+        render_histogram(
+            lines, "cancioncitas_request_db_duration_seconds",
+            "Tiempo de cada petición ejecutando sentencias SQL.", self.db_duration
+        )
+        render_histogram(
+            lines, "cancioncitas_request_template_duration_seconds",
+            "Tiempo de cada petición que renderiza plantillas, hasta la última parte de la respuesta.",
+            self.template_duration
+        )
+
+        lines += [
+            "# HELP cancioncitas_db_queries_total Sentencias SQL ejecutadas por las peticiones de cada ruta.",
+            "# TYPE cancioncitas_db_queries_total counter",
+        ]
+        for (method, route), value in sorted(self.db_queries.items()):
+            lines.append(f"cancioncitas_db_queries_total{{{labels(method, route)}}} {value}")
+
+        lines += [
+            "# HELP cancioncitas_template_seconds_total Tiempo renderizando plantillas en las peticiones de cada ruta.",
+            "# TYPE cancioncitas_template_seconds_total counter",
+        ]
+        for (method, route), value in sorted(self.template_seconds.items()):
+            lines.append(f"cancioncitas_template_seconds_total{{{labels(method, route)}}} {value:.6f}")
+
+        return "\n".join(lines) + "\n"
+
+
+def labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+def render_histogram(lines: list[str], name: str, help_text: str, histograms: dict) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        base = labels(method, route)
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{base}}} {histogram.total:.6f}")
+        lines.append(f"{name}_count{{{base}}} {histogram.count}")
+
+
+metrics = MetricsRegistry()
+
+
+# ---------------------------------------------------------------------------
+# middleware
+# ---------------------------------------------------------------------------
+
+def server_timing(timings: RequestTimings, elapsed: float) -> str:
+    queries = "1 consulta" if timings.db_queries == 1 else f"{timings.db_queries} consultas"
+    return (
+        f'db;dur={timings.db_seconds * 1000:.3f};desc="{queries}", '
+        f"tpl;dur={timings.template_seconds * 1000:.3f}, "
+        f"app;dur={elapsed * 1000:.3f}"
+    )
+
+
+class MetricsMiddleware:
+    """
+    Mide cada petición HTTP: añade Server-Timing a la respuesta (si
+    SERVER_TIMING_ENABLED), también como trailer en las respuestas en
+    streaming si el servidor lo admite, y al terminar la registra en metrics
+    por su ruta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = perf_counter()
+        status = 500
+        trailers_supported = settings.server_timing_enabled and "http.response.trailers" in scope.get("extensions", {})
+        send_trailers = False
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status, send_trailers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing_enabled:
+                    headers = merge_server_timing(
+                        message.get("headers", []), server_timing(timings, perf_counter() - start)
+                    )
+                    # sin Content-Length la respuesta va en streaming: los
+                    # tiempos completos se envían en un trailer al terminar
+                    if trailers_supported and not message.get("trailers") and is_streamed(status, headers):
+                        send_trailers = True
+                        message["trailers"] = True
+                        headers = [*headers, (b"trailer", b"Server-Timing")]
+                    message["headers"] = headers
+            await send(message)
+            if send_trailers and message["type"] == "http.response.body" and not message.get("more_body", False):
+                await send({
+                    "type": "http.response.trailers",
+                    "headers": [(b"server-timing", server_timing(timings, perf_counter() - start).encode())],
+                    "more_trailers": False,
+                })
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            # la ruta la deja FastAPI en el scope al resolver la petición
+            route = scope.get("route")
+            metrics.observe(
+                scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status, perf_counter() - start, timings
+            )
+
+
+def is_streamed(status: int, headers: list) -> bool:
+    """
+    La respuesta tiene cuerpo y no indica su tamaño (Content-Length).
+    """
+    return status not in (204, 304) and not any(name.lower() == b"content-length" for name, _ in headers)
+
+
+def merge_server_timing(headers: list, value: str) -> list:
+    """
+    Añade value a la cabecera Server-Timing que ya tenga la respuesta (p. ej.
+    la de las páginas web cacheadas) o la crea.
+    """
+    for index, (name, existing) in enumerate(headers):
+        if name.lower() == b"server-timing":
+            headers = list(headers)
+            headers[index] = (name, existing + b", " + value.encode())
+            return headers
+    return [*headers, (b"server-timing", value.encode())]
@@ -2,8 +2,8 @@
 Modelos de base de datos (SQLAlchemy)
 """
 
-from app.models.song import Song
 from app.models.artist import Artist
+from app.models.song import Song
 from app.models.concert import Concert, ConcertStatus
 
 
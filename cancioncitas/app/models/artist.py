@@ -8,7 +8,7 @@ class Artist(Base):
     
     # clave primaria, se genera automáticamente
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    # requerido, máximo 200 caracteres
-    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    # requerido, máximo 200 caracteres, indexado para buscar por nombre
+    name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
     # opcional
     birth_date: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
\ No newline at end of file
@@ -1,7 +1,8 @@
 #modelo de la tabla song
-from sqlalchemy import Integer, String, Boolean
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Boolean, ForeignKey, Index, func, literal_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship, column_property
 from app.database import Base
+from app.models.artist import Artist
 
 # modelo de la tabla song (se crea sólo un modelo, que será una tabla en nuestra base de datos)
 class Song(Base):
@@ -10,11 +11,32 @@ class Song(Base):
     # clave primaria, se genera automáticamente
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     # requerido, máximo 200 caracteres
-    title: Mapped[str] = mapped_column(String(200), nullable=False)
-    # requerido, máximo 200 caracteres
-    artist: Mapped[str] = mapped_column(String(200), nullable=False)
+    title: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    # requerido, clave foránea indexada a artists
+    artist_id: Mapped[int] = mapped_column(Integer, ForeignKey("artists.id"), nullable=False, index=True)
     # opcional
     duration_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
     # opcional
-    explicit: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
-    
\ No newline at end of file
+    explicit: Mapped[bool | None] = mapped_column(Boolean, nullable=True, index=True)
+    
+    # artista de la canción, se carga siempre en la misma consulta (INNER JOIN)
+    artist: Mapped["Artist"] = relationship("Artist", lazy="joined", innerjoin=True)
+    
+    # clave para ordenar y filtrar por duración: las canciones sin duración valen -1
+    # (una comparación con NULL no sirve para paginar por cursor); el -1 va
+    # literal en el SQL para que SQLite reconozca la expresión de los índices
+    duration_sort: Mapped[int] = column_property(
+        func.coalesce(duration_seconds, literal_column("-1"))
+    )
+
+
+# índices compuestos para los filtros y ordenaciones del listado de canciones
+# (SQLite añade el id al final de cada índice, que desempata la ordenación)
+Index("ix_songs_duration_sort", Song.duration_sort.expression)
+Index("ix_songs_artist_id_title", Song.artist_id, Song.title)
+Index("ix_songs_artist_id_duration_sort", Song.artist_id, Song.duration_sort.expression)
+Index("ix_songs_explicit_title", Song.explicit, Song.title)
+Index("ix_songs_explicit_duration_sort", Song.explicit, Song.duration_sort.expression)
+Index("ix_songs_artist_id_explicit", Song.artist_id, Song.explicit)
+Index("ix_songs_artist_id_explicit_title", Song.artist_id, Song.explicit, Song.title)
+Index("ix_songs_artist_id_explicit_duration_sort", Song.artist_id, Song.explicit, Song.duration_sort.expression)
@@ -0,0 +1,302 @@
+"""
+Paginación por cursor (keyset) para los listados de la API y de la web
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from datetime import datetime
+from time import perf_counter
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.cache import count_cache
+from app.schemas.types import SQLITE_INTEGER_MAX, SQLITE_INTEGER_MIN
+
+# tamaño de página por defecto y máximo permitido
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# tamaños de página que se ofrecen en los listados web
+WEB_PAGE_SIZES = (25, 50, 100, 200)
+WEB_DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Convierte los valores de la clave de ordenación de la última fila
+    en un cursor opaco (base64 url-safe).
+    """
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list[InstrumentedAttribute]) -> list:
+    """
+    Decodifica un cursor generado por encode_cursor.
+    Lanza un 400 si el cursor no es válido para las columnas de ordenación.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [cursor_value(v, column) for v, column in zip(values, columns)]
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El cursor de paginación no es válido"
+        )
+
+
+def cursor_value(value, column: InstrumentedAttribute):
+    """
+    Valor del cursor para column: un escalar (o None) de su tipo; las fechas
+    viajan como texto ISO. Lanza ValueError con cualquier otro valor.
+    """
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if python_type is int and type(value) is int and SQLITE_INTEGER_MIN <= value <= SQLITE_INTEGER_MAX:
+        return value
+    if python_type is float and type(value) in (int, float):
+        return value
+    if python_type is str and isinstance(value, str):
+        return value
+    raise ValueError(value)
+
+
+def keyset_window(
+    stmt: Select,
+    columns: list[InstrumentedAttribute],
+    limit: int,
+    after: str | None = None,
+    before: str | None = None,
+    descending: bool = False,
+) -> Select:
+    """
+    Limita stmt a las limit + 1 filas siguientes a after (o anteriores a
+    before), ordenadas por columns. Con before la consulta recorre el índice al
+    revés: las filas llegan en orden inverso y hay que darles la vuelta.
+    """
+    cursor = before if before is not None else after
+    # sentido en el que la consulta recorre la clave de ordenación
+    reverse = descending != (before is not None)
+    if cursor is not None:
+        key, values = tuple_(*columns), tuple_(*decode_cursor(cursor, columns))
+        stmt = stmt.where(key < values if reverse else key > values)
+
+    order_by = [column.desc() for column in columns] if reverse else columns
+    # se pide una fila de más para saber si existe página siguiente
+    return stmt.order_by(*order_by).limit(limit + 1)
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    columns: list[InstrumentedAttribute],
+    limit: int,
+    after: str | None = None,
+    descending: bool = False,
+    cursor_values: Callable[[object], list] | None = None,
+) -> tuple[list, str | None]:
+    """
+    Ejecuta stmt (una consulta de columnas, ver app.queries) ordenado por
+    columns (deben estar indexadas y terminar en la clave primaria para que el
+    orden sea total) y devuelve una página de filas junto al cursor de la
+    página siguiente (None si no hay más).
+
+    En lugar de OFFSET se filtra por (col1, col2, ...) > (valores del cursor),
+    por lo que el coste de cada página es el mismo sea cual sea su profundidad.
+    cursor_values obtiene esos valores de la última fila; por defecto se leen
+    los atributos con el mismo nombre que las columnas.
+    """
+    result = await db.execute(keyset_window(stmt, columns, limit, after, descending=descending))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(row_cursor_values(rows[-1], columns, cursor_values))
+
+    return rows, next_cursor
+
+
+def row_cursor_values(row, columns: list[InstrumentedAttribute], cursor_values=None) -> list:
+    if cursor_values is None:
+        return [getattr(row, column.key) for column in columns]
+    return cursor_values(row)
+
+
+async def cached_count(db: AsyncSession, namespace: str, stmt: Select) -> int:
+    """
+    Número de filas de stmt, guardado en count_cache hasta la siguiente
+    escritura en namespace (o hasta que caduque), de modo que el COUNT(*)
+    sólo se ejecuta una vez por combinación de filtros y no en cada página.
+    """
+    compiled = stmt.compile()
+    key = f"{compiled}|{sorted(compiled.params.items())!r}"
+    generation = count_cache.generation(namespace)
+
+    cached = count_cache.get(namespace, key)
+    if cached is not None:
+        return int(cached)
+
+    start = perf_counter()
+    total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    count_cache.set(namespace, key, str(total).encode(), generation, perf_counter() - start)
+    return total
+
+
+class WebPager:
+    """
+    Paginación de un listado web: calcula la consulta de la página pedida y,
+    a medida que se recorren sus filas con rows(), los enlaces a la página
+    anterior y siguiente.
+
+    Por defecto pagina por cursor (?after= / ?before=), con una consulta de
+    coste acotado por página. Los resultados de búsqueda ordenados por
+    relevancia no tienen una clave indexada por la que avanzar y se paginan
+    por número de página (?page=).
+    """
+
+    CURSOR_PARAMS = ["after", "before", "page"]
+
+    def __init__(self, request: Request, size: int, total: int):
+        self.request = request
+        self.size = size
+        self.total = total
+        self.sizes = WEB_PAGE_SIZES
+        self.next_url: str | None = None
+        self.prev_url: str | None = None
+        self._mode = None
+
+    @property
+    def first_url(self) -> str:
+        return self._url()
+
+    def _url(self, **params) -> str:
+        # enlaces relativos: misma ruta y filtros, cambiando sólo el cursor
+        url = self.request.url.remove_query_params(self.CURSOR_PARAMS).include_query_params(**params)
+        return f"{url.path}?{url.query}" if url.query else url.path
+
+    def keyset(
+        self,
+        stmt: Select,
+        columns: list[InstrumentedAttribute],
+        after: str | None = None,
+        before: str | None = None,
+        descending: bool = False,
+        cursor_values: Callable[[object], list] | None = None,
+    ) -> Select:
+        self._mode = ("keyset", columns, after, before, cursor_values)
+        return keyset_window(stmt, columns, self.size, after, before, descending)
+
+    def numbered(self, stmt: Select, page: int) -> Select:
+        page = max(page, 1)
+        self._mode = ("numbered", page)
+        return stmt.offset((page - 1) * self.size).limit(self.size + 1)
+
+    def rows(self, items: Iterable) -> Iterator:
+        """
+        Filas de la página en orden de presentación a partir del resultado de
+        la consulta; al terminar quedan calculados next_url y prev_url.
+        """
+        if self._backwards():
+            items = self._reverse(list(items))
+        else:
+            self._start()
+        for item in items:
+            if not self._take(item):
+                break
+            yield item
+        self._finish()
+
+    async def stream_rows(self, items: AsyncIterable) -> AsyncIterator:
+        """
+        Como rows() para un resultado que se lee por partes: cada fila se
+        entrega en cuanto llega, salvo con ?before=, que recorre la clave al
+        revés y hay que leer la página (como mucho size + 1 filas) para darle
+        la vuelta.
+        """
+        if self._backwards():
+            for item in self.rows([item async for item in items]):
+                yield item
+            return
+        self._start()
+        async for item in items:
+            if not self._take(item):
+                break
+            yield item
+        self._finish()
+
+    def _backwards(self) -> bool:
+        return self._mode[0] == "keyset" and self._mode[3] is not None
+
+    def _start(self) -> None:
+        self._count = 0
+        self._first = self._last = None
+        self._has_next = False
+        if self._mode[0] == "numbered":
+            self._has_prev = self._mode[1] > 1
+        else:
+            self._has_prev = self._mode[2] is not None
+
+    def _reverse(self, items: list) -> list:
+        # la consulta recorre la clave al revés: se les da la vuelta a las filas
+        self._start()
+        self._has_prev = len(items) > self.size
+        self._has_next = True
+        return items[:self.size][::-1]
+
+    def _take(self, item) -> bool:
+        # la fila size + 1 sólo indica que hay una página más
+        if self._count == self.size:
+            self._has_next = True
+            return False
+        self._first = item if self._first is None else self._first
+        self._last = item
+        self._count += 1
+        return True
+
+    def _finish(self) -> None:
+        if self._mode[0] == "numbered":
+            page = self._mode[1]
+            if self._has_next:
+                self.next_url = self._url(page=page + 1)
+            if self._has_prev:
+                self.prev_url = self._url(page=page - 1)
+            return
+
+        _, columns, _, _, cursor_values = self._mode
+        if self._first is not None and self._has_prev:
+            self.prev_url = self._url(before=encode_cursor(row_cursor_values(self._first, columns, cursor_values)))
+        if self._last is not None and self._has_next:
+            self.next_url = self._url(after=encode_cursor(row_cursor_values(self._last, columns, cursor_values)))
+
+
+def web_page_size(size: str | None) -> int:
+    """
+    Tamaño de página pedido en ?size=, o el de por defecto si no es uno de los ofrecidos.
+    """
+    try:
+        value = int(size) if size else WEB_DEFAULT_PAGE_SIZE
+    except ValueError:
+        return WEB_DEFAULT_PAGE_SIZE
+    return value if value in WEB_PAGE_SIZES else WEB_DEFAULT_PAGE_SIZE
+
+
+def web_page_number(page: str | None) -> int:
+    try:
+        return max(int(page), 1) if page else 1
+    except ValueError:
+        return 1
@@ -0,0 +1,8 @@
+"""
+Consultas de lectura reutilizadas por los routers de la API y de la web
+
+Las lecturas seleccionan sólo las columnas que necesita cada respuesta o
+plantilla y devuelven filas ligeras (Row) o registros con __slots__, sin
+crear entidades ORM ni registrarlas en la sesión. Las entidades se reservan
+para las escrituras.
+"""
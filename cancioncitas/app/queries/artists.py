@@ -0,0 +1,21 @@
+"""
+Lecturas de artistas
+"""
+
+from sqlalchemy import Select, select
+
+from app.models import Artist
+
+
+def artist_rows() -> Select:
+    """
+    Filas de artistas con las columnas de ArtistResponse.
+    """
+    return select(Artist.id, Artist.name, Artist.birth_date)
+
+
+def artist_options() -> Select:
+    """
+    Artistas para los desplegables de los formularios, por nombre.
+    """
+    return select(Artist.id, Artist.name).order_by(Artist.name)
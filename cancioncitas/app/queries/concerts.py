@@ -0,0 +1,79 @@
+"""
+Lecturas de conciertos
+
+ConcertResponse anida el artista: las filas de concert_rows sólo tienen las
+columnas de concerts y concert_records les añade el artista desde la dimensión
+en memoria (app.dimensions), así los listados no hacen join con artists.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dimensions import ArtistRecord, artist_dimension
+from app.models import Concert, ConcertStatus
+
+
+@dataclass(slots=True, frozen=True)
+class ConcertRecord:
+    id: int
+    name: str
+    price: float
+    capacity: int | None
+    status: ConcertStatus
+    is_sold_out: bool | None
+    date_time: datetime
+    img_url: str | None
+    artist_id: int
+    artist: ArtistRecord
+
+
+# columnas de ConcertResponse salvo el artista (también para ... RETURNING)
+CONCERT_COLUMNS = (
+    Concert.id,
+    Concert.name,
+    Concert.price,
+    Concert.capacity,
+    Concert.status,
+    Concert.is_sold_out,
+    Concert.date_time,
+    Concert.img_url,
+    Concert.artist_id,
+)
+
+
+def concert_rows() -> Select:
+    """
+    Filas de conciertos con las columnas de ConcertResponse salvo el artista.
+    """
+    return select(*CONCERT_COLUMNS)
+
+
+async def concert_records(db: AsyncSession, rows) -> list[ConcertRecord]:
+    """
+    Convierte filas de concert_rows en registros con su artista.
+
+    Los artistas que no están en la dimensión se leen de la base de datos
+    (artist_dimension.lookup); los conciertos cuyo artista tampoco existe ahí
+    (huérfanos, sólo posibles con SQLITE_FOREIGN_KEYS=0) se omiten, igual que
+    el join de song_rows omite las canciones huérfanas.
+    """
+    artists = await artist_dimension.lookup(db, {row.artist_id for row in rows})
+    return [
+        ConcertRecord(
+            id=row.id,
+            name=row.name,
+            price=row.price,
+            capacity=row.capacity,
+            status=row.status,
+            is_sold_out=row.is_sold_out,
+            date_time=row.date_time,
+            img_url=row.img_url,
+            artist_id=row.artist_id,
+            artist=artist,
+        )
+        for row in rows
+        if (artist := artists.get(row.artist_id)) is not None
+    ]
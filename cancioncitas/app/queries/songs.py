@@ -0,0 +1,153 @@
+"""
+Lecturas de canciones: columnas, filtros y ordenación del listado
+
+Cada combinación de filtro y ordenación del listado se sirve recorriendo un
+índice (app/models/song.py), sin ordenar filas en memoria (USE TEMP B-TREE):
+  - artist_id y explicit son igualdades: cualquier combinación de ambos con
+    cualquier ordenación (id, title, duration, artist)
+  - artist (nombre) se resuelve con el índice de artists.name y se recorren
+    las canciones de cada artista con ese nombre, una tras otra (por id del
+    artista): la ordenación elegida se aplica dentro de cada artista
+  - el rango de duración (min_duration, max_duration) se recorre por el
+    índice de duración si se ordena por duración; con otra ordenación se
+    recorre el índice de esa ordenación y la duración se comprueba en cada
+    fila (song_conditions(duration_index=False)): cada página lee filas en
+    orden hasta llenarse, sin ordenar nada en memoria
+Las pruebas de tests/test_song_indexes.py comprueban los planes con EXPLAIN
+QUERY PLAN.
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dimensions import artist_dimension
+from app.models import Artist, Song
+from app.schemas.song import SongSort
+
+
+def song_rows() -> Select:
+    """
+    Filas de canciones con las columnas de SongResponse; artist es el nombre
+    del artista (el join usa la clave primaria de artists).
+    """
+    return select(
+        Song.id,
+        Song.title,
+        Song.artist_id,
+        Artist.name.label("artist"),
+        Song.duration_seconds,
+        Song.explicit,
+    ).join(Artist, Artist.id == Song.artist_id)
+
+
+# columnas propias de SongResponse, para INSERT/UPDATE ... RETURNING
+SONG_COLUMNS = (Song.id, Song.title, Song.artist_id, Song.duration_seconds, Song.explicit)
+
+
+@dataclass(slots=True, frozen=True)
+class SongRecord:
+    id: int
+    title: str
+    artist_id: int
+    artist: str
+    duration_seconds: int | None
+    explicit: bool | None
+
+
+async def song_record(db: AsyncSession, row) -> SongRecord | None:
+    """
+    Fila con SONG_COLUMNS (p. ej. la devuelta por una escritura) más el nombre
+    del artista, tomado de la dimensión en memoria en lugar de otro SELECT.
+    None si el artista no existe (sólo posible con SQLITE_FOREIGN_KEYS=0).
+    """
+    artist = (await artist_dimension.lookup(db, [row.artist_id])).get(row.artist_id)
+    if artist is None:
+        return None
+    return SongRecord(
+        id=row.id,
+        title=row.title,
+        artist_id=row.artist_id,
+        artist=artist.name,
+        duration_seconds=row.duration_seconds,
+        explicit=row.explicit,
+    )
+
+
+# ordenaciones que recorren los índices de duración (ver song_conditions)
+DURATION_SORTS = (SongSort.DURATION, SongSort.DURATION_DESC)
+
+
+def song_conditions(
+    artist_id: int | None = None,
+    artist: str | None = None,
+    explicit: bool | None = None,
+    min_duration: int | None = None,
+    max_duration: int | None = None,
+    joined: bool = False,
+    duration_index: bool = True,
+) -> list:
+    """
+    Condiciones WHERE para los filtros del listado (y de las operaciones masivas).
+    joined: la consulta ya une artists (song_rows), el nombre se compara ahí.
+    duration_index: el rango de duración se recorre con los índices de
+    duration_sort; si no (el listado se ordena por otra clave), se comprueba
+    en cada fila mientras se recorre el índice de la ordenación.
+    """
+    conditions = []
+    if artist_id is not None:
+        conditions.append(Song.artist_id == artist_id)
+    if artist is not None:
+        #nombre exacto del artista, resuelto con los índices de artists.name y songs.artist_id
+        if joined:
+            conditions.append(Artist.name == artist.strip())
+        else:
+            conditions.append(Song.artist_id.in_(select(Artist.id).where(Artist.name == artist.strip())))
+    if explicit is not None:
+        conditions.append(Song.explicit == explicit)
+    #los rangos de duración usan la misma expresión que los índices; con
+    #duration + 0 la expresión ya no coincide con la del índice y SQLite no
+    #lo usa (sí el de la ordenación, sin ordenar las filas en memoria);
+    #el mínimo 0 deja fuera las canciones sin duración (-1)
+    duration = Song.duration_sort if duration_index else Song.duration_sort + 0
+    if min_duration is not None or max_duration is not None:
+        conditions.append(duration >= max(min_duration or 0, 0))
+    if max_duration is not None:
+        conditions.append(duration <= max_duration)
+    return conditions
+
+
+def sorted_songs(stmt: Select, sort: SongSort, by_artist: bool = False) -> tuple[Select, list, object, bool]:
+    """
+    Aplica la ordenación a stmt (una consulta de song_rows). Devuelve (stmt,
+    columnas de ordenación, función que obtiene los valores del cursor de una
+    fila, descendente).
+    by_artist: stmt filtra por nombre de artista; se ordena primero por el id
+    del artista para recorrer sus canciones por los índices de songs.artist_id.
+    """
+    descending = sort.value.startswith("-")
+    key = sort.value.lstrip("-")
+
+    if key == "artist":
+        #se recorre artists por su índice de nombre (que termina en el id) y las
+        #canciones de cada uno por el índice de artist_id
+        return (
+            stmt,
+            [Artist.name, Artist.id, Song.id],
+            lambda s: [s.artist, s.artist_id, s.id],
+            descending,
+        )
+
+    if key == "title":
+        columns, values = [Song.title, Song.id], lambda s: [s.title, s.id]
+    elif key == "duration":
+        #misma expresión que Song.duration_sort, calculada a partir de la fila
+        columns = [Song.duration_sort, Song.id]
+        values = lambda s: [-1 if s.duration_seconds is None else s.duration_seconds, s.id]
+    else:
+        columns, values = [Song.id], lambda s: [s.id]
+
+    if by_artist:
+        return stmt, [Artist.id, *columns], lambda s: [s.artist_id, *values(s)], descending
+    return stmt, columns, values, descending
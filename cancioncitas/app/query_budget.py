@@ -0,0 +1,151 @@
+"""
+Presupuesto de consultas por ruta y detector de N+1 (desarrollo y pruebas)
+
+Cada ruta declara junto a su decorador cuántas sentencias SQL puede ejecutar
+una petición, contando las de sus dependencias (p. ej. la de etag_for):
+
+    @router.get("/{id}", dependencies=[Depends(query_budget(2)), Depends(etag_for("songs"))])
+
+QueryBudgetMiddleware cuenta las sentencias de cada petición con los eventos
+del motor (ver app.metrics) y, al terminar, comprueba que:
+  - no se ha superado el presupuesto de la ruta
+  - la ruta declara un presupuesto si ha ejecutado alguna sentencia
+  - ninguna sentencia se ha repetido QUERY_REPEAT_THRESHOLD veces o más con
+    la misma forma (mismo SQL salvo los valores): el patrón típico de un N+1,
+    p. ej. leer concert.artist fila a fila al quitar un joinedload
+
+Con QUERY_BUDGET=warn (por defecto en desarrollo) los problemas se escriben en
+el log; con QUERY_BUDGET=raise la petición termina con QueryBudgetExceeded,
+que el cliente de pruebas de FastAPI/httpx propaga, así las pruebas
+(tests/test_query_budget.py, que llaman a todas las rutas) o
+QUERY_BUDGET=raise python -m benchmarks.endpoints fallan si un cambio añade
+consultas. En producción está desactivado.
+"""
+
+import logging
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from fastapi import Depends, Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import RequestTimings, current_timings
+
+logger = logging.getLogger("uvicorn.error")
+
+# listas de parámetros (IN (?, ?, ...), VALUES (?, ?), (?, ?), ...): su longitud
+# depende de los datos, no de la forma de la consulta
+PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+ROW_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    queries: int
+    # el presupuesto es por lote: cuántos lotes procesa la petición lo guarda
+    # query_budget en request.state.query_batches (operaciones masivas)
+    per_batch: bool = False
+
+
+def query_budget(queries: int, batches: Callable[..., int] | None = None):
+    """
+    Dependencia que declara el número máximo de sentencias SQL de la ruta.
+    Debe ir la primera en dependencies, antes de las que pueden responder sin
+    llegar al endpoint (el 304 de etag_for).
+
+    En las operaciones masivas el presupuesto es por lote: batches es una
+    dependencia que devuelve el número de lotes de la petición, calculado con
+    la misma dependencia que da los elementos al endpoint (FastAPI la resuelve
+    una sola vez por petición):
+
+        @router.post("/bulk", dependencies=[Depends(query_budget(2, batches=bulk_batches))])
+    """
+    budget = QueryBudget(queries, per_batch=batches is not None)
+
+    if batches is None:
+        def dependency(request: Request) -> None:
+            request.state.query_budget = budget
+        return dependency
+
+    def batched_dependency(request: Request, count: int = Depends(batches)) -> None:
+        request.state.query_budget = budget
+        request.state.query_batches = count
+    return batched_dependency
+
+
+def statement_shape(statement: str) -> str:
+    shape = PLACEHOLDER_LIST.sub("?", statement)
+    shape = ROW_LIST.sub("(?)", shape)
+    return WHITESPACE.sub(" ", shape).strip()
+
+
+def budget_problems(state: dict, timings: RequestTimings) -> list[str]:
+    """
+    Problemas de la petición terminada: presupuesto superado o no declarado y
+    sentencias repetidas.
+    """
+    problems = []
+    batches = max(state.get("query_batches", 1), 1)
+
+    budget: QueryBudget | None = state.get("query_budget")
+    if budget is None:
+        if timings.db_queries:
+            problems.append(f"{timings.db_queries} consultas sin presupuesto declarado (query_budget)")
+    else:
+        limit = budget.queries * batches if budget.per_batch else budget.queries
+        if timings.db_queries > limit:
+            problems.append(f"{timings.db_queries} consultas, presupuesto {limit}")
+
+    # las operaciones por lotes repiten la misma sentencia una vez por lote
+    repeat_limit = max(settings.query_repeat_threshold, batches + 1)
+    for shape, count in Counter(map(statement_shape, timings.statements)).most_common():
+        if count < repeat_limit:
+            break
+        problems.append(f"posible N+1, {count} veces: {shape[:300]}")
+    return problems
+
+
+class QueryBudgetMiddleware:
+    """
+    Comprueba el presupuesto de consultas de cada petición HTTP al terminar
+    (QUERY_BUDGET=warn o raise). Usa los tiempos de MetricsMiddleware si la
+    envuelve; si no, cuenta las sentencias por su cuenta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.raise_errors = settings.query_budget_mode == "raise"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = current_timings.get()
+        token = None
+        if timings is None:
+            timings = RequestTimings()
+            token = current_timings.set(timings)
+        timings.statements = []
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+
+        problems = budget_problems(scope.get("state", {}), timings)
+        if problems:
+            route = getattr(scope.get("route"), "path", scope["path"])
+            message = f"{scope['method']} {route}: " + "; ".join(problems)
+            if self.raise_errors:
+                raise QueryBudgetExceeded(message)
+            logger.warning("Presupuesto de consultas: %s", message)
@@ -4,6 +4,11 @@ Contiene los endpoints que devuelven datos en JSON
 """
 from app.routers.api import songs
 from app.routers.api import concerts
+from app.routers.api import artists
+from app.routers.api import search
+from app.routers.api import cache
+from app.routers.api import stats
+from app.routers.api import metrics
 from fastapi import APIRouter
 
 
@@ -13,4 +18,14 @@ router = APIRouter()
 #incluir router de songs en router principal
 router.include_router(songs.router)
 #incluir router de concerts en router principal
-router.include_router(concerts.router)
\ No newline at end of file
+router.include_router(concerts.router)
+#incluir router de artists en router principal
+router.include_router(artists.router)
+#incluir router de búsqueda en router principal
+router.include_router(search.router)
+#incluir router de la caché de respuestas en router principal
+router.include_router(cache.router)
+#incluir router de estadísticas en router principal
+router.include_router(stats.router)
+#incluir router de métricas (/metrics) en router principal
+router.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from app.export import ndjson_response
+from app.models import Artist
+from app.queries.artists import artist_rows
+from app.schemas import ArtistResponse
+from app.etag import etag_for
+from app.query_budget import query_budget
+
+
+router = APIRouter(prefix="/api/artists", tags=["artists"])
+
+#exportar todos los artistas en NDJSON (un artista por línea)
+@router.get("/export", dependencies=[Depends(query_budget(2)), Depends(etag_for("artists"))])
+async def export():
+    return ndjson_response(artist_rows().order_by(Artist.id), ArtistResponse, "artists.ndjson")
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from app.cache import fragment_cache, response_cache
+from app.query_budget import query_budget
+from app.schemas import CacheStatsResponse
+
+
+router = APIRouter(prefix="/api/cache", tags=["cache"])
+
+#contadores de las cachés de respuestas de este proceso
+@router.get("/stats", response_model=CacheStatsResponse, dependencies=[Depends(query_budget(0))])
+async def stats():
+    return {"api": response_cache.stats(), "html": fragment_cache.stats()}
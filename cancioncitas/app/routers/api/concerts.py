@@ -1,98 +1,205 @@
-from fastapi import Depends, HTTPException, status, APIRouter
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
-from app.database import get_db
-from app.models.concert import Concert
+from datetime import datetime
+from fastapi import Depends, HTTPException, Query, status, APIRouter
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import CONCERTS, CachedRead, cached, invalidate
+from app.database import ArtistNotFound, artist_must_exist, check_new_artist, get_db
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.export import ndjson_response
+from app.models.concert import Concert, ConcertStatus
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, paginate
+from app.queries.concerts import CONCERT_COLUMNS, concert_records, concert_rows
+from app.schemas.bulk import BulkWriteResponse
 from app.schemas.concert import ConcertCreate, ConcertPatch, ConcertResponse
+from app.schemas.pagination import Page
+from app.schemas.types import SqliteInt
 
 
 router = APIRouter(prefix="/api/concerts", tags=["concerts"])
 
-#obtener todos los conciertos
-@router.get("", response_model=list[ConcertResponse])
-def find_all(db: Session = Depends(get_db)):
-    return db.execute(
-        select(Concert).options(joinedload(Concert.artist))
-    ).scalars().unique().all()
+#filtros para las operaciones masivas (?status=&artist_id=&date_from=&date_to=)
+def concert_filters(
+    status_filter: ConcertStatus | None = Query(None, alias="status"),
+    artist_id: SqliteInt | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None
+) -> list:
+    conditions = []
+    if status_filter is not None:
+        conditions.append(Concert.status == status_filter)
+    if artist_id is not None:
+        conditions.append(Concert.artist_id == artist_id)
+    if date_from is not None:
+        conditions.append(Concert.date_time >= date_from)
+    if date_to is not None:
+        conditions.append(Concert.date_time <= date_to)
+
+    #sin filtros se modificaría la tabla entera: se exige al menos uno
+    if not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicarse al menos un filtro (status, artist_id, date_from, date_to)"
+        )
+    return conditions
+
+#obtener los conciertos paginados por cursor (?limit=&after=)
+@router.get("", response_model=Page[ConcertResponse], dependencies=[Depends(query_budget(3)), Depends(etag_for("concerts", "artists"))])
+async def find_all(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: str | None = None,
+    cache: CachedRead = Depends(cached(CONCERTS)),
+    db: AsyncSession = Depends(get_db)
+):
+    #respuesta ya serializada si está en la caché
+    if (response := cache.hit()) is not None:
+        return response
+    rows, next_cursor = await paginate(db, concert_rows(), [Concert.id], limit, after)
+    return cache.store_page(ConcertResponse, await concert_records(db, rows), next_cursor)
     
+#exportar todos los conciertos en NDJSON (un concierto por línea)
+@router.get("/export", dependencies=[Depends(query_budget(3)), Depends(etag_for("concerts", "artists"))])
+async def export():
+    return ndjson_response(
+        concert_rows().order_by(Concert.id),
+        ConcertResponse,
+        "concerts.ndjson",
+        records=concert_records
+    )
+
 #obtener un concierto
-@router.get("/{id}", response_model=ConcertResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
-    concert = db.execute(
-        select(Concert).where(Concert.id == id).options(joinedload(Concert.artist))
-    ).scalar_one_or_none()
+@router.get("/{id}", response_model=ConcertResponse, dependencies=[Depends(query_budget(3)), Depends(etag_for("concerts", "artists", resource=True))])
+async def find_by_id(
+    id: SqliteInt,
+    cache: CachedRead = Depends(cached(CONCERTS)),
+    db: AsyncSession = Depends(get_db)
+):
+    if (response := cache.hit()) is not None:
+        return response
+    row = (await db.execute(concert_rows().where(Concert.id == id))).one_or_none()
+    #sin registro si no existe o si su artista no existe (concierto huérfano)
+    records = await concert_records(db, [row]) if row else []
 
-    if not concert:
+    if not records:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No se ha encontrado el concierto con id {id}"
         )
-    return concert
+    return cache.store(ConcertResponse, records[0])
 
 #crear un nuevo concierto
-@router.post("", response_model=ConcertResponse, status_code=status.HTTP_201_CREATED)
-def create(concert_dto: ConcertCreate, db: Session = Depends(get_db)):
-    concert = Concert(
-        name=concert_dto.name,
-        price=concert_dto.price,
-        capacity=concert_dto.capacity,
-        status=concert_dto.status,
-        is_sold_out=concert_dto.is_sold_out,
-        date_time=concert_dto.date_time,
-        img_url=concert_dto.img_url,
-        artist_id=concert_dto.artist_id
-    )
-    
-    db.add(concert)
-    db.commit()
-    db.refresh(concert)
+@router.post("", response_model=ConcertResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(2))])
+async def create(concert_dto: ConcertCreate, db: AsyncSession = Depends(get_db)):
+    #INSERT ... RETURNING: el concierto creado (con su id) en una sola sentencia
+    async with artist_must_exist(db):
+        concert = (await db.execute(
+            insert(Concert).values(**concert_dto.model_dump()).returning(*CONCERT_COLUMNS)
+        )).one()
+        #el artista se toma de la dimensión en memoria, antes del commit: sin
+        #claves foráneas es aquí donde se ve que no existe
+        records = await concert_records(db, [concert])
+        if not records:
+            raise ArtistNotFound()
+        await db.commit()
+        invalidate(CONCERTS)
     
-    concert_with_artist = db.execute(
-        select(Concert).where(Concert.id == concert.id).options(joinedload(Concert.artist))
-    ).scalar_one()
-    
-    return concert_with_artist
+    return records[0]
+
+#actualizar parcialmente todos los conciertos que cumplan los filtros
+#se traduce en un único UPDATE ... WHERE
+@router.patch("", response_model=BulkWriteResponse, dependencies=[Depends(query_budget(2))])
+async def update_partial_bulk(
+    concert_dto: ConcertPatch,
+    filters: list = Depends(concert_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    update_data = concert_dto.model_dump(exclude_unset=True)
+
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se ha indicado ningún campo a actualizar"
+        )
+
+    async with artist_must_exist(db):
+        await check_new_artist(db, update_data)
+        result = await db.execute(
+            update(Concert)
+            .where(*filters)
+            .values(**update_data)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        invalidate(CONCERTS)
+
+    return BulkWriteResponse(affected=result.rowcount)
+
+#eliminar todos los conciertos que cumplan los filtros (un único DELETE ... WHERE)
+@router.delete("", response_model=BulkWriteResponse, dependencies=[Depends(query_budget(1))])
+async def delete_bulk(filters: list = Depends(concert_filters), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        delete(Concert).where(*filters).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    invalidate(CONCERTS)
+
+    return BulkWriteResponse(affected=result.rowcount)
 
 #actualizar un concierto parcialmente
-@router.patch("/{id}", response_model=ConcertResponse)
-def update_partial(id: int, concert_dto: ConcertPatch, db: Session = Depends(get_db)):
-    concert = db.execute(
-        select(Concert)
-        .where(Concert.id == id)
-        .options(joinedload(Concert.artist))
-    ).scalar_one_or_none()
+@router.patch("/{id}", response_model=ConcertResponse, dependencies=[Depends(query_budget(2))])
+async def update_partial(id: SqliteInt, concert_dto: ConcertPatch, db: AsyncSession = Depends(get_db)):
+    update_data = concert_dto.model_dump(exclude_unset=True)
 
-    if not concert:
+    #UPDATE ... RETURNING: comprobar que existe, modificar y leer en una sola sentencia
+    #(sin campos que modificar sólo se lee)
+    if update_data:
+        stmt = (
+            update(Concert)
+            .where(Concert.id == id)
+            .values(**update_data)
+            .returning(*CONCERT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        stmt = concert_rows().where(Concert.id == id)
+    async with artist_must_exist(db):
+        concert = (await db.execute(stmt)).one_or_none()
+        records = await concert_records(db, [concert]) if concert else []
+
+        if concert and update_data:
+            #el artista nuevo no existe (sin claves foráneas)
+            if not records:
+                raise ArtistNotFound()
+            await db.commit()
+            invalidate(CONCERTS)
+
+    if not records:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No se ha encontrado el concierto con id {id}"
         )
     
-    update_data = concert_dto.model_dump(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        setattr(concert, field, value)
-    
-    db.commit()
-    db.refresh(concert)
-    
-    return concert
+    return records[0]
 
 #eliminar un concierto
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_by_id(id: int, db: Session = Depends(get_db)):
-    concert = db.execute(
-        select(Concert).where(Concert.id == id)
-    ).scalar_one_or_none()
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(1))])
+async def delete_by_id(id: SqliteInt, db: AsyncSession = Depends(get_db)):
+    #DELETE ... RETURNING id indica si existía
+    deleted = (await db.execute(
+        delete(Concert)
+        .where(Concert.id == id)
+        .returning(Concert.id)
+        .execution_options(synchronize_session=False)
+    )).scalar_one_or_none()
 
-    if not concert:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No se ha encontrado el concierto con id {id}"
         )
     
-    db.delete(concert)
-    db.commit()
+    await db.commit()
+    invalidate(CONCERTS)
     
     return None
 
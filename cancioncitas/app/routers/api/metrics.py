@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import metrics
+from app.query_budget import query_budget
+
+
+router = APIRouter(tags=["metrics"])
+
+#formato de texto de Prometheus
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+#métricas de las peticiones atendidas por este proceso
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False, dependencies=[Depends(query_budget(0))])
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.schemas import SearchKind, SearchResult
+from app.search import fts_query, search_stmt
+from app.etag import etag_for
+from app.query_budget import query_budget
+
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+#buscar canciones, artistas y conciertos por texto (?q=&kind=&limit=)
+@router.get("", response_model=list[SearchResult], dependencies=[Depends(query_budget(2)), Depends(etag_for("songs", "artists", "concerts"))])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: SearchKind | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    match = fts_query(q)
+    if match is None:
+        return []
+
+    result = await db.execute(
+        search_stmt(match, kind.value if kind else None).limit(limit)
+    )
+    return [
+        SearchResult(kind=row.kind, id=row.ref_id, title=row.title, subtitle=row.subtitle, rank=row.rank)
+        for row in result
+    ]
@@ -2,137 +2,348 @@
 Endpints de API REST    
 """
 
-from fastapi import Depends, HTTPException, status, APIRouter
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Song
-from app.schemas import SongResponse, SongCreate, SongUpdate, SongPatch
+import json
+import math
+from collections import defaultdict
+
+from fastapi import Depends, HTTPException, Query, Request, status, APIRouter
+from pydantic import ValidationError
+from sqlalchemy import delete as sql_delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import SONGS, CachedRead, cached, invalidate
+from app.database import ArtistNotFound, artist_must_exist, check_new_artist, get_db
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.export import ndjson_response
+from app.models import Artist, Song
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, paginate
+from app.queries.songs import DURATION_SORTS, SONG_COLUMNS, song_conditions, song_record, song_rows, sorted_songs
+from app.schemas import SongResponse, SongCreate, SongUpdate, SongPatch, SongBulkCreated, SongBulkError, SongBulkResponse, SongSort, Page, BulkWriteResponse, SqliteInt
 
 #Crear router para los endpoints de canciones
 
 router = APIRouter(prefix="/api/songs", tags=["songs"])
 
+# canciones que se insertan en cada sentencia INSERT de la carga masiva
+BULK_BATCH_SIZE = 1000
+
+#filtros para las operaciones masivas (?artist_id=&artist=&explicit=&min_duration=&max_duration=)
+def song_filters(
+    artist_id: SqliteInt | None = None,
+    artist: str | None = None,
+    explicit: bool | None = None,
+    min_duration: SqliteInt | None = Query(None, ge=0),
+    max_duration: SqliteInt | None = Query(None, ge=0)
+) -> list:
+    conditions = song_conditions(artist_id, artist, explicit, min_duration, max_duration)
+
+    #sin filtros se modificaría la tabla entera: se exige al menos uno
+    if not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicarse al menos un filtro (artist_id, artist, explicit, min_duration, max_duration)"
+        )
+    return conditions
 
 #ENDPOINTS CRUD
 
-# GET - obtener TODAS las canciones
-@router.get("", response_model=list[SongResponse])
-def find_all(db: Session = Depends(get_db)):
-    #db.execute(): para ejecutar la consulta
-    #select(Song): crea consulta SELECT * FROM songs
-    #.scalars(): extrae los objetos Song de la consulta
-    #.all(): convierte los objetos en una lista
-    return db.execute(select(Song)).scalars().all()
+# GET - obtener las canciones paginadas por cursor
+# (?limit=&after=&artist_id=&artist=&explicit=&min_duration=&max_duration=&sort=)
+@router.get("", response_model=Page[SongResponse], dependencies=[Depends(query_budget(2)), Depends(etag_for("songs", "artists"))])
+async def find_all(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: str | None = None,
+    artist_id: SqliteInt | None = None,
+    artist: str | None = None,
+    explicit: bool | None = None,
+    min_duration: SqliteInt | None = Query(None, ge=0),
+    max_duration: SqliteInt | None = Query(None, ge=0),
+    sort: SongSort = SongSort.ID,
+    cache: CachedRead = Depends(cached(SONGS)),
+    db: AsyncSession = Depends(get_db)
+):
+    #respuesta ya serializada si está en la caché (clave: ruta + parámetros)
+    if (response := cache.hit()) is not None:
+        return response
+    #song_rows(): sólo las columnas de SongResponse (con el nombre del artista),
+    #sin construir objetos Song, con los filtros indicados
+    stmt = song_rows().where(*song_conditions(
+        artist_id, artist, explicit, min_duration, max_duration,
+        joined=True, duration_index=sort in DURATION_SORTS
+    ))
+    #paginate(): ordena por la clave elegida (terminada en id) y sólo trae una página;
+    #el cursor sólo es válido con la misma ordenación (y filtro de artista) con la que se generó
+    stmt, columns, cursor_values, descending = sorted_songs(stmt, sort, by_artist=artist is not None)
+    songs, next_cursor = await paginate(
+        db, stmt, columns, limit, after, descending=descending, cursor_values=cursor_values
+    )
+    return cache.store_page(SongResponse, songs, next_cursor)
+
+# GET - exportar TODAS las canciones en NDJSON (una canción por línea)
+@router.get("/export", dependencies=[Depends(query_budget(2)), Depends(etag_for("songs", "artists"))])
+async def export():
+    return ndjson_response(song_rows().order_by(Song.id), SongResponse, "songs.ndjson")
 
 # GET - obtener UNA canción por ID
-@router.get("/{id}", response_model=SongResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
-    #buscar canción por id de la ruta con un select y devuelve el objeto 
+@router.get("/{id}", response_model=SongResponse, dependencies=[Depends(query_budget(2)), Depends(etag_for("songs", "artists", resource=True))])
+async def find_by_id(
+    id: SqliteInt,
+    cache: CachedRead = Depends(cached(SONGS)),
+    db: AsyncSession = Depends(get_db)
+):
+    if (response := cache.hit()) is not None:
+        return response
+    #buscar canción por id de la ruta con un select y devuelve la fila
     # o None si no existe
-    song = db.execute(
-        select(Song).where(Song.id == id)
-    ).scalar_one_or_none()
+    song = (await db.execute(
+        song_rows().where(Song.id == id)
+    )).one_or_none()
     
     if not song:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail=f"No se ha encontrado la canción con id {id}"
         )
-    return song
+    return cache.store(SongResponse, song)
 
 # POST - crear una canción
-@router.post("", response_model=SongResponse, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=SongResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(3))])
 
-def create(song_dto: SongCreate, db: Session = Depends(get_db)):
-    
-    #crear objeto Song a partir del DTO
-    song = Song(
-        title=song_dto.title,
-        artist=song_dto.artist,
-        duration_seconds=song_dto.duration_seconds,
-        explicit=song_dto.explicit
-    )
-    
-    #agrega el objeto a la sesión
-    db.add(song)
-    #guarda el objeto en la base de datos
-    db.commit()
-    #refresca el objeto para obtener el id generado
-    db.refresh(song)
-    #devuelve el objeto creado
-    return song
+async def create(song_dto: SongCreate, db: AsyncSession = Depends(get_db)):
+    #INSERT ... RETURNING: inserta y devuelve la fila creada (con su id) en una sola sentencia
+    async with artist_must_exist(db):
+        song = (await db.execute(
+            insert(Song).values(**song_dto.model_dump()).returning(*SONG_COLUMNS)
+        )).one()
+        #la canción creada con el nombre de su artista, antes del commit: sin
+        #claves foráneas es aquí donde se ve que el artista no existe
+        record = await song_record(db, song)
+        if record is None:
+            raise ArtistNotFound()
+        await db.commit()
+        invalidate(SONGS)
+    return record
 
-# PUT - actualizar COMPLETAMENTE una canción
-@router.put("/{id}", response_model=SongResponse)
-def update_all(id: int, song_dto: SongUpdate, db: Session = Depends(get_db)):
-    #buscar canción por id
-    song = db.execute(
-        select(Song).where(Song.id == id)
-    ).scalar_one_or_none()
-    
-    if not song:
+#elementos de la carga masiva (array JSON o NDJSON), sin validar todavía
+#en NDJSON cada línea se decodifica después, para que una línea mal formada
+#sólo invalide su propio elemento
+async def bulk_items(request: Request) -> list:
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            items = [line for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f"No se ha encontrado la canción con id {id}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El cuerpo de la petición no es JSON/NDJSON válido"
         )
+
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Se esperaba un array de canciones"
+        )
+    return items
+
+#lotes de BULK_BATCH_SIZE elementos de la carga masiva (presupuesto de consultas)
+def bulk_batches(items: list = Depends(bulk_items)) -> int:
+    return math.ceil(len(items) / BULK_BATCH_SIZE)
+
+# POST - crear canciones en bloque (array JSON o NDJSON, una canción por línea)
+@router.post(
+    "/bulk",
+    response_model=SongBulkResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": SongCreate.model_json_schema()}
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    },
+    #por cada lote de BULK_BATCH_SIZE: comprobar los artistas e insertar
+    dependencies=[Depends(query_budget(2, batches=bulk_batches))]
+)
+async def create_bulk(items: list = Depends(bulk_items), db: AsyncSession = Depends(get_db)):
+    #validar todos los elementos en una pasada, guardando los errores de cada uno
+    valid = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, bytes):
+                item = json.loads(item)
+            valid.append((index, SongCreate.model_validate(item).model_dump()))
+        except ValidationError as e:
+            errors.append(SongBulkError(index=index, errors=json.loads(e.json(include_url=False))))
+        except ValueError:
+            errors.append(SongBulkError(index=index, errors=[{"type": "json_invalid", "msg": "Línea NDJSON no válida"}]))
+
+    #comprobar los artistas antes de insertar: una clave foránea rota abortaría todo el lote
+    existing_artists = await find_existing_artist_ids(db, {row["artist_id"] for _, row in valid})
+    rows = []
+    for index, row in valid:
+        if row["artist_id"] in existing_artists:
+            rows.append((index, row))
+        else:
+            errors.append(SongBulkError(
+                index=index,
+                errors=[{"type": "artist_not_found", "loc": ["artist_id"], "msg": "El artista indicado no existe", "input": row["artist_id"]}]
+            ))
+    errors.sort(key=lambda error: error.index)
+
+    #insertar los válidos
+    songs = await insert_songs(db, rows)
+
+    return SongBulkResponse(created=len(songs), songs=songs, errors=errors)
+
+
+async def find_existing_artist_ids(db: AsyncSession, artist_ids: set[int]) -> set[int]:
+    existing = set()
+    artist_ids = list(artist_ids)
+    for start in range(0, len(artist_ids), BULK_BATCH_SIZE):
+        batch = artist_ids[start:start + BULK_BATCH_SIZE]
+        existing.update((await db.scalars(select(Artist.id).where(Artist.id.in_(batch)))).all())
+    return existing
+
+
+async def insert_songs(db: AsyncSession, rows: list[tuple[int, dict]]) -> list[SongBulkCreated]:
     """
-    #actualizar campos
-    song.title = song_dto.title
-    song.artist = song_dto.artist
-    song.duration_seconds = song_dto.duration_seconds
-    song.explicit = song_dto.explicit
+    Inserta las canciones (index, fila) en lotes de BULK_BATCH_SIZE con
+    INSERT ... RETURNING, todo dentro de una única transacción (un solo commit).
+    Devuelve el id creado para cada index, por orden de index.
     """
-    #actualizar campos de forma dinámica
-    # guardar los datos del DTO en un diccionario
-    update_data = song_dto.model_dump()
-    #Bucle para asignar cada campo al objeto song
-    for field, value in update_data.items():
-        #usar setattr para asignar el valor al campo correspondiente
-        setattr(song, field, value)
-    
-    #guardar cambios en la base de datos
-    db.commit()
-    #refrescar objeto
-    db.refresh(song)
-    return song
+    created = []
+    #un INSERT ... VALUES (...), (...) RETURNING por lote; SQLite no garantiza el
+    #orden de RETURNING (con sort_by_parameter_order SQLAlchemy haría un INSERT
+    #por fila), así que cada fila devuelta se empareja con su elemento por los
+    #valores insertados (las filas iguales son intercambiables)
+    #INSERT de Core sobre la tabla: el de ORM separaría el lote en un INSERT
+    #por cada combinación de campos a None
+    table = Song.__table__
+    columns = [table.c.title, table.c.artist_id, table.c.duration_seconds, table.c.explicit]
+    stmt = insert(table).returning(table.c.id, *columns)
+    try:
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            batch = rows[start:start + BULK_BATCH_SIZE]
+            indexes = defaultdict(list)
+            for index, row in batch:
+                indexes[tuple(row[column.key] for column in columns)].append(index)
+            for id, *values in await db.execute(stmt, [row for _, row in batch]):
+                created.append(SongBulkCreated(index=indexes[tuple(values)].pop(), id=id))
+        await db.commit()
+        invalidate(SONGS)
+    except Exception:
+        await db.rollback()
+        raise
+    created.sort(key=lambda song: song.index)
+    return created
+
+# PUT - actualizar COMPLETAMENTE una canción
+@router.put("/{id}", response_model=SongResponse, dependencies=[Depends(query_budget(3))])
+async def update_all(id: SqliteInt, song_dto: SongUpdate, db: AsyncSession = Depends(get_db)):
+    #actualizar todos los campos con los datos del DTO
+    return await update_song(db, id, song_dto.model_dump())
+
+# PATCH - actualizar PARCIALMENTE todas las canciones que cumplan los filtros
+# se traduce en un único UPDATE ... WHERE
+@router.patch("", response_model=BulkWriteResponse, dependencies=[Depends(query_budget(2))])
+async def update_partial_bulk(
+    song_dto: SongPatch,
+    filters: list = Depends(song_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    update_data = song_dto.model_dump(exclude_unset=True)
+
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se ha indicado ningún campo a actualizar"
+        )
+
+    async with artist_must_exist(db):
+        await check_new_artist(db, update_data)
+        result = await db.execute(
+            update(Song)
+            .where(*filters)
+            .values(**update_data)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        invalidate(SONGS)
+    return BulkWriteResponse(affected=result.rowcount)
 
 # PATCH - actualizar PARCIALMENTE una canción
-@router.patch("/{id}", response_model=SongResponse)
-def update_partial(id: int, song_dto: SongPatch, db: Session = Depends(get_db)):
-    song = db.execute(
-        select(Song).where(Song.id == id)
-    ).scalar_one_or_none()
-    
-    if not song:
+@router.patch("/{id}", response_model=SongResponse, dependencies=[Depends(query_budget(3))])
+async def update_partial(id: SqliteInt, song_dto: SongPatch, db: AsyncSession = Depends(get_db)):
+    #sólo los campos enviados
+    return await update_song(db, id, song_dto.model_dump(exclude_unset=True))
+
+
+async def update_song(db: AsyncSession, id: int, update_data: dict):
+    """
+    UPDATE ... WHERE id RETURNING: la comprobación de que existe, la
+    modificación y la fila de la respuesta son una sola sentencia.
+    """
+    if not update_data:
+        #no hay nada que modificar: se devuelve la canción tal cual
+        song = (await db.execute(song_rows().where(Song.id == id))).one_or_none()
+    else:
+        async with artist_must_exist(db):
+            song = (await db.execute(
+                update(Song)
+                .where(Song.id == id)
+                .values(**update_data)
+                .returning(*SONG_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )).one_or_none()
+            if song is not None:
+                #nombre del artista antes del commit (ver create)
+                song = await song_record(db, song)
+                if song is None:
+                    raise ArtistNotFound()
+                await db.commit() # confirma los cambios en base datos
+                invalidate(SONGS)
+
+    if song is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail=f"No se ha encontrado la canción con id {id}"
         )
-  
-    update_data = song_dto.model_dump(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        setattr(song, field, value)
-    
-    db.commit() # confirma los cambios en base datos
-    db.refresh(song) # refresca el objeto
     return song
 
+# DELETE - eliminar todas las canciones que cumplan los filtros (un único DELETE ... WHERE)
+@router.delete("", response_model=BulkWriteResponse, dependencies=[Depends(query_budget(1))])
+async def delete_bulk(filters: list = Depends(song_filters), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        sql_delete(Song).where(*filters).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    invalidate(SONGS)
+    return BulkWriteResponse(affected=result.rowcount)
+
 # DELETE - eliminar una canción
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete(id: int, db: Session = Depends(get_db)):
-    song = db.execute(
-        select(Song).where(Song.id == id)
-    ).scalar_one_or_none()
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(1))])
+async def delete(id: SqliteInt, db: AsyncSession = Depends(get_db)):
+    #eliminar canción: DELETE ... RETURNING id indica si existía
+    deleted = (await db.execute(
+        sql_delete(Song)
+        .where(Song.id == id)
+        .returning(Song.id)
+        .execution_options(synchronize_session=False)
+    )).scalar_one_or_none()
     
-    if not song:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail=f"No se ha encontrado la canción con id {id}"
         )
     
-    #eliminar canción
-    db.delete(song)
-    db.commit()
+    await db.commit()
+    invalidate(SONGS)
     return None
\ No newline at end of file
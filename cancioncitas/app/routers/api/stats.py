@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.models import Artist, ConcertStatus
+from app.schemas import ArtistMonthConcertStats, ArtistSongStats, ConcertStatusStats, SqliteInt
+from app.stats import artist_song_stats, concert_stats
+
+
+router = APIRouter(prefix="/api/stats", tags=["stats"])
+
+#mes en formato YYYY-MM (mismo formato que concert_stats.month)
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+#filtros de las estadísticas de conciertos
+def concert_conditions(
+    artist_id: int | None,
+    status: ConcertStatus | None,
+    month_from: str | None,
+    month_to: str | None
+) -> list:
+    conditions = []
+    if artist_id is not None:
+        conditions.append(concert_stats.c.artist_id == artist_id)
+    if status is not None:
+        conditions.append(concert_stats.c.status == status)
+    if month_from is not None:
+        conditions.append(concert_stats.c.month >= month_from)
+    if month_to is not None:
+        conditions.append(concert_stats.c.month <= month_to)
+    return conditions
+
+#canciones, duración total y media por artista (los artistas sin canciones salen con 0)
+@router.get("/songs", response_model=list[ArtistSongStats], dependencies=[Depends(query_budget(2)), Depends(etag_for("songs", "artists"))])
+async def songs_by_artist(db: AsyncSession = Depends(get_db)):
+    stats = artist_song_stats.alias("stats")
+    result = await db.execute(
+        select(
+            Artist.id.label("artist_id"),
+            Artist.name.label("artist"),
+            func.coalesce(stats.c.song_count, 0).label("song_count"),
+            func.coalesce(stats.c.duration_total, 0).label("total_duration_seconds"),
+            (stats.c.duration_total * 1.0 / func.nullif(stats.c.duration_count, 0)).label("avg_duration_seconds"),
+        )
+        .outerjoin(stats, stats.c.artist_id == Artist.id)
+        .order_by(Artist.id)
+    )
+    return result.all()
+
+#conciertos, aforo y recaudación potencial por estado (?artist_id=&month_from=&month_to=)
+@router.get("/concerts/status", response_model=list[ConcertStatusStats], dependencies=[Depends(query_budget(2)), Depends(etag_for("concerts"))])
+async def concerts_by_status(
+    artist_id: SqliteInt | None = None,
+    month_from: str | None = Query(None, pattern=MONTH_PATTERN),
+    month_to: str | None = Query(None, pattern=MONTH_PATTERN),
+    db: AsyncSession = Depends(get_db)
+):
+    stmt = (
+        select(
+            concert_stats.c.status,
+            func.sum(concert_stats.c.concert_count).label("concert_count"),
+            func.sum(concert_stats.c.capacity_total).label("capacity"),
+            func.round(func.sum(concert_stats.c.revenue_total), 2).label("potential_revenue"),
+        )
+        .where(*concert_conditions(artist_id, None, month_from, month_to))
+        .group_by(concert_stats.c.status)
+        .order_by(concert_stats.c.status)
+    )
+    return (await db.execute(stmt)).all()
+
+#conciertos, aforo y recaudación potencial por artista y mes
+#(?artist_id=&status=&month_from=&month_to=)
+@router.get("/concerts/monthly", response_model=list[ArtistMonthConcertStats], dependencies=[Depends(query_budget(2)), Depends(etag_for("concerts", "artists"))])
+async def concerts_by_artist_and_month(
+    artist_id: SqliteInt | None = None,
+    status: ConcertStatus | None = None,
+    month_from: str | None = Query(None, pattern=MONTH_PATTERN),
+    month_to: str | None = Query(None, pattern=MONTH_PATTERN),
+    db: AsyncSession = Depends(get_db)
+):
+    stmt = (
+        select(
+            concert_stats.c.artist_id,
+            Artist.name.label("artist"),
+            concert_stats.c.month,
+            func.sum(concert_stats.c.concert_count).label("concert_count"),
+            func.sum(concert_stats.c.capacity_total).label("capacity"),
+            func.round(func.sum(concert_stats.c.revenue_total), 2).label("potential_revenue"),
+        )
+        .join(Artist, Artist.id == concert_stats.c.artist_id)
+        .where(*concert_conditions(artist_id, status, month_from, month_to))
+        .group_by(concert_stats.c.artist_id, concert_stats.c.month)
+        .order_by(concert_stats.c.artist_id, concert_stats.c.month)
+    )
+    return (await db.execute(stmt)).all()
+
@@ -1,44 +1,68 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, HTTPException, Request
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
 
+from app.cache import ARTISTS, invalidate
 from app.database import get_db
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.fragments import CachedPage, cached_page
+from app.pagination import WebPager, cached_count, web_page_number, web_page_size
+from app.search import apply_search
+from app.templating import templates
+from app.schemas.types import SqliteInt
 from app.models import Artist
-
-# configuración de Jinja2Templates
-templates = Jinja2Templates(directory="app/templates")
+from app.queries.artists import artist_rows
 
 # router para rutas web
 router = APIRouter(prefix="/artists", tags=["web"])
 
 # listar artistas
-@router.get("", response_class=HTMLResponse)
-def list_artists(request: Request, db: Session = Depends(get_db)):
-    artists = db.execute(select(Artist)).scalars().all()
-    
-    return templates.TemplateResponse(
-        "artists/list.html",
-        {"request": request, "artists": artists}
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(query_budget(3)), Depends(etag_for("artists"))])
+async def list_artists(
+    request: Request,
+    q: str | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    page_number: str | None = Query(None, alias="page"),
+    size: str | None = None,
+    page: CachedPage = Depends(cached_page(ARTISTS)),
+    db: AsyncSession = Depends(get_db)
+):
+    # HTML ya renderizado si la página está en la caché
+    if (response := page.hit()) is not None:
+        return response
+    # ?q= filtra con el índice de búsqueda de texto completo
+    stmt = apply_search(artist_rows(), Artist.id, q, "artist")
+    pager = WebPager(request, web_page_size(size), await cached_count(db, ARTISTS, stmt))
+    if q:
+        # por relevancia no hay clave indexada por la que avanzar: número de página
+        stmt = pager.numbered(stmt.order_by(Artist.id), web_page_number(page_number))
+    else:
+        stmt = pager.keyset(stmt, [Artist.id], after, before)
+
+    return await page.render_list(
+        db, "artists/list.html", {"q": q}, stmt, "artists/_row.html", "artist", pager
     )
     
 # mostrar formulario crear
-@router.get("/new", response_class=HTMLResponse)
-def show_create_form(request: Request):
+@router.get("/new", response_class=HTMLResponse, dependencies=[Depends(query_budget(0)), Depends(etag_for())])
+async def show_create_form(request: Request):
     return templates.TemplateResponse(
         "artists/form.html",
         {"request": request, "artist": None}
     )
 
 # crear nuevo artista
-@router.post("/new", response_class=HTMLResponse)
-def create_artist(
+@router.post("/new", response_class=HTMLResponse, dependencies=[Depends(query_budget(1))])
+async def create_artist(
     request: Request,
     name: str = Form(...),
     birth_date: str = Form(None), #opcional
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     errors = []
     
@@ -67,20 +91,18 @@ def create_artist(
             {"request": request, "artist": None, "errors": errors, "form_data": form_data}
         )
     
-    # crear artista
+    # crear artista (INSERT ... RETURNING id, una sola sentencia)
     try:
-        artist = Artist(
-            name=name.strip(),
-            birth_date=birth_date_value       
-        )
-        db.add(artist)
-        db.commit()
-        db.refresh(artist)
+        artist_id = (await db.execute(
+            insert(Artist).values(name=name.strip(), birth_date=birth_date_value).returning(Artist.id)
+        )).scalar_one()
+        await db.commit()
+        invalidate(ARTISTS)
         
         # redirigir a pantalla detalle
-        return RedirectResponse(url=f"/artists/{artist.id}", status_code=303)
+        return RedirectResponse(url=f"/artists/{artist_id}", status_code=303)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         errors.append(f"Error al crear el artista: {str(e)}")
         return templates.TemplateResponse(
             "artists/form.html",
@@ -88,23 +110,27 @@ def create_artist(
         )
     
 # detalle artista (http://localhost:8000/artists/5)
-@router.get("/{artist_id}", response_class=HTMLResponse)
-def artist_detail(request: Request, artist_id: int, db: Session = Depends(get_db)):
-    artist = db.execute(select(Artist).where(Artist.id == artist_id)).scalar_one_or_none()
+@router.get("/{artist_id}", response_class=HTMLResponse, dependencies=[Depends(query_budget(2)), Depends(etag_for("artists", resource=True))])
+async def artist_detail(
+    request: Request,
+    artist_id: SqliteInt,
+    page: CachedPage = Depends(cached_page(ARTISTS)),
+    db: AsyncSession = Depends(get_db)
+):
+    if (response := page.hit()) is not None:
+        return response
+    artist = (await db.execute(artist_rows().where(Artist.id == artist_id))).one_or_none()
     
     if artist is None:
         raise HTTPException(status_code=404, detail="404 - Artista no encontrad@")
     
-    return templates.TemplateResponse(
-        "artists/detail.html",
-        {"request": request, "artist": artist}
-    )
+    return page.render("artists/detail.html", {"artist": artist})
     
 # mostrar formulario editar
-@router.get("/{artist_id}/edit", response_class=HTMLResponse)
-def show_edit_form(request: Request, artist_id: int, db: Session = Depends(get_db)):
+@router.get("/{artist_id}/edit", response_class=HTMLResponse, dependencies=[Depends(query_budget(2)), Depends(etag_for("artists", resource=True))])
+async def show_edit_form(request: Request, artist_id: SqliteInt, db: AsyncSession = Depends(get_db)):
     # obtener artista por id
-    artist = db.execute(select(Artist).where(Artist.id == artist_id)).scalar_one_or_none()
+    artist = (await db.execute(artist_rows().where(Artist.id == artist_id))).one_or_none()
     
     # lanzar error 404 si no existe canción
     if artist is None:
@@ -116,19 +142,14 @@ def show_edit_form(request: Request, artist_id: int, db: Session = Depends(get_d
     )
 
 # editar artista existente
-@router.post("/{artist_id}/edit", response_class=HTMLResponse)
-def update_artist(
+@router.post("/{artist_id}/edit", response_class=HTMLResponse, dependencies=[Depends(query_budget(2))])
+async def update_artist(
     request: Request,
-    artist_id: int,
+    artist_id: SqliteInt,
     name: str = Form(...),
     birth_date: str = Form(None), #opcional
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    artist = db.execute(select(Artist).where(Artist.id == artist_id)).scalar_one_or_none()
-    
-    if artist is None:
-        raise HTTPException(status_code=404, detail="404 - Artista no encontrado")
-    
     errors = []
 
     # convertir birth_date de DD/MM/YYYY a datetime
@@ -151,48 +172,69 @@ def update_artist(
         
     # si hay errores, mostrar el formulario con los errores
     if errors:
-        return templates.TemplateResponse(
-            "artists/form.html",
-            {"request": request, "artist": None, "errors": errors, "form_data": form_data}
-        )
+        return await render_edit_errors(request, db, artist_id, errors, form_data)
     
-    # editar artista
+    # editar artista (UPDATE ... RETURNING id: modificar y comprobar que existe a la vez)
     try:
-        artist.name=name.strip()
-        artist.birth_date=birth_date_value       
-        
-        
-        db.commit()
-        db.refresh(artist)
-        
-        # redirigir a pantalla detalle
-        return RedirectResponse(url=f"/artists/{artist.id}", status_code=303)
+        updated = (await db.execute(
+            update(Artist)
+            .where(Artist.id == artist_id)
+            .values(name=name.strip(), birth_date=birth_date_value)
+            .returning(Artist.id)
+            .execution_options(synchronize_session=False)
+        )).scalar_one_or_none()
+        if updated is not None:
+            await db.commit()
+            invalidate(ARTISTS)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         errors.append(f"Error al actualizar el artista: {str(e)}")
-        return templates.TemplateResponse(
-            "artists/form.html",
-            {"request": request, "artist": artist, "errors": errors, "form_data": form_data}
-        )
-        
-# eliminar artista
-@router.post("/{artist_id}/delete", response_class=HTMLResponse)
-def delete_artist(request: Request, artist_id: int, db: Session = Depends(get_db)):
-    # obtenemos el artista en base de datos
-    artist = db.execute(select(Artist).where(Artist.id == artist_id)).scalar_one_or_none()
+        return await render_edit_errors(request, db, artist_id, errors, form_data)
+    
+    if updated is None:
+        raise HTTPException(status_code=404, detail="404 - Artista no encontrado")
+    
+    # redirigir a pantalla detalle
+    return RedirectResponse(url=f"/artists/{artist_id}", status_code=303)
+
+# volver a mostrar el formulario de edición con los errores
+async def render_edit_errors(request: Request, db: AsyncSession, artist_id: int, errors: list, form_data: dict):
+    artist = (await db.execute(artist_rows().where(Artist.id == artist_id))).one_or_none()
     
-    # si no hay artista, lanzar excepción
     if artist is None:
         raise HTTPException(status_code=404, detail="404 - Artista no encontrado")
     
-    # eliminar el artista
-    try:
-        db.delete(artist)
-        db.commit()
+    return templates.TemplateResponse(
+        "artists/form.html",
+        {"request": request, "artist": artist, "errors": errors, "form_data": form_data}
+    )
         
-        # redirigir a la lista de artista
-        return RedirectResponse(url="/artists", status_code=303)
+# eliminar artista
+@router.post("/{artist_id}/delete", response_class=HTMLResponse, dependencies=[Depends(query_budget(1))])
+async def delete_artist(request: Request, artist_id: SqliteInt, db: AsyncSession = Depends(get_db)):
+    # eliminar el artista (DELETE ... RETURNING id indica si existía)
+    try:
+        deleted = (await db.execute(
+            delete(Artist)
+            .where(Artist.id == artist_id)
+            .returning(Artist.id)
+            .execution_options(synchronize_session=False)
+        )).scalar_one_or_none()
+        if deleted is not None:
+            await db.commit()
+            invalidate(ARTISTS)
+    except IntegrityError:
+        # la clave foránea impide borrar un artista con canciones o conciertos
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="No se puede eliminar un artista con canciones o conciertos asociados")
     except Exception as e:
         # deshacemos los cambios si da error
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al eliminar el artista: {str(e)}")
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al eliminar el artista: {str(e)}")
+    
+    # si no hay artista, lanzar excepción
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="404 - Artista no encontrado")
+    
+    # redirigir a la lista de artista
+    return RedirectResponse(url="/artists", status_code=303)
\ No newline at end of file
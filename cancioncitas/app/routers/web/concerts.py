@@ -1,27 +1,42 @@
-from fastapi.templating import Jinja2Templates
-from fastapi import APIRouter, Form, HTTPException, Request, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select
+from fastapi import APIRouter, Query, Request, Depends
+from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import CONCERTS
 from app.database import get_db
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.fragments import CachedPage, cached_page
+from app.pagination import WebPager, cached_count, web_page_number, web_page_size
+from app.search import apply_search
 from app.models import Concert
-
-templates = Jinja2Templates(directory="app/templates")
+from app.queries.concerts import concert_rows
 
 router = APIRouter(prefix="/concerts", tags=["web"])
 
-@router.get("", response_class=HTMLResponse)
-def list_concerts(request: Request, db: Session = Depends(get_db)):
-    concerts = db.execute(select(Concert)
-                          .options(joinedload(Concert.artist))
-                          .scalars().unique().all()
-                          )
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(query_budget(4)), Depends(etag_for("concerts", "artists"))])
+async def list_concerts(
+    request: Request,
+    q: str | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    page_number: str | None = Query(None, alias="page"),
+    size: str | None = None,
+    page: CachedPage = Depends(cached_page(CONCERTS)),
+    db: AsyncSession = Depends(get_db)
+):
+    # HTML ya renderizado si la página está en la caché
+    if (response := page.hit()) is not None:
+        return response
+    # ?q= filtra con el índice de búsqueda de texto completo
+    stmt = apply_search(concert_rows(), Concert.id, q, "concert")
+    pager = WebPager(request, web_page_size(size), await cached_count(db, CONCERTS, stmt))
+    if q:
+        # por relevancia no hay clave indexada por la que avanzar: número de página
+        stmt = pager.numbered(stmt.order_by(Concert.id), web_page_number(page_number))
+    else:
+        stmt = pager.keyset(stmt, [Concert.id], after, before)
 
-    return templates.TemplateResponse(
-        "concerts/list.html",
-        {"request": request, "concerts": concerts}
+    return await page.render_list(
+        db, "concerts/list.html", {"q": q}, stmt, "concerts/_row.html", "concert", pager
     )
-                          
-    
-    
\ No newline at end of file
@@ -5,15 +5,14 @@ Renderiza un HTML
 
 
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from fastapi import APIRouter, Request
-
-#configurar jinja2
-templates = Jinja2Templates(directory="app/templates")
+from fastapi import APIRouter, Request, Depends
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.templating import templates
 
 router = APIRouter(tags=["web"])
 
-@router.get("/", response_class=HTMLResponse)
-def home(request: Request):
+@router.get("/", response_class=HTMLResponse, dependencies=[Depends(query_budget(0)), Depends(etag_for())])
+async def home(request: Request):
     return templates.TemplateResponse("home.html", {"request": request})
    
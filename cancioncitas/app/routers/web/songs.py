@@ -1,50 +1,143 @@
-from fastapi.templating import Jinja2Templates
-from fastapi import APIRouter, Form, HTTPException, Request, Depends
+from fastapi import APIRouter, Form, HTTPException, Query, Request, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, update
 
+from app.cache import SONGS, invalidate
 from app.database import get_db
+from app.dimensions import artist_dimension
+from app.etag import etag_for
+from app.query_budget import query_budget
+from app.fragments import CachedPage, cached_page
+from app.pagination import WebPager, cached_count, web_page_number, web_page_size
+from app.search import apply_search
+from app.templating import templates
 from app.models import Song
-
-# configuración de Jinja2Templates
-templates = Jinja2Templates(directory="app/templates")
+from app.queries.artists import artist_options
+from app.queries.songs import DURATION_SORTS, song_conditions, song_rows, sorted_songs
+from app.schemas import SongSort, SqliteInt
+from app.schemas.types import SQLITE_INTEGER_MAX, SQLITE_INTEGER_MIN
 
 # router para rutas web
 router = APIRouter(prefix="/songs", tags=["web"])
 
+# artistas (id y nombre) para el desplegable del formulario
+async def find_artists(db: AsyncSession):
+    return (await db.execute(artist_options())).all()
+
+# validar el artista elegido en el formulario, devuelve su id o None
+# (la existencia se comprueba en la dimensión de artistas en memoria)
+async def parse_artist_id(db: AsyncSession, artist_id: str, errors: list) -> int | None:
+    if not artist_id or not artist_id.strip():
+        errors.append("El artista es requerido")
+        return None
+    try:
+        artist_value = parse_int(artist_id)
+    except ValueError:
+        errors.append("El artista no es válido")
+        return None
+    if artist_value not in await artist_dimension.lookup(db, [artist_value]):
+        errors.append("El artista seleccionado no existe")
+        return None
+    return artist_value
+
+# convertir un entero del formulario; fuera del rango de INTEGER de SQLite
+# es tan poco válido como un texto (no se podría usar en la consulta)
+def parse_int(value: str) -> int:
+    number = int(value)
+    if not SQLITE_INTEGER_MIN <= number <= SQLITE_INTEGER_MAX:
+        raise ValueError(value)
+    return number
+
+# convertir un parámetro opcional del formulario de filtros; los valores no
+# válidos se ignoran en lugar de devolver un error
+def parse_optional_int(value: str | None) -> int | None:
+    try:
+        return parse_int(value) if value and value.strip() else None
+    except ValueError:
+        return None
+
 # listar canciones (http://localhost:8000/songs)
-@router.get("", response_class=HTMLResponse)
-def list_songs(request: Request, db: Session = Depends(get_db)):
-    songs = db.execute(select(Song)).scalars().all()
-    
-    return templates.TemplateResponse(
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(query_budget(4)), Depends(etag_for("songs", "artists"))])
+async def list_songs(
+    request: Request,
+    q: str | None = None,
+    artist_id: str | None = None,
+    explicit: str | None = None,
+    min_duration: str | None = None,
+    max_duration: str | None = None,
+    sort: str | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    page_number: str | None = Query(None, alias="page"),
+    size: str | None = None,
+    page: CachedPage = Depends(cached_page(SONGS)),
+    db: AsyncSession = Depends(get_db)
+):
+    # HTML ya renderizado si la página está en la caché
+    if (response := page.hit()) is not None:
+        return response
+
+    filters = {
+        "artist_id": parse_optional_int(artist_id),
+        "explicit": {"true": True, "false": False}.get(explicit or ""),
+        "min_duration": parse_optional_int(min_duration),
+        "max_duration": parse_optional_int(max_duration),
+    }
+    sort_value = next((option for option in SongSort if option.value == sort), None)
+
+    stmt = song_rows().where(*song_conditions(**filters, duration_index=sort_value in DURATION_SORTS))
+    # ?q= filtra con el índice de búsqueda de texto completo; se ordena por
+    # relevancia salvo que se haya elegido otra ordenación
+    stmt = apply_search(stmt, Song.id, q, "song", by_rank=sort_value is None)
+    pager = WebPager(request, web_page_size(size), await cached_count(db, SONGS, stmt))
+    if q and sort_value is None:
+        # por relevancia no hay clave indexada por la que avanzar: número de página
+        stmt = pager.numbered(stmt.order_by(Song.id), web_page_number(page_number))
+    else:
+        stmt, columns, cursor_values, descending = sorted_songs(stmt, sort_value or SongSort.ID)
+        stmt = pager.keyset(stmt, columns, after, before, descending, cursor_values)
+    artists = await find_artists(db)
+
+    # las canciones de la página se leen mientras se renderiza la tabla
+    return await page.render_list(
+        db,
         "songs/list.html",
-        {"request": request, "songs": songs}
+        {
+            "q": q,
+            "artists": artists,
+            "filters": filters,
+            "sort": sort_value.value if sort_value else "",
+        },
+        stmt,
+        "songs/_row.html",
+        "song",
+        pager
     )
 
 # mostrar formulario crear
-@router.get("/new", response_class=HTMLResponse)
-def show_create_form(request: Request):
+@router.get("/new", response_class=HTMLResponse, dependencies=[Depends(query_budget(2)), Depends(etag_for("artists"))])
+async def show_create_form(request: Request, db: AsyncSession = Depends(get_db)):
+    artists = await find_artists(db)
     return templates.TemplateResponse(
         "songs/form.html",
-        {"request": request, "song": None}
+        {"request": request, "song": None, "artists": artists}
     )
 
 # crear nueva canción
-@router.post("/new", response_class=HTMLResponse)
-def create_song(
+@router.post("/new", response_class=HTMLResponse, dependencies=[Depends(query_budget(3))])
+async def create_song(
     request: Request,
     title: str = Form(...),
-    artist: str = Form(...),
+    artist_id: str = Form(""),
     duration_seconds: str = Form(None),
     explicit: str = Form(""),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     errors = []
     form_data = {
         "title": title,
-        "artist": artist,
+        "artist_id": artist_id,
         "duration_seconds": duration_seconds,
         "explicit": explicit
     }
@@ -53,7 +146,7 @@ def create_song(
     duration_value = None
     if duration_seconds and duration_seconds.strip():
         try:
-            duration_value = int(duration_seconds)
+            duration_value = parse_int(duration_seconds)
             if duration_value < 0:
                 errors.append("La duración debe ser un número positivo")
         except ValueError:
@@ -69,86 +162,86 @@ def create_song(
     # validar campos obligatorios
     if not title or not title.strip():
         errors.append("El título es requerido")
-    if not artist or not artist.strip():
-        errors.append("El artista es requerido")
+    artist_value = await parse_artist_id(db, artist_id, errors)
     
     # si hay errores, mostrar el formulario con los errores
     if errors:
         return templates.TemplateResponse(
             "songs/form.html",
-            {"request": request, "song": None, "errors": errors, "form_data": form_data}
+            {"request": request, "song": None, "errors": errors, "form_data": form_data, "artists": await find_artists(db)}
         )
     
-    # crear la canción
+    # crear la canción (INSERT ... RETURNING id, una sola sentencia)
     try:
-        song = Song(
-            title = title.strip(),
-            artist = artist.strip(),
-            duration_seconds = duration_value,
-            explicit = explicit_value
-        )
-        db.add(song)
-        db.commit()
-        db.refresh(song)
+        song_id = (await db.execute(
+            insert(Song).values(
+                title = title.strip(),
+                artist_id = artist_value,
+                duration_seconds = duration_value,
+                explicit = explicit_value
+            ).returning(Song.id)
+        )).scalar_one()
+        await db.commit()
+        invalidate(SONGS)
         
         # redirigir a pantalla detalle
-        return RedirectResponse(url=f"/songs/{song.id}", status_code=303)
+        return RedirectResponse(url=f"/songs/{song_id}", status_code=303)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         errors.append(f"Error al crear la canción: {str(e)}")
         return templates.TemplateResponse(
             "songs/form.html",
-            {"request": request, "song": None, "errors": errors, "form_data": form_data}
+            {"request": request, "song": None, "errors": errors, "form_data": form_data, "artists": await find_artists(db)}
         )
 
 # detalle canción (http://localhost:8000/songs/5)
-@router.get("/{song_id}", response_class=HTMLResponse)
-def song_detail(request: Request, song_id: int, db: Session = Depends(get_db)):
-    song = db.execute(select(Song).where(Song.id == song_id)).scalar_one_or_none()
+@router.get("/{song_id}", response_class=HTMLResponse, dependencies=[Depends(query_budget(2)), Depends(etag_for("songs", "artists", resource=True))])
+async def song_detail(
+    request: Request,
+    song_id: SqliteInt,
+    page: CachedPage = Depends(cached_page(SONGS)),
+    db: AsyncSession = Depends(get_db)
+):
+    if (response := page.hit()) is not None:
+        return response
+    song = (await db.execute(song_rows().where(Song.id == song_id))).one_or_none()
     
     if song is None:
         raise HTTPException(status_code=404, detail="404 - Canción no encontrada")
     
-    return templates.TemplateResponse(
-        "songs/detail.html",
-        {"request": request, "song": song}
-    )
+    return page.render("songs/detail.html", {"song": song})
 
 # mostrar formulario editar
-@router.get("/{song_id}/edit", response_class=HTMLResponse)
-def show_edit_form(request: Request, song_id: int, db: Session = Depends(get_db)):
+@router.get("/{song_id}/edit", response_class=HTMLResponse, dependencies=[Depends(query_budget(3)), Depends(etag_for("songs", "artists", resource=True))])
+async def show_edit_form(request: Request, song_id: SqliteInt, db: AsyncSession = Depends(get_db)):
     # obtener canción por id
-    song = db.execute(select(Song).where(Song.id == song_id)).scalar_one_or_none()
+    song = (await db.execute(song_rows().where(Song.id == song_id))).one_or_none()
     
     # lanzar error 404 si no existe canción
     if song is None:
         raise HTTPException(status_code=404, detail="404 - Canción  no encontrada")
     
+    artists = await find_artists(db)
     return templates.TemplateResponse(
         "songs/form.html",
-        {"request": request, "song": song}
+        {"request": request, "song": song, "artists": artists}
     )
 
 # editar canción existente
-@router.post("/{song_id}/edit", response_class=HTMLResponse)
-def update_song(
+@router.post("/{song_id}/edit", response_class=HTMLResponse, dependencies=[Depends(query_budget(4))])
+async def update_song(
     request: Request,
-    song_id: int,
+    song_id: SqliteInt,
     title: str = Form(...),
-    artist: str = Form(...),
+    artist_id: str = Form(""),
     duration_seconds: str = Form(None),
     explicit: str = Form(""),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    song = db.execute(select(Song).where(Song.id == song_id)).scalar_one_or_none()
-    
-    if song is None:
-        raise HTTPException(status_code=404, detail="404 - Canción no encontrada")
-    
     errors = []
     form_data = {
         "title": title,
-        "artist": artist,
+        "artist_id": artist_id,
         "duration_seconds": duration_seconds,
         "explicit": explicit
     }
@@ -156,7 +249,7 @@ def update_song(
     duration_value = None
     if duration_seconds and duration_seconds.strip():
         try:
-            duration_value = int(duration_seconds)
+            duration_value = parse_int(duration_seconds)
             if duration_value < 0:
                 errors.append("La duración debe ser un número positivo")
         except ValueError:
@@ -170,47 +263,69 @@ def update_song(
     
     if not title or not title.strip():
         errors.append("El título es requerido")
-    if not artist or not artist.strip():
-        errors.append("El artista es requerido")
+    artist_value = await parse_artist_id(db, artist_id, errors)
     
     if errors:
-        return templates.TemplateResponse(
-            "songs/form.html",
-            {"request": request, "song": song, "errors": errors, "form_data": form_data}
-        )
+        return await render_edit_errors(request, db, song_id, errors, form_data)
     
+    # UPDATE ... RETURNING id: modificar y comprobar que existe en una sola sentencia
     try:
-        song.title = title.strip()
-        song.artist = artist.strip()
-        song.duration_seconds = duration_value
-        song.explicit = explicit_value
-
-        db.commit()
-        db.refresh(song)
-        
-        return RedirectResponse(url=f"/songs/{song.id}", status_code=303)
+        updated = (await db.execute(
+            update(Song)
+            .where(Song.id == song_id)
+            .values(
+                title = title.strip(),
+                artist_id = artist_value,
+                duration_seconds = duration_value,
+                explicit = explicit_value
+            )
+            .returning(Song.id)
+            .execution_options(synchronize_session=False)
+        )).scalar_one_or_none()
+        if updated is not None:
+            await db.commit()
+            invalidate(SONGS)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         errors.append(f"Error al actualizar la canción: {str(e)}")
-        return templates.TemplateResponse(
-            "songs/form.html",
-            {"request": request, "song": song, "errors": errors, "form_data": form_data}
-        )
-        
-# eliminar canción
-@router.post("/{song_id}/delete", response_class=HTMLResponse)
-def delete_song(request: Request, song_id: int, db: Session = Depends(get_db)):
-    song = db.execute(select(Song).where(Song.id == song_id)).scalar_one_or_none()
+        return await render_edit_errors(request, db, song_id, errors, form_data)
+    
+    if updated is None:
+        raise HTTPException(status_code=404, detail="404 - Canción no encontrada")
+    
+    return RedirectResponse(url=f"/songs/{song_id}", status_code=303)
+
+# volver a mostrar el formulario de edición con los errores
+async def render_edit_errors(request: Request, db: AsyncSession, song_id: int, errors: list, form_data: dict):
+    song = (await db.execute(song_rows().where(Song.id == song_id))).one_or_none()
     
     if song is None:
         raise HTTPException(status_code=404, detail="404 - Canción no encontrada")
     
-    # eliminar canción
-    try:
-        db.delete(song)
-        db.commit()
+    return templates.TemplateResponse(
+        "songs/form.html",
+        {"request": request, "song": song, "errors": errors, "form_data": form_data, "artists": await find_artists(db)}
+    )
         
-        return RedirectResponse("/songs", status_code=303)
+# eliminar canción
+@router.post("/{song_id}/delete", response_class=HTMLResponse, dependencies=[Depends(query_budget(1))])
+async def delete_song(request: Request, song_id: SqliteInt, db: AsyncSession = Depends(get_db)):
+    # eliminar canción (DELETE ... RETURNING id indica si existía)
+    try:
+        deleted = (await db.execute(
+            delete(Song)
+            .where(Song.id == song_id)
+            .returning(Song.id)
+            .execution_options(synchronize_session=False)
+        )).scalar_one_or_none()
+        if deleted is not None:
+            await db.commit()
+            invalidate(SONGS)
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al eliminar la canción: {str(e)}")
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al eliminar la canción: {str(e)}")
+    
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="404 - Canción no encontrada")
+    
+    return RedirectResponse("/songs", status_code=303)
\ No newline at end of file
@@ -2,8 +2,14 @@
 Esquemas Pydantic para validación de datos
 """
 
-from app.schemas.song import SongResponse, SongCreate, SongUpdate, SongPatch
+from app.schemas.types import SqliteInt
+from app.schemas.song import SongResponse, SongCreate, SongUpdate, SongPatch, SongBulkCreated, SongBulkError, SongBulkResponse, SongSort
 from app.schemas.artist import ArtistResponse
 from app.schemas.concert import ConcertResponse, ConcertCreate, ConcertPatch
+from app.schemas.pagination import Page
+from app.schemas.bulk import BulkWriteResponse
+from app.schemas.search import SearchKind, SearchResult
+from app.schemas.cache import CacheStats, CacheStatsResponse
+from app.schemas.stats import ArtistSongStats, ConcertStatusStats, ArtistMonthConcertStats
 
-__all__ = ["SongResponse", "SongCreate", "SongUpdate", "SongPatch", "ArtistResponse", "ConcertResponse", "ConcertCreate", "ConcertPatch"]
\ No newline at end of file
+__all__ = ["SqliteInt", "SongResponse", "SongCreate", "SongUpdate", "SongPatch", "SongBulkCreated", "SongBulkError", "SongBulkResponse", "SongSort", "ArtistResponse", "ConcertResponse", "ConcertCreate", "ConcertPatch", "Page", "BulkWriteResponse", "SearchKind", "SearchResult", "CacheStats", "CacheStatsResponse", "ArtistSongStats", "ConcertStatusStats", "ArtistMonthConcertStats"]
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""
+Esquemas para las operaciones masivas basadas en filtros
+"""
+
+from pydantic import BaseModel
+
+
+#resultado de un UPDATE/DELETE masivo
+class BulkWriteResponse(BaseModel):
+    # número de filas afectadas por la sentencia
+    affected: int
@@ -0,0 +1,32 @@
+"""
+Esquemas para las estadísticas de las cachés de respuestas
+"""
+
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    enabled: bool
+    # respuestas guardadas ahora mismo
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    # entradas descartadas por falta de espacio (LRU)
+    evictions: int
+    # entradas descartadas por haber caducado (TTL)
+    expirations: int
+    # invalidaciones provocadas por escrituras
+    invalidations: int
+    # segundos totales sirviendo aciertos
+    hit_seconds: float
+    # segundos totales generando lo que no estaba (serialización o renderizado)
+    build_seconds: float
+
+
+class CacheStatsResponse(BaseModel):
+    # respuestas JSON de la API
+    api: CacheStats
+    # HTML renderizado de la web
+    html: CacheStats
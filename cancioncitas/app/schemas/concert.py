@@ -2,6 +2,7 @@ from pydantic import BaseModel, ConfigDict, field_validator
 from datetime import datetime
 from app.models import ConcertStatus
 from app.schemas import ArtistResponse
+from app.schemas.types import SqliteInt
 
 class ConcertResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -22,12 +23,12 @@ class ConcertCreate(BaseModel):
     
     name: str
     price: float
-    capacity: int | None = None
+    capacity: SqliteInt | None = None
     status: ConcertStatus = ConcertStatus.SCHEDULED
     is_sold_out: bool | None = False
     date_time: datetime
     img_url: str | None = None
-    artist_id: int
+    artist_id: SqliteInt
     
     @field_validator("name")
     @classmethod
@@ -75,23 +76,26 @@ class ConcertCreate(BaseModel):
         
         return v
 
+#name, price, status, date_time y artist_id se pueden omitir pero no enviar a
+#null (las columnas son NOT NULL); los validadores sólo se ejecutan con valores
+#enviados, no con el None por defecto
 class ConcertPatch(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     name: str | None = None
     price: float | None = None
-    capacity: int | None = None
+    capacity: SqliteInt | None = None
     status: ConcertStatus | None = None
     is_sold_out: bool | None = None
     date_time: datetime | None = None
     img_url: str | None = None
-    artist_id: int | None = None
+    artist_id: SqliteInt | None = None
     
     @field_validator("name")
     @classmethod
-    def validate_name_not_empty(cls, v: str | None) -> str | None:
+    def validate_name_not_empty(cls, v: str | None) -> str:
         if v is None:
-            return None
+            raise ValueError("El nombre no puede ser nulo")
         
         if not v or not v.strip():
             raise ValueError("El nombre no puede estar vacío")
@@ -103,9 +107,9 @@ class ConcertPatch(BaseModel):
     
     @field_validator("price")
     @classmethod
-    def validate_price_positive(cls, v: float | None) -> float | None:
+    def validate_price_positive(cls, v: float | None) -> float:
         if v is None:
-            return None
+            raise ValueError("El precio no puede ser nulo")
         
         if v < 0:
             raise ValueError("El precio debe ser un número positivo")
@@ -134,11 +138,19 @@ class ConcertPatch(BaseModel):
         
         return v.strip()
     
+    @field_validator("status", "date_time")
+    @classmethod
+    def validate_not_null(cls, v):
+        if v is None:
+            raise ValueError("El campo no puede ser nulo")
+        
+        return v
+    
     @field_validator("artist_id")
     @classmethod
-    def validate_artist_id_positive(cls, v: int | None) -> int | None:
+    def validate_artist_id_positive(cls, v: int | None) -> int:
         if v is None:
-            return None
+            raise ValueError("El id del artista no puede ser nulo")
         
         if v < 1:
             raise ValueError("El id del artista debe ser un número positivo")
@@ -0,0 +1,16 @@
+"""
+Esquema genérico para respuestas paginadas por cursor
+"""
+
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    # elementos de la página actual
+    items: list[T]
+    # cursor para pedir la página siguiente (?after=...), None si es la última
+    next_cursor: str | None = None
@@ -0,0 +1,24 @@
+"""
+Esquemas para la búsqueda de texto completo
+"""
+
+import enum
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SearchKind(enum.Enum):
+    SONG = "song"
+    ARTIST = "artist"
+    CONCERT = "concert"
+
+
+class SearchResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    kind: SearchKind
+    id: int
+    title: str
+    subtitle: str | None
+    # relevancia bm25 (cuanto menor, más relevante)
+    rank: float
@@ -2,7 +2,23 @@
 Esquemas Pydantic para estructura y validación de datos de canciones
 """
 
-from pydantic import BaseModel, ConfigDict, field_validator
+import enum
+
+from pydantic import AliasChoices, AliasPath, BaseModel, ConfigDict, Field, field_validator
+
+from app.schemas.types import SqliteInt
+
+
+#ordenaciones admitidas en el listado de canciones ("-" delante = descendente)
+class SongSort(enum.Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    TITLE = "title"
+    TITLE_DESC = "-title"
+    ARTIST = "artist"
+    ARTIST_DESC = "-artist"
+    DURATION = "duration"
+    DURATION_DESC = "-duration"
 
 
 #modelos pydantic (schemas)
@@ -10,18 +26,21 @@ class SongResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: int
     title: str
-    artist: str
+    artist_id: int
+    # nombre del artista: al leer desde el modelo Song, artist es la relación
+    # con Artist y se toma artist.name (sin validador en Python, lo resuelve pydantic-core)
+    artist: str = Field(validation_alias=AliasChoices(AliasPath("artist", "name"), "artist"))
     duration_seconds: int | None
     explicit: bool | None
 
 #modelo para crear canciones (POST)
 class SongCreate(BaseModel):
     title: str
-    artist: str
-    duration_seconds: int | None = None
+    artist_id: SqliteInt
+    duration_seconds: SqliteInt | None = None
     explicit: bool | None = None
     
-    @field_validator('title', 'artist')
+    @field_validator('title')
     @classmethod
     def validate_not_empty(cls, v: str) -> str:
         #verifica que el campo no esté vacío o contenga solo espacios en blanco
@@ -38,6 +57,14 @@ class SongCreate(BaseModel):
             raise ValueError('La duración de la canción no puede ser negativa.')
         
         return v
+    
+    @field_validator('artist_id')
+    @classmethod
+    def validate_artist_id_positive(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError('El id del artista debe ser un número positivo.')
+        
+        return v
 
     
 #modelo para actualizar canciones (PUT)
@@ -46,11 +73,11 @@ class SongUpdate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     title: str 
-    artist: str
-    duration_seconds: int | None 
+    artist_id: SqliteInt
+    duration_seconds: SqliteInt | None
     explicit: bool | None
     
-    @field_validator('title', 'artist')
+    @field_validator('title')
     @classmethod
     def validate_not_empty(cls, v: str) -> str:
         #verifica que el campo no esté vacío o contenga solo espacios en blanco
@@ -68,22 +95,31 @@ class SongUpdate(BaseModel):
         
         return v
     
+    @field_validator('artist_id')
+    @classmethod
+    def validate_artist_id_positive(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError('El id del artista debe ser un número positivo.')
+        
+        return v
+    
 #modelo para actualizar canciones parcialmente (PATCH)
 #solo se envían los campos a modificar
+#title y artist_id se pueden omitir pero no enviar a null (las columnas son NOT NULL);
+#los validadores sólo se ejecutan con valores enviados, no con el None por defecto
 class SongPatch(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     title: str | None = None
-    artist: str | None = None
-    duration_seconds: int | None = None
+    artist_id: SqliteInt | None = None
+    duration_seconds: SqliteInt | None = None
     explicit: bool | None = None
     
-    @field_validator('title', 'artist')
+    @field_validator('title')
     @classmethod
-    def validate_not_empty(cls, v: str | None) -> str | None:
-        #Si no se proporciona valor (None), no hacer validación
+    def validate_not_empty(cls, v: str | None) -> str:
         if v is None:
-            return None
+            raise ValueError('El título no puede ser nulo.')
         
         # Si se proporciona valor, verificar que no esté vacío o contenga solo espacios en blanco
         if not v or not v.strip():
@@ -102,4 +138,34 @@ class SongPatch(BaseModel):
         if v < 0:
             raise ValueError('La duración de la canción no puede ser negativa.')
         
-        return v
\ No newline at end of file
+        return v
+    
+    @field_validator('artist_id')
+    @classmethod
+    def validate_artist_id_positive(cls, v: int | None) -> int:
+        if v is None:
+            raise ValueError('El id del artista no puede ser nulo.')
+        
+        if v < 1:
+            raise ValueError('El id del artista debe ser un número positivo.')
+        
+        return v
+
+#error de validación de un elemento en la carga masiva
+class SongBulkError(BaseModel):
+    # posición del elemento en el array o en el NDJSON (sin contar líneas vacías), empezando en 0
+    index: int
+    errors: list[dict]
+
+#canción creada en la carga masiva
+class SongBulkCreated(BaseModel):
+    # posición del elemento enviado (como en SongBulkError) y id de la canción creada
+    index: int
+    id: int
+
+#resultado de la carga masiva de canciones (POST /bulk)
+class SongBulkResponse(BaseModel):
+    created: int
+    # canciones creadas, por orden de index
+    songs: list[SongBulkCreated]
+    errors: list[SongBulkError]
@@ -0,0 +1,41 @@
+"""
+Esquemas para las estadísticas (/api/stats)
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+from app.models import ConcertStatus
+
+
+class ArtistSongStats(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    artist_id: int
+    artist: str
+    song_count: int
+    # suma de las duraciones conocidas
+    total_duration_seconds: int
+    # media de las canciones con duración (None si ninguna la tiene)
+    avg_duration_seconds: float | None
+
+
+class ConcertStatusStats(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    status: ConcertStatus
+    concert_count: int
+    capacity: int
+    # suma de price * capacity
+    potential_revenue: float
+
+
+class ArtistMonthConcertStats(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    artist_id: int
+    artist: str
+    # "YYYY-MM"
+    month: str
+    concert_count: int
+    capacity: int
+    potential_revenue: float
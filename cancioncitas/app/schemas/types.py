@@ -0,0 +1,16 @@
+"""
+Tipos comunes de los parámetros y esquemas de entrada
+"""
+
+from typing import Annotated
+
+from pydantic import Field
+
+# rango de INTEGER en SQLite (64 bits con signo): un valor fuera de él no se
+# puede enlazar en una consulta y la sentencia falla con un error 500
+SQLITE_INTEGER_MIN = -2**63
+SQLITE_INTEGER_MAX = 2**63 - 1
+
+# entero de entrada (ids, filtros, campos) que cabe en un INTEGER de SQLite;
+# fuera del rango se responde 422 como con cualquier otro valor no válido
+SqliteInt = Annotated[int, Field(ge=SQLITE_INTEGER_MIN, le=SQLITE_INTEGER_MAX)]
@@ -0,0 +1,205 @@
+"""
+Búsqueda de texto completo con SQLite FTS5
+
+Todas las entidades comparten una tabla virtual search_index. El rowid de cada
+fila es id * 4 + código del tipo (1 canción, 2 artista, 3 concierto), así los
+triggers localizan la fila de cada entidad por clave primaria y no recorriendo
+el índice.
+"""
+
+import re
+
+from sqlalchemy import Connection, column, func, literal_column, select, table, text
+
+# máximo de términos de búsqueda que se aceptan en una consulta
+MAX_SEARCH_TERMS = 8
+
+search_index = table(
+    "search_index",
+    column("rowid"),
+    column("kind"),
+    column("ref_id"),
+    column("title"),
+    column("subtitle"),
+)
+
+# unicode61 + remove_diacritics: "mediterraneo" encuentra "Mediterráneo"
+# prefix: índices adicionales para que las búsquedas por prefijo sean rápidas
+SEARCH_TABLE_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    kind UNINDEXED,
+    ref_id UNINDEXED,
+    title,
+    subtitle,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# triggers que mantienen el índice sincronizado con cada INSERT/UPDATE/DELETE
+SEARCH_TRIGGERS_DDL = [
+    # canciones: título y nombre del artista
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_search_ai AFTER INSERT ON songs BEGIN
+        INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+        VALUES (
+            new.id * 4 + 1, 'song', new.id, new.title,
+            (SELECT name FROM artists WHERE id = new.artist_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_search_au AFTER UPDATE OF id, title, artist_id ON songs BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+        VALUES (
+            new.id * 4 + 1, 'song', new.id, new.title,
+            (SELECT name FROM artists WHERE id = new.artist_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_search_ad AFTER DELETE ON songs BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    # artistas: nombre (al renombrar también cambia el subtítulo de sus canciones)
+    """
+    CREATE TRIGGER IF NOT EXISTS artists_search_ai AFTER INSERT ON artists BEGIN
+        INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+        VALUES (new.id * 4 + 2, 'artist', new.id, new.name, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artists_search_au AFTER UPDATE OF id, name ON artists BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+        INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+        VALUES (new.id * 4 + 2, 'artist', new.id, new.name, NULL);
+        UPDATE search_index SET subtitle = new.name
+        WHERE rowid IN (SELECT id * 4 + 1 FROM songs WHERE artist_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artists_search_ad AFTER DELETE ON artists BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    # conciertos: nombre
+    """
+    CREATE TRIGGER IF NOT EXISTS concerts_search_ai AFTER INSERT ON concerts BEGIN
+        INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+        VALUES (new.id * 4 + 3, 'concert', new.id, new.name, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS concerts_search_au AFTER UPDATE OF id, name ON concerts BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+        INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+        VALUES (new.id * 4 + 3, 'concert', new.id, new.name, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS concerts_search_ad AFTER DELETE ON concerts BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+]
+
+# carga completa del índice a partir de las tablas
+SEARCH_REBUILD_SQL = [
+    "DELETE FROM search_index",
+    """
+    INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+    SELECT songs.id * 4 + 1, 'song', songs.id, songs.title, artists.name
+    FROM songs JOIN artists ON artists.id = songs.artist_id
+    """,
+    """
+    INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+    SELECT id * 4 + 2, 'artist', id, name, NULL FROM artists
+    """,
+    """
+    INSERT INTO search_index(rowid, kind, ref_id, title, subtitle)
+    SELECT id * 4 + 3, 'concert', id, name, NULL FROM concerts
+    """,
+]
+
+
+def create_search_index(connection: Connection) -> None:
+    """
+    Crea la tabla FTS5 y sus triggers si no existen.
+    Si la tabla es nueva se rellena con los datos que ya hubiera.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    ).first()
+
+    connection.execute(text(SEARCH_TABLE_DDL))
+    for ddl in SEARCH_TRIGGERS_DDL:
+        connection.execute(text(ddl))
+
+    if not exists:
+        rebuild_search_index(connection)
+
+
+def drop_search_triggers(connection: Connection) -> None:
+    """
+    Elimina los triggers del índice (p. ej. antes de una migración que cambie
+    las columnas que usan); create_search_index los vuelve a crear.
+    """
+    for ddl in SEARCH_TRIGGERS_DDL:
+        name = re.search(r"IF NOT EXISTS (\w+)", ddl).group(1)
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    for sql in SEARCH_REBUILD_SQL:
+        connection.execute(text(sql))
+
+
+def fts_query(q: str) -> str | None:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    se busca como prefijo ("pala"*) y todas deben aparecer.
+    Devuelve None si no queda ningún término.
+    """
+    terms = re.findall(r"\w+", q)[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_stmt(match: str, kind: str | None = None):
+    """
+    SELECT sobre el índice ordenado por relevancia (bm25, el título pesa más
+    que el subtítulo). match debe venir de fts_query.
+    """
+    rank = func.bm25(literal_column("search_index"), 0.0, 0.0, 10.0, 5.0).label("rank")
+    stmt = (
+        select(
+            search_index.c.kind,
+            search_index.c.ref_id,
+            search_index.c.title,
+            search_index.c.subtitle,
+            rank,
+        )
+        .where(literal_column("search_index").op("MATCH")(match))
+        .order_by(rank)
+    )
+    if kind is not None:
+        stmt = stmt.where(search_index.c.kind == kind)
+    return stmt
+
+
+def apply_search(stmt, id_column, q: str | None, kind: str, by_rank: bool = True):
+    """
+    Restringe stmt a las filas de tipo kind que coinciden con q, ordenadas por
+    relevancia (salvo by_rank=False, cuando quien llama ya impone su orden).
+    Si q está vacío devuelve stmt sin cambios.
+    """
+    match = fts_query(q) if q else None
+    if match is None:
+        return stmt
+
+    matches = search_stmt(match, kind).subquery()
+    stmt = stmt.join(matches, id_column == matches.c.ref_id)
+    return stmt.order_by(matches.c.rank) if by_rank else stmt
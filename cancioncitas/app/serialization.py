@@ -0,0 +1,39 @@
+"""
+Serialización rápida de listados para las respuestas de la API
+
+Cada esquema tiene un TypeAdapter de lista compilado una sola vez, que valida
+todas las filas (desde los atributos de los modelos ORM) y las convierte a
+JSON en una única llamada a pydantic-core, sin pasar por objetos intermedios
+ni por el codificador JSON de Python.
+"""
+
+import json
+from functools import cache
+
+from pydantic import BaseModel, TypeAdapter
+
+
+@cache
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def dump_list(schema: type[BaseModel], rows) -> bytes:
+    """
+    JSON (bytes) de la lista de filas rows serializadas con schema.
+    """
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def dump_page(schema: type[BaseModel], rows, next_cursor: str | None) -> bytes:
+    """
+    JSON con la misma forma que Page[schema]: {"items": [...], "next_cursor": ...}
+    """
+    return b"".join((
+        b'{"items":',
+        dump_list(schema, rows),
+        b',"next_cursor":',
+        json.dumps(next_cursor).encode(),
+        b"}",
+    ))
@@ -0,0 +1,184 @@
+"""
+Tablas de resumen para las estadísticas (/api/stats)
+
+artist_song_stats guarda, por artista, el número de canciones y la suma de sus
+duraciones; concert_stats, por artista, mes y estado, el número de conciertos,
+el aforo y la recaudación potencial (price * capacity). Los triggers las
+actualizan con cada INSERT/UPDATE/DELETE de songs y concerts, así las
+consultas de estadísticas leen una fila por artista (o por artista y mes) en
+lugar de recorrer todas las canciones y conciertos.
+
+Si las tablas se desincronizan (p. ej. por cambios hechos con los triggers
+desactivados) se reconstruyen con: python -m app.commands.rebuild_stats
+"""
+
+from sqlalchemy import Connection, Enum, Float, Integer, String, column, table, text
+
+from app.models import ConcertStatus
+
+artist_song_stats = table(
+    "artist_song_stats",
+    column("artist_id", Integer),
+    column("song_count", Integer),
+    # suma y número de las duraciones conocidas (las canciones sin duración no cuentan para la media)
+    column("duration_total", Integer),
+    column("duration_count", Integer),
+)
+
+concert_stats = table(
+    "concert_stats",
+    column("artist_id", Integer),
+    # "YYYY-MM" de date_time
+    column("month", String),
+    column("status", Enum(ConcertStatus)),
+    column("concert_count", Integer),
+    column("capacity_total", Integer),
+    column("revenue_total", Float),
+)
+
+STATS_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS artist_song_stats (
+        artist_id INTEGER PRIMARY KEY,
+        song_count INTEGER NOT NULL DEFAULT 0,
+        duration_total INTEGER NOT NULL DEFAULT 0,
+        duration_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS concert_stats (
+        artist_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        status TEXT NOT NULL,
+        concert_count INTEGER NOT NULL DEFAULT 0,
+        capacity_total INTEGER NOT NULL DEFAULT 0,
+        revenue_total REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (artist_id, month, status)
+    ) WITHOUT ROWID
+    """,
+]
+
+# sumar una fila (new) al resumen
+SONG_ADD_SQL = """
+        INSERT INTO artist_song_stats (artist_id, song_count, duration_total, duration_count)
+        VALUES (new.artist_id, 1, coalesce(new.duration_seconds, 0), new.duration_seconds IS NOT NULL)
+        ON CONFLICT (artist_id) DO UPDATE SET
+            song_count = song_count + 1,
+            duration_total = duration_total + excluded.duration_total,
+            duration_count = duration_count + excluded.duration_count;
+"""
+
+# restar una fila (old) del resumen
+SONG_SUBTRACT_SQL = """
+        UPDATE artist_song_stats SET
+            song_count = song_count - 1,
+            duration_total = duration_total - coalesce(old.duration_seconds, 0),
+            duration_count = duration_count - (old.duration_seconds IS NOT NULL)
+        WHERE artist_id = old.artist_id;
+"""
+
+CONCERT_ADD_SQL = """
+        INSERT INTO concert_stats (artist_id, month, status, concert_count, capacity_total, revenue_total)
+        VALUES (
+            new.artist_id, substr(new.date_time, 1, 7), new.status, 1,
+            coalesce(new.capacity, 0), new.price * coalesce(new.capacity, 0)
+        )
+        ON CONFLICT (artist_id, month, status) DO UPDATE SET
+            concert_count = concert_count + 1,
+            capacity_total = capacity_total + excluded.capacity_total,
+            revenue_total = revenue_total + excluded.revenue_total;
+"""
+
+CONCERT_SUBTRACT_SQL = """
+        UPDATE concert_stats SET
+            concert_count = concert_count - 1,
+            capacity_total = capacity_total - coalesce(old.capacity, 0),
+            revenue_total = revenue_total - old.price * coalesce(old.capacity, 0)
+        WHERE artist_id = old.artist_id AND month = substr(old.date_time, 1, 7) AND status = old.status;
+        DELETE FROM concert_stats
+        WHERE artist_id = old.artist_id AND month = substr(old.date_time, 1, 7) AND status = old.status
+          AND concert_count = 0;
+"""
+
+# los UPDATE que no tocan las columnas resumidas no disparan los triggers
+STATS_TRIGGERS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS songs_stats_ai AFTER INSERT ON songs BEGIN
+        {SONG_ADD_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS songs_stats_au AFTER UPDATE OF artist_id, duration_seconds ON songs BEGIN
+        {SONG_SUBTRACT_SQL}
+        {SONG_ADD_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS songs_stats_ad AFTER DELETE ON songs BEGIN
+        {SONG_SUBTRACT_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS concerts_stats_ai AFTER INSERT ON concerts BEGIN
+        {CONCERT_ADD_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS concerts_stats_au
+    AFTER UPDATE OF artist_id, date_time, status, price, capacity ON concerts BEGIN
+        {CONCERT_SUBTRACT_SQL}
+        {CONCERT_ADD_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS concerts_stats_ad AFTER DELETE ON concerts BEGIN
+        {CONCERT_SUBTRACT_SQL}
+    END
+    """,
+    # al borrar un artista (sólo es posible sin canciones ni conciertos) desaparece su fila
+    """
+    CREATE TRIGGER IF NOT EXISTS artists_stats_ad AFTER DELETE ON artists BEGIN
+        DELETE FROM artist_song_stats WHERE artist_id = old.id;
+    END
+    """,
+]
+
+# carga completa de los resúmenes a partir de las tablas
+STATS_REBUILD_SQL = [
+    "DELETE FROM artist_song_stats",
+    """
+    INSERT INTO artist_song_stats (artist_id, song_count, duration_total, duration_count)
+    SELECT artist_id, count(*), coalesce(sum(duration_seconds), 0), count(duration_seconds)
+    FROM songs GROUP BY artist_id
+    """,
+    "DELETE FROM concert_stats",
+    """
+    INSERT INTO concert_stats (artist_id, month, status, concert_count, capacity_total, revenue_total)
+    SELECT artist_id, substr(date_time, 1, 7), status, count(*),
+           coalesce(sum(capacity), 0), coalesce(sum(price * coalesce(capacity, 0)), 0)
+    FROM concerts GROUP BY artist_id, substr(date_time, 1, 7), status
+    """,
+]
+
+
+def create_stats_tables(connection: Connection) -> None:
+    """
+    Crea las tablas de resumen y sus triggers si no existen.
+    Si las tablas son nuevas se rellenan con los datos que ya hubiera.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concert_stats'")
+    ).first()
+
+    for ddl in STATS_TABLES_DDL:
+        connection.execute(text(ddl))
+    for ddl in STATS_TRIGGERS_DDL:
+        connection.execute(text(ddl))
+
+    if not exists:
+        rebuild_stats(connection)
+
+
+def rebuild_stats(connection: Connection) -> None:
+    for sql in STATS_REBUILD_SQL:
+        connection.execute(text(sql))
@@ -0,0 +1,89 @@
+"""
+Entorno de Jinja2 compartido por todos los routers web
+
+Un único entorno (y una única caché de plantillas compiladas) para toda la
+aplicación. El bytecode de las plantillas se guarda en disco, así un worker
+nuevo o un reinicio no vuelve a compilarlas, y compile_templates() las carga
+todas al arrancar para que la primera petición no pague la compilación.
+
+Los listados en streaming usan además async_environment (las mismas
+plantillas compiladas en modo asíncrono): la plantilla recorre las filas
+mientras se leen con la sesión asíncrona de la petición.
+"""
+
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from app.config import settings
+from app.metrics import template_timer
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+
+class TimedTemplate(Template):
+    """
+    Plantilla que suma su tiempo de renderizado a las métricas de la petición
+    en curso; con stream()/generate() se mide cada parte por separado, sin el
+    tiempo que la respuesta pasa esperando entre una y otra.
+    """
+
+    def render(self, *args, **kwargs) -> str:
+        with template_timer():
+            return super().render(*args, **kwargs)
+
+    def generate(self, *args, **kwargs):
+        chunks = super().generate(*args, **kwargs)
+        while True:
+            with template_timer():
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def generate_async(self, *args, **kwargs):
+        chunks = super().generate_async(*args, **kwargs)
+        try:
+            while True:
+                with template_timer():
+                    chunk = await anext(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+
+def create_environment(enable_async: bool = False) -> Environment:
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        # en producción las plantillas no cambian: no se comprueba su fecha en cada uso
+        auto_reload=settings.templates_auto_reload,
+        # el código compilado en modo asíncrono es otro: se guarda en otros ficheros
+        bytecode_cache=FileSystemBytecodeCache(
+            settings.templates_bytecode_dir, "__jinja2_async_%s.cache" if enable_async else "__jinja2_%s.cache"
+        ),
+        enable_async=enable_async,
+    )
+    environment.template_class = TimedTemplate
+    return environment
+
+
+environment = create_environment()
+async_environment = create_environment(enable_async=True)
+
+templates = Jinja2Templates(env=environment)
+
+
+def compile_templates() -> int:
+    """
+    Compila (o carga del bytecode) todas las plantillas en los dos entornos;
+    devuelve cuántas son.
+    """
+    names = environment.list_templates(extensions=["html"])
+    for name in names:
+        environment.get_template(name)
+        async_environment.get_template(name)
+    return len(names)
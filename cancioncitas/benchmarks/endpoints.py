@@ -0,0 +1,696 @@
+"""
+Latencia de cada endpoint de la API y de la web con catálogos de distinto tamaño
+
+Recorre todas las rutas de app/routers/api y app/routers/web dentro del mismo
+proceso (httpx sobre la aplicación ASGI, con su lifespan) contra bases de datos
+generadas con app.commands.generate_catalogue:
+
+    1k    20 artistas,     900 canciones,     80 conciertos
+    100k  1000 artistas,   90000 canciones,   9000 conciertos
+    1m    10000 artistas,  900000 canciones,  90000 conciertos
+
+Para cada escenario (una ruta con unos parámetros concretos) se mide:
+  - latencia p50/p95/p99 y media en ms
+  - número de sentencias SQL por petición (el máximo de las iteraciones)
+  - memoria reservada durante la petición (pico de tracemalloc, en una
+    pasada aparte para no alterar las latencias); incluye el cuerpo de la
+    respuesta, que el cliente de pruebas guarda entero
+
+Los catálogos se generan una vez y se guardan en --data-dir; cada ejecución
+trabaja sobre una copia, así las escrituras no los modifican. Cada catálogo se
+mide en un proceso nuevo, porque la configuración (DATABASE_URL, cachés) se lee
+al importar la aplicación. Por defecto las cachés de respuestas, fragmentos y
+totales están desactivadas, para medir el trabajo real de cada petición
+(--caches las deja activadas).
+
+El resultado se escribe en JSON (--output) y se puede comparar con una línea
+base guardada antes (--baseline): si algún escenario es más lento (p50), hace
+más consultas o reserva más memoria que en la línea base, se listan las
+regresiones y el proceso termina con código 1.
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.endpoints --datasets 1k,100k --save-baseline benchmarks/baseline.json
+    python -m benchmarks.endpoints --datasets 1k,100k --baseline benchmarks/baseline.json
+    python -m benchmarks.endpoints --datasets 1m --only "GET /api/songs" --iterations 100
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# tamaños de los catálogos: (artistas, canciones, conciertos)
+DATASETS = {
+    "1k": (20, 900, 80),
+    "100k": (1000, 90_000, 9000),
+    "1m": (10_000, 900_000, 90_000),
+}
+
+DEFAULT_DATA_DIR = Path(__file__).parent / "data"
+
+# márgenes para considerar que un escenario ha empeorado respecto a la línea base
+DEFAULT_TOLERANCE = 0.25
+# diferencias menores que estas se consideran ruido
+MIN_LATENCY_DELTA_MS = 2.0
+MIN_ALLOC_DELTA_KIB = 64.0
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# escenarios
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Call:
+    method: str
+    url: str
+    json: object = None
+    data: dict | None = None
+    content: bytes | None = None
+    headers: dict | None = None
+
+
+@dataclass
+class Env:
+    """
+    Lo que necesitan los escenarios para construir sus peticiones: el cliente,
+    ids que existen en el catálogo y un diccionario para guardar filas
+    creadas una sola vez (artista y canción propios de las escrituras).
+    """
+    client: object
+    artists: int
+    songs: int
+    concerts: int
+    state: dict = field(default_factory=dict)
+
+    @property
+    def artist_id(self) -> int:
+        return max(self.artists // 2, 1)
+
+    @property
+    def song_id(self) -> int:
+        return max(self.songs // 2, 1)
+
+    @property
+    def concert_id(self) -> int:
+        return max(self.concerts // 2, 1)
+
+
+@dataclass
+class Scenario:
+    # ruta tal como la declara FastAPI ("GET /api/songs/{id}")
+    route: str
+    # variante de la ruta (parámetros), vacía para la petición básica
+    label: str
+    # construye la petición de la iteración i; lo que haga antes de devolverla
+    # (crear filas que luego se borran, etc.) no se mide
+    build: Callable[[Env, int], Awaitable[Call]]
+    expect: int = 200
+    # exportaciones y listados completos: menos iteraciones
+    heavy: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"{self.route} [{self.label}]" if self.label else self.route
+
+
+def get(url: str) -> Callable[[Env, int], Awaitable[Call]]:
+    """
+    Escenario de lectura con una url fija; {artist_id}, {song_id} y
+    {concert_id} se sustituyen por ids que existen en el catálogo.
+    """
+    async def build(env: Env, i: int) -> Call:
+        return Call("GET", url.format(artist_id=env.artist_id, song_id=env.song_id, concert_id=env.concert_id))
+    return build
+
+
+async def checked(response, expect: int):
+    if response.status_code != expect:
+        raise BenchmarkError(
+            f"{response.request.method} {response.request.url}: "
+            f"{response.status_code} (se esperaba {expect}) {response.text[:300]}"
+        )
+    return response
+
+
+def location_id(response) -> int:
+    # las escrituras web redirigen al detalle: /artists/5, /songs/7
+    return int(response.headers["location"].rstrip("/").rsplit("/", 1)[1])
+
+
+async def new_artist(env: Env, name: str) -> int:
+    response = await env.client.post("/artists/new", data={"name": name, "birth_date": "01/01/1990"})
+    return location_id(await checked(response, 303))
+
+
+async def new_songs(env: Env, artist_id: int, count: int) -> list[int]:
+    songs = [
+        {"title": f"Benchmark {n}", "artist_id": artist_id, "duration_seconds": 200, "explicit": False}
+        for n in range(count)
+    ]
+    response = await checked(await env.client.post("/api/songs/bulk", json=songs), 201)
+    return [song["id"] for song in response.json()["songs"]]
+
+
+async def new_concert(env: Env, artist_id: int) -> int:
+    response = await env.client.post("/api/concerts", json=concert_body(artist_id, 0))
+    return (await checked(response, 201)).json()["id"]
+
+
+def concert_body(artist_id: int, i: int) -> dict:
+    return {
+        "name": f"Benchmark {i}",
+        "price": 30.0 + i % 10,
+        "capacity": 1000,
+        "date_time": "2027-06-01T21:00:00",
+        "artist_id": artist_id,
+    }
+
+
+async def bench_artist(env: Env) -> int:
+    # artista propio para las escrituras, así no se modifican los datos generados
+    if "artist_id" not in env.state:
+        env.state["artist_id"] = await new_artist(env, "Benchmark")
+    return env.state["artist_id"]
+
+
+async def bench_song(env: Env) -> int:
+    if "song_id" not in env.state:
+        env.state["song_id"] = (await new_songs(env, await bench_artist(env), 1))[0]
+    return env.state["song_id"]
+
+
+async def bench_concert(env: Env) -> int:
+    if "concert_id" not in env.state:
+        env.state["concert_id"] = await new_concert(env, await bench_artist(env))
+    return env.state["concert_id"]
+
+
+def scenarios() -> list[Scenario]:
+    from app.pagination import encode_cursor
+
+    async def deep_songs_page(env: Env, i: int) -> Call:
+        # página a mitad del listado: el coste no debe depender de la profundidad
+        return Call("GET", f"/api/songs?after={encode_cursor([env.song_id])}")
+
+    async def deep_concerts_page(env: Env, i: int) -> Call:
+        return Call("GET", f"/api/concerts?after={encode_cursor([env.concert_id])}")
+
+    # --- escrituras de la API ---
+
+    async def create_song(env: Env, i: int) -> Call:
+        song = {"title": f"Benchmark {i}", "artist_id": await bench_artist(env), "duration_seconds": 180, "explicit": False}
+        return Call("POST", "/api/songs", json=song)
+
+    async def create_songs_bulk(env: Env, i: int) -> Call:
+        artist_id = await bench_artist(env)
+        songs = [
+            {"title": f"Benchmark {i}-{n}", "artist_id": artist_id, "duration_seconds": 180 + n, "explicit": n % 2 == 0}
+            for n in range(100)
+        ]
+        return Call("POST", "/api/songs/bulk", json=songs)
+
+    async def replace_song(env: Env, i: int) -> Call:
+        song = {"title": f"Benchmark {i}", "artist_id": await bench_artist(env), "duration_seconds": 180 + i % 2, "explicit": None}
+        return Call("PUT", f"/api/songs/{await bench_song(env)}", json=song)
+
+    async def patch_song(env: Env, i: int) -> Call:
+        return Call("PATCH", f"/api/songs/{await bench_song(env)}", json={"duration_seconds": 180 + i % 2})
+
+    async def patch_songs_bulk(env: Env, i: int) -> Call:
+        await bench_song(env)
+        return Call("PATCH", f"/api/songs?artist_id={await bench_artist(env)}", json={"explicit": i % 2 == 0})
+
+    async def delete_song(env: Env, i: int) -> Call:
+        song_id = (await new_songs(env, await bench_artist(env), 1))[0]
+        return Call("DELETE", f"/api/songs/{song_id}")
+
+    async def delete_songs_bulk(env: Env, i: int) -> Call:
+        # un artista nuevo con 20 canciones, que se borran con un único DELETE
+        artist_id = await new_artist(env, f"Benchmark borrado {i}")
+        await new_songs(env, artist_id, 20)
+        return Call("DELETE", f"/api/songs?artist_id={artist_id}")
+
+    async def create_concert(env: Env, i: int) -> Call:
+        return Call("POST", "/api/concerts", json=concert_body(await bench_artist(env), i))
+
+    async def patch_concert(env: Env, i: int) -> Call:
+        return Call("PATCH", f"/api/concerts/{await bench_concert(env)}", json={"price": 30.0 + i % 2})
+
+    async def patch_concerts_bulk(env: Env, i: int) -> Call:
+        await bench_concert(env)
+        return Call("PATCH", f"/api/concerts?artist_id={await bench_artist(env)}", json={"is_sold_out": i % 2 == 0})
+
+    async def delete_concert(env: Env, i: int) -> Call:
+        return Call("DELETE", f"/api/concerts/{await new_concert(env, await bench_artist(env))}")
+
+    async def delete_concerts_bulk(env: Env, i: int) -> Call:
+        artist_id = await new_artist(env, f"Benchmark borrado {i}")
+        for _ in range(5):
+            await new_concert(env, artist_id)
+        return Call("DELETE", f"/api/concerts?artist_id={artist_id}")
+
+    # --- formularios de la web ---
+
+    async def web_create_artist(env: Env, i: int) -> Call:
+        return Call("POST", "/artists/new", data={"name": f"Benchmark nuevo {i}", "birth_date": "01/01/1990"})
+
+    async def web_edit_artist(env: Env, i: int) -> Call:
+        data = {"name": f"Benchmark {i % 2}", "birth_date": "01/01/1990"}
+        return Call("POST", f"/artists/{await bench_artist(env)}/edit", data=data)
+
+    async def web_delete_artist(env: Env, i: int) -> Call:
+        return Call("POST", f"/artists/{await new_artist(env, f'Benchmark borrado {i}')}/delete")
+
+    def song_form(artist_id: int, i: int) -> dict:
+        return {"title": f"Benchmark {i}", "artist_id": str(artist_id), "duration_seconds": str(180 + i % 2), "explicit": "false"}
+
+    async def web_create_song(env: Env, i: int) -> Call:
+        return Call("POST", "/songs/new", data=song_form(await bench_artist(env), i))
+
+    async def web_edit_song(env: Env, i: int) -> Call:
+        return Call("POST", f"/songs/{await bench_song(env)}/edit", data=song_form(await bench_artist(env), i))
+
+    async def web_delete_song(env: Env, i: int) -> Call:
+        song_id = (await new_songs(env, await bench_artist(env), 1))[0]
+        return Call("POST", f"/songs/{song_id}/delete")
+
+    return [
+        # API: lecturas
+        Scenario("GET /api/songs", "", get("/api/songs")),
+        Scenario("GET /api/songs", "limit=500", get("/api/songs?limit=500")),
+        Scenario("GET /api/songs", "sort=artist", get("/api/songs?sort=artist")),
+        Scenario("GET /api/songs", "sort=-duration&min_duration=200", get("/api/songs?sort=-duration&min_duration=200")),
+        Scenario("GET /api/songs", "artist_id", get("/api/songs?artist_id={artist_id}")),
+        Scenario("GET /api/songs", "after=mitad", deep_songs_page),
+        Scenario("GET /api/songs/export", "", get("/api/songs/export"), heavy=True),
+        Scenario("GET /api/songs/{id}", "", get("/api/songs/{song_id}")),
+        Scenario("GET /api/concerts", "", get("/api/concerts")),
+        Scenario("GET /api/concerts", "limit=500", get("/api/concerts?limit=500")),
+        Scenario("GET /api/concerts", "after=mitad", deep_concerts_page),
+        Scenario("GET /api/concerts/export", "", get("/api/concerts/export"), heavy=True),
+        Scenario("GET /api/concerts/{id}", "", get("/api/concerts/{concert_id}")),
+        Scenario("GET /api/artists/export", "", get("/api/artists/export"), heavy=True),
+        Scenario("GET /api/search", "q=amor", get("/api/search?q=amor")),
+        Scenario("GET /api/search", "q=luna&kind=song", get("/api/search?q=luna&kind=song")),
+        Scenario("GET /api/cache/stats", "", get("/api/cache/stats")),
+        Scenario("GET /metrics", "", get("/metrics")),
+        Scenario("GET /api/stats/songs", "", get("/api/stats/songs"), heavy=True),
+        Scenario("GET /api/stats/concerts/status", "", get("/api/stats/concerts/status")),
+        Scenario("GET /api/stats/concerts/monthly", "", get("/api/stats/concerts/monthly"), heavy=True),
+        Scenario("GET /api/stats/concerts/monthly", "artist_id", get("/api/stats/concerts/monthly?artist_id={artist_id}")),
+        # API: escrituras
+        Scenario("POST /api/songs", "", create_song, expect=201),
+        Scenario("POST /api/songs/bulk", "100 canciones", create_songs_bulk, expect=201),
+        Scenario("PUT /api/songs/{id}", "", replace_song),
+        Scenario("PATCH /api/songs/{id}", "", patch_song),
+        Scenario("PATCH /api/songs", "artist_id", patch_songs_bulk),
+        Scenario("DELETE /api/songs/{id}", "", delete_song, expect=204),
+        Scenario("DELETE /api/songs", "artist_id (20 canciones)", delete_songs_bulk),
+        Scenario("POST /api/concerts", "", create_concert, expect=201),
+        Scenario("PATCH /api/concerts/{id}", "", patch_concert),
+        Scenario("PATCH /api/concerts", "artist_id", patch_concerts_bulk),
+        Scenario("DELETE /api/concerts/{id}", "", delete_concert, expect=204),
+        Scenario("DELETE /api/concerts", "artist_id (5 conciertos)", delete_concerts_bulk),
+        # web: páginas
+        Scenario("GET /", "", get("/")),
+        Scenario("GET /artists", "", get("/artists")),
+        Scenario("GET /artists", "q=amor", get("/artists?q=amor")),
+        Scenario("GET /artists/new", "", get("/artists/new")),
+        Scenario("GET /artists/{artist_id}", "", get("/artists/{artist_id}")),
+        Scenario("GET /artists/{artist_id}/edit", "", get("/artists/{artist_id}/edit")),
+        Scenario("GET /songs", "", get("/songs")),
+        Scenario("GET /songs", "size=200&sort=artist", get("/songs?size=200&sort=artist")),
+        Scenario("GET /songs", "q=amor", get("/songs?q=amor")),
+        Scenario("GET /songs/new", "", get("/songs/new")),
+        Scenario("GET /songs/{song_id}", "", get("/songs/{song_id}")),
+        Scenario("GET /songs/{song_id}/edit", "", get("/songs/{song_id}/edit")),
+        Scenario("GET /concerts", "", get("/concerts")),
+        Scenario("GET /concerts", "q=tour", get("/concerts?q=tour")),
+        # web: formularios
+        Scenario("POST /artists/new", "", web_create_artist, expect=303),
+        Scenario("POST /artists/{artist_id}/edit", "", web_edit_artist, expect=303),
+        Scenario("POST /artists/{artist_id}/delete", "", web_delete_artist, expect=303),
+        Scenario("POST /songs/new", "", web_create_song, expect=303),
+        Scenario("POST /songs/{song_id}/edit", "", web_edit_song, expect=303),
+        Scenario("POST /songs/{song_id}/delete", "", web_delete_song, expect=303),
+    ]
+
+
+def app_routes(app) -> set[str]:
+    from fastapi.routing import APIRoute
+
+    return {
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+
+# ---------------------------------------------------------------------------
+# medición (un proceso por catálogo)
+# ---------------------------------------------------------------------------
+
+class QueryCounter:
+    """
+    Cuenta las sentencias que llegan al driver en ambos motores. Sólo hay una
+    petición en curso a la vez, así que basta con un contador global.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def install(self, *engines) -> None:
+        from sqlalchemy import event
+
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(samples: list[float], p: float) -> float:
+    # rango más cercano sobre las muestras ordenadas
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+async def send(env: Env, call: Call):
+    return await env.client.request(
+        call.method, call.url, json=call.json, data=call.data, content=call.content, headers=call.headers
+    )
+
+
+async def measure(env: Env, scenario: Scenario, counter: QueryCounter, args) -> dict:
+    iterations = min(args.iterations, args.heavy_iterations) if scenario.heavy else args.iterations
+    step = 0
+    # que la basura de los escenarios anteriores no se recoja durante este
+    gc.collect()
+
+    # una petición de calentamiento basta para las pesadas
+    for _ in range(min(args.warmup, 1) if scenario.heavy else args.warmup):
+        await checked(await send(env, await scenario.build(env, step)), scenario.expect)
+        step += 1
+
+    latencies, queries, sizes = [], [], []
+    for _ in range(iterations):
+        call = await scenario.build(env, step)
+        step += 1
+        counter.count = 0
+        start = time.perf_counter()
+        response = await send(env, call)
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+        sizes.append(len(response.content))
+        await checked(response, scenario.expect)
+
+    # memoria: pico de lo reservado durante la petición, sin contar lo que ya había
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(args.alloc_iterations):
+            call = await scenario.build(env, step)
+            step += 1
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await checked(await send(env, call), scenario.expect)
+            allocations.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "route": scenario.route,
+        "samples": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "queries": max(queries),
+        "alloc_peak_kib": round(statistics.median(allocations), 1) if allocations else None,
+        "bytes": int(statistics.median(sizes)),
+    }
+
+
+def catalogue_counts(db_path: Path) -> dict:
+    with sqlite3.connect(db_path) as connection:
+        return {
+            table: connection.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()[0]
+            for table in ("artists", "songs", "concerts")
+        }
+
+
+async def run_worker(args) -> dict:
+    # la configuración ya está en el entorno (ver run_dataset): ahora se puede importar la app
+    import httpx
+
+    from app.database import async_engine, engine
+    from app.main import app
+
+    suite = [s for s in scenarios() if not args.only or any(o in s.name for o in args.only)]
+    if not args.only:
+        # cada ruta de la aplicación tiene que tener al menos un escenario
+        missing = app_routes(app) - {s.route for s in suite}
+        if missing:
+            raise BenchmarkError("Rutas sin escenario de benchmark: " + ", ".join(sorted(missing)))
+
+    counter = QueryCounter()
+    counter.install(engine, async_engine.sync_engine)
+    counts = catalogue_counts(Path(args.worker_db))
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            env = Env(client, counts["artists"], counts["songs"], counts["concerts"])
+            for scenario in suite:
+                results[scenario.name] = await measure(env, scenario, counter, args)
+                print(f"  {scenario.name:<58} p50 {results[scenario.name]['p50_ms']:9.2f} ms", file=sys.stderr, flush=True)
+
+    return {"startup": app.state.startup, "endpoints": results}
+
+
+# ---------------------------------------------------------------------------
+# catálogos y ejecución
+# ---------------------------------------------------------------------------
+
+def dataset_path(data_dir: Path, name: str, seed: int) -> Path:
+    return data_dir / f"catalogue-{name}-seed{seed}.db"
+
+
+def ensure_dataset(data_dir: Path, name: str, seed: int) -> Path:
+    """
+    Genera el catálogo si no está ya en data_dir. Se genera con otro nombre y
+    se renombra al terminar, así un catálogo a medias nunca se reutiliza.
+    """
+    path = dataset_path(data_dir, name, seed)
+    if path.exists():
+        return path
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".partial.db")
+    for leftover in data_dir.glob(partial.name + "*"):
+        leftover.unlink()
+
+    artists, songs, concerts = DATASETS[name]
+    print(f"Generando el catálogo {name} en {path}", file=sys.stderr, flush=True)
+    subprocess.run(
+        [
+            sys.executable, "-m", "app.commands.generate_catalogue",
+            "--artists", str(artists), "--songs", str(songs), "--concerts", str(concerts), "--seed", str(seed),
+        ],
+        env=app_env(partial, caches=True),
+        check=True,
+        stdout=sys.stderr,
+    )
+    # un solo fichero, sin WAL pendiente, antes de renombrarlo
+    with sqlite3.connect(partial) as connection:
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("PRAGMA journal_mode=DELETE")
+    partial.rename(path)
+    return path
+
+
+def app_env(db_path: Path, caches: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "APP_ENV": "production",
+        "DB_ECHO": "0",
+    })
+    if not caches:
+        env.update({"RESPONSE_CACHE_ENABLED": "0", "FRAGMENT_CACHE_ENABLED": "0", "COUNT_CACHE_ENABLED": "0"})
+    return env
+
+
+def run_dataset(name: str, args) -> dict:
+    source = ensure_dataset(args.data_dir, name, args.seed)
+    with tempfile.TemporaryDirectory(prefix="cancioncitas-bench-") as tmp:
+        # copia de trabajo: las escrituras del benchmark no tocan el catálogo generado
+        db_path = Path(tmp) / "catalogue.db"
+        with sqlite3.connect(source) as src, sqlite3.connect(db_path) as dst:
+            src.backup(dst)
+
+        output = Path(tmp) / "result.json"
+        command = [
+            sys.executable, "-m", "benchmarks.endpoints",
+            "--worker-db", str(db_path), "--worker-output", str(output),
+            "--iterations", str(args.iterations), "--heavy-iterations", str(args.heavy_iterations),
+            "--warmup", str(args.warmup), "--alloc-iterations", str(args.alloc_iterations),
+        ]
+        for only in args.only or []:
+            command += ["--only", only]
+        print(f"Catálogo {name}", file=sys.stderr, flush=True)
+        subprocess.run(command, env=app_env(db_path, args.caches), check=True)
+        result = json.loads(output.read_text())
+
+    artists, songs, concerts = DATASETS[name]
+    result["rows"] = {"artists": artists, "songs": songs, "concerts": concerts}
+    return result
+
+
+def compare(
+    current: dict, baseline: dict, tolerance: float, min_delta_ms: float = MIN_LATENCY_DELTA_MS
+) -> tuple[list[str], list[str]]:
+    """
+    Compara dos resultados escenario a escenario. Devuelve (regresiones,
+    mejoras) como líneas de texto. Sólo se comparan los catálogos medidos en
+    ambos; un escenario de la línea base que ya no se mide es una regresión.
+    """
+    regressions, improvements = [], []
+    for dataset, base in baseline["datasets"].items():
+        if dataset not in current["datasets"]:
+            continue
+        endpoints = current["datasets"][dataset]["endpoints"]
+        for name, before in base["endpoints"].items():
+            after = endpoints.get(name)
+            if after is None:
+                if not current["meta"]["only"]:
+                    regressions.append(f"{dataset} {name}: ya no se mide")
+                continue
+
+            where = f"{dataset} {name}"
+            if after["queries"] > before["queries"]:
+                regressions.append(f"{where}: {before['queries']} -> {after['queries']} consultas")
+            elif after["queries"] < before["queries"]:
+                improvements.append(f"{where}: {before['queries']} -> {after['queries']} consultas")
+
+            # la mediana es estable con pocas iteraciones; p95 y p99 se guardan pero
+            # con 30 muestras dependen de una o dos peticiones
+            delta = after["p50_ms"] - before["p50_ms"]
+            if delta > min_delta_ms and after["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+                regressions.append(f"{where}: p50 {before['p50_ms']:.2f} -> {after['p50_ms']:.2f} ms")
+            elif -delta > min_delta_ms and after["p50_ms"] * (1 + tolerance) < before["p50_ms"]:
+                improvements.append(f"{where}: p50 {before['p50_ms']:.2f} -> {after['p50_ms']:.2f} ms")
+
+            if before["alloc_peak_kib"] is not None and after["alloc_peak_kib"] is not None:
+                growth = after["alloc_peak_kib"] - before["alloc_peak_kib"]
+                if growth > MIN_ALLOC_DELTA_KIB and after["alloc_peak_kib"] > before["alloc_peak_kib"] * (1 + tolerance):
+                    regressions.append(
+                        f"{where}: memoria {before['alloc_peak_kib']:.0f} -> {after['alloc_peak_kib']:.0f} KiB"
+                    )
+    return regressions, improvements
+
+
+def print_table(result: dict) -> None:
+    for dataset, data in result["datasets"].items():
+        rows = data["rows"]
+        print(f"\n{dataset}: {rows['artists']} artistas, {rows['songs']} canciones, {rows['concerts']} conciertos")
+        print(f"  {'escenario':<58} {'p50':>9} {'p95':>9} {'p99':>9} {'consultas':>9} {'KiB':>9}")
+        for name, values in data["endpoints"].items():
+            alloc = values["alloc_peak_kib"]
+            print(
+                f"  {name:<58} {values['p50_ms']:9.2f} {values['p95_ms']:9.2f} {values['p99_ms']:9.2f} "
+                f"{values['queries']:9d} {'-' if alloc is None else f'{alloc:.0f}':>9}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="1k,100k,1m", help="catálogos a medir, separados por comas (1k, 100k, 1m)")
+    parser.add_argument("--iterations", type=int, default=30, help="peticiones medidas por escenario")
+    parser.add_argument("--heavy-iterations", type=int, default=10, help="iteraciones de exportaciones y listados completos")
+    parser.add_argument("--warmup", type=int, default=3, help="peticiones previas sin medir")
+    parser.add_argument("--alloc-iterations", type=int, default=3, help="peticiones medidas con tracemalloc")
+    parser.add_argument("--only", action="append", help="medir sólo los escenarios que contengan este texto (repetible)")
+    parser.add_argument("--caches", action="store_true", help="mantener activadas las cachés de respuestas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="carpeta de los catálogos generados")
+    parser.add_argument("--output", type=Path, help="fichero JSON con los resultados")
+    parser.add_argument("--baseline", type=Path, help="resultados anteriores con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="empeoramiento relativo permitido (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_LATENCY_DELTA_MS, help="diferencia de latencia que se considera ruido")
+    parser.add_argument("--save-baseline", type=Path, help="guardar los resultados como nueva línea base")
+    # uso interno: medición de un catálogo en un proceso aparte
+    parser.add_argument("--worker-db", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_db:
+        result = asyncio.run(run_worker(args))
+        args.worker_output.write_text(json.dumps(result))
+        return
+
+    names = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DATASETS]
+    if unknown:
+        parser.error(f"catálogos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(DATASETS)})")
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    result = {
+        "version": 1,
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db_async": os.getenv("DB_ASYNC", "1"),
+            "caches": args.caches,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "only": args.only or [],
+        },
+        "datasets": {},
+    }
+    try:
+        for name in names:
+            result["datasets"][name] = run_dataset(name, args)
+    except subprocess.CalledProcessError as e:
+        sys.exit(f"Falló la medición: {e}")
+
+    print_table(result)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"\nLínea base guardada en {args.save_baseline}")
+
+    if baseline is not None:
+        regressions, improvements = compare(result, baseline, args.tolerance, args.min_delta_ms)
+        for line in improvements:
+            print(f"mejora: {line}")
+        if regressions:
+            print(f"\n{len(regressions)} REGRESIONES respecto a {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  REGRESIÓN {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nSin regresiones respecto a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Coste por fila de serializar los listados de la API
+
+Compara, para páginas de canciones y conciertos construidas en memoria:
+  - fastapi: lo que hace FastAPI con response_model (validar Page[...],
+    convertir a tipos JSON y codificar con json.dumps)
+  - modelo: Page[...].model_validate(...).model_dump_json()
+  - rapido: app.serialization.dump_page (TypeAdapter de lista precompilado)
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.serialization [--rows 500] [--repeat 50]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from functools import cache
+
+from pydantic import TypeAdapter
+
+from app.models import Artist, Concert, ConcertStatus, Song
+from app.schemas import ConcertResponse, Page, SongResponse
+from app.serialization import dump_page
+
+
+def make_songs(n: int) -> list[Song]:
+    artists = [Artist(id=i, name=f"Artista {i}") for i in range(1, 51)]
+    return [
+        Song(
+            id=i,
+            title=f"Canción {i}",
+            artist_id=artists[i % 50].id,
+            artist=artists[i % 50],
+            duration_seconds=120 + i % 300,
+            explicit=bool(i % 2),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def make_concerts(n: int) -> list[Concert]:
+    artists = [Artist(id=i, name=f"Artista {i}", birth_date=datetime(1980, 1, 1)) for i in range(1, 51)]
+    return [
+        Concert(
+            id=i,
+            name=f"Concierto {i}",
+            price=25.5,
+            capacity=1000,
+            status=ConcertStatus.SCHEDULED,
+            is_sold_out=False,
+            date_time=datetime(2026, 6, 1, 21, 0),
+            img_url=None,
+            artist_id=artists[i % 50].id,
+            artist=artists[i % 50],
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+@cache
+def page_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(Page[schema])
+
+
+def fastapi_path(schema, rows, next_cursor):
+    adapter = page_adapter(schema)
+    value = adapter.validate_python({"items": rows, "next_cursor": next_cursor}, from_attributes=True)
+    return json.dumps(adapter.dump_python(value, mode="json"), ensure_ascii=False).encode()
+
+
+def model_path(schema, rows, next_cursor):
+    return Page[schema].model_validate(
+        {"items": rows, "next_cursor": next_cursor}, from_attributes=True
+    ).model_dump_json().encode()
+
+
+def fast_path(schema, rows, next_cursor):
+    return dump_page(schema, rows, next_cursor)
+
+
+def per_row_us(fn, schema, rows, repeat: int) -> float:
+    fn(schema, rows, "cursor")  # calentamiento (compilación de esquemas)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(schema, rows, "cursor")
+    return (time.perf_counter() - start) / (repeat * len(rows)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    cases = [
+        ("songs", SongResponse, make_songs(args.rows)),
+        ("concerts", ConcertResponse, make_concerts(args.rows)),
+    ]
+    paths = [("fastapi", fastapi_path), ("modelo", model_path), ("rapido", fast_path)]
+
+    for name, schema, rows in cases:
+        # las tres variantes deben producir el mismo JSON
+        outputs = {json.loads(fn(schema, rows, "cursor")).__repr__() for _, fn in paths}
+        assert len(outputs) == 1, f"{name}: las salidas no coinciden"
+
+        results = {label: per_row_us(fn, schema, rows, args.repeat) for label, fn in paths}
+        baseline = results["fastapi"]
+        print(f"{name} ({args.rows} filas por página)")
+        for label, value in results.items():
+            print(f"  {label:<8} {value:8.2f} µs/fila  x{baseline / value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Configuración común de las pruebas (python -m pytest desde la carpeta del proyecto)
+
+La configuración de la aplicación se lee de las variables de entorno al
+importar app.config, así que se fijan aquí, antes de importar la aplicación:
+  - una base de datos nueva en un directorio temporal
+  - QUERY_BUDGET=raise: una petición que supera el presupuesto de consultas de
+    su ruta, o que repite la misma sentencia (N+1), hace fallar la prueba
+  - sin cachés de respuestas, páginas ni totales, para que cada petición haga
+    todas sus consultas
+
+DB_ASYNC se respeta si viene del entorno: DB_ASYNC=0 python -m pytest prueba
+el modo de sesiones síncronas. Igual SQLITE_FOREIGN_KEYS: con
+SQLITE_FOREIGN_KEYS=1 python -m pytest se prueban las escrituras con la
+comprobación de claves foráneas activa.
+"""
+
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+DATA_DIR = Path(tempfile.mkdtemp(prefix="cancioncitas-tests-"))
+DB_PATH = DATA_DIR / "cancioncitas.db"
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DB_PATH}",
+    "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{DB_PATH}",
+    "DB_ECHO": "0",
+    "QUERY_BUDGET": "raise",
+    "RESPONSE_CACHE_ENABLED": "0",
+    "FRAGMENT_CACHE_ENABLED": "0",
+    "COUNT_CACHE_ENABLED": "0",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.commands.generate_catalogue import artist_rows, concert_rows, insert_batches, song_rows
+from app.database import create_schema, engine
+from app.main import app
+from app.models import Artist, Concert, Song
+
+# catálogo de las pruebas: páginas llenas en todos los listados y artistas
+# repetidos en cada página (lo que delata un N+1 por artista)
+SEED = 7
+ARTISTS = 40
+SONGS = 600
+CONCERTS = 600
+# rango de fechas de los conciertos y fecha que separa los pasados de los futuros
+CONCERT_DATES = (datetime(2020, 1, 1), datetime(2030, 1, 1), datetime(2026, 1, 1))
+
+
+@pytest.fixture(scope="session")
+def client():
+    with engine.connect() as connection:
+        create_schema(connection)
+        insert_batches(connection, Artist.__table__, artist_rows(SEED, ARTISTS), ARTISTS, 1000)
+        insert_batches(connection, Song.__table__, song_rows(SEED, SONGS, ARTISTS, 1.1), SONGS, 1000)
+        insert_batches(
+            connection, Concert.__table__,
+            concert_rows(SEED, CONCERTS, ARTISTS, 1.1, *CONCERT_DATES),
+            CONCERTS, 1000
+        )
+        # estadísticas para el planificador, como al generar el catálogo
+        connection.exec_driver_sql("ANALYZE")
+
+    # el arranque (lifespan) completa el esquema; con canciones no carga los datos por defecto
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,35 @@
+"""
+Borrado de artistas desde la web con y sin comprobación de claves foráneas
+(SQLITE_FOREIGN_KEYS)
+"""
+
+from app.config import settings
+
+
+def new_artist(client, name: str) -> str:
+    response = client.post("/artists/new", data={"name": name}, follow_redirects=False)
+    return response.headers["location"]
+
+
+def test_delete_artist_with_songs(client):
+    artist_url = new_artist(client, "Con canciones")
+    artist_id = int(artist_url.rsplit("/", 1)[1])
+    song_id = client.post("/api/songs", json={"title": "Referencia", "artist_id": artist_id}).json()["id"]
+
+    response = client.post(f"{artist_url}/delete", follow_redirects=False)
+    if settings.sqlite_foreign_keys:
+        # la clave foránea impide dejar la canción sin artista
+        assert response.status_code == 409
+        assert client.get(artist_url).status_code == 200
+    else:
+        # sin comprobar las claves foráneas el artista se borra y la canción
+        # queda huérfana (fuera de los listados, que la unen con su artista)
+        assert response.status_code == 303
+        assert client.get(artist_url).status_code == 404
+    assert client.delete(f"/api/songs/{song_id}").status_code == 204
+
+
+def test_delete_artist_without_songs(client):
+    artist_url = new_artist(client, "Sin canciones")
+    assert client.post(f"{artist_url}/delete", follow_redirects=False).status_code == 303
+    assert client.get(artist_url).status_code == 404
@@ -0,0 +1,102 @@
+"""
+Suite de benchmarks por endpoint (benchmarks.endpoints): cubre todas las
+rutas, sus escenarios funcionan y la comparación con la línea base
+"""
+
+import argparse
+
+import httpx
+import pytest
+
+from app.database import async_engine, engine
+from app.main import app
+from benchmarks.endpoints import Env, QueryCounter, app_routes, checked, compare, measure, percentile, scenarios, send
+from conftest import ARTISTS, CONCERTS, SONGS
+
+
+def test_every_route_has_a_scenario():
+    assert app_routes(app) - {scenario.route for scenario in scenarios()} == set()
+
+
+def run_scenarios(client, suite, run):
+    async def scenario_results():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+            env = Env(http, ARTISTS, SONGS, CONCERTS)
+            return [await run(env, scenario) for scenario in suite]
+
+    return client.portal.call(scenario_results)
+
+
+def test_scenarios_get_expected_status(client):
+    # una vez cada uno, con el presupuesto de consultas de las pruebas
+    async def run(env, scenario):
+        return (await checked(await send(env, await scenario.build(env, 0)), scenario.expect)).status_code
+
+    suite = scenarios()
+    assert run_scenarios(client, suite, run) == [scenario.expect for scenario in suite]
+
+
+def test_measure(client):
+    counter = QueryCounter()
+    counter.install(engine, async_engine.sync_engine)
+    args = argparse.Namespace(iterations=5, heavy_iterations=2, warmup=1, alloc_iterations=1)
+    suite = [scenario for scenario in scenarios() if scenario.name in ("GET /api/songs/{id}", "POST /api/songs")]
+
+    async def run(env, scenario):
+        return await measure(env, scenario, counter, args)
+
+    for scenario, result in zip(suite, run_scenarios(client, suite, run)):
+        assert result["route"] == scenario.route
+        assert result["samples"] == 5
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["queries"] >= 1
+        assert result["alloc_peak_kib"] > 0 and result["bytes"] > 0
+
+
+def test_percentile():
+    samples = [float(n) for n in range(100, 0, -1)]
+    assert [percentile(samples, p) for p in (50, 95, 99, 100)] == [50.0, 95.0, 99.0, 100.0]
+    assert percentile([7.0], 99) == 7.0
+
+
+def result(**endpoints) -> dict:
+    return {"meta": {"only": []}, "datasets": {"1k": {"endpoints": endpoints}}}
+
+
+def timing(p50: float, queries: int = 3, alloc: float | None = 100.0) -> dict:
+    return {"p50_ms": p50, "queries": queries, "alloc_peak_kib": alloc}
+
+
+def test_compare():
+    baseline = result(a=timing(10), b=timing(10), c=timing(10), d=timing(10), gone=timing(10))
+    current = result(
+        a=timing(10.5),            # ruido
+        b=timing(20, queries=4),   # más lenta y con más consultas
+        c=timing(10, alloc=400),   # más memoria
+        d=timing(4, queries=2),    # mejora
+    )
+    regressions, improvements = compare(current, baseline, tolerance=0.25)
+    assert regressions == [
+        "1k b: 3 -> 4 consultas",
+        "1k b: p50 10.00 -> 20.00 ms",
+        "1k c: memoria 100 -> 400 KiB",
+        "1k gone: ya no se mide",
+    ]
+    assert improvements == ["1k d: 3 -> 2 consultas", "1k d: p50 10.00 -> 4.00 ms"]
+
+
+def test_compare_subset():
+    baseline = result(a=timing(10), b=timing(10))
+    current = result(a=timing(10))
+    current["meta"]["only"] = ["a"]
+    # con --only no se echan de menos los demás escenarios, ni otros catálogos
+    assert compare(current, baseline, tolerance=0.25) == ([], [])
+    baseline["datasets"]["1m"] = baseline["datasets"]["1k"]
+    assert compare(current, baseline, tolerance=0.25) == ([], [])
+
+
+@pytest.mark.parametrize("min_delta_ms, slower", [(2.0, False), (0.1, True)])
+def test_compare_min_delta(min_delta_ms, slower):
+    regressions, _ = compare(result(a=timing(1.8)), result(a=timing(1)), 0.25, min_delta_ms)
+    assert bool(regressions) == slower
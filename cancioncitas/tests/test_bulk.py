@@ -0,0 +1,100 @@
+"""
+Operaciones masivas de la API: carga de canciones en bloque (array JSON o
+NDJSON) y PATCH/DELETE por filtros de canciones y conciertos
+"""
+
+import json
+
+import pytest
+
+from app.routers.api.songs import BULK_BATCH_SIZE
+
+
+def test_bulk_ndjson(client):
+    lines = [
+        json.dumps({"title": "NDJSON 1", "artist_id": 1}),
+        "",
+        "{no es json",
+        json.dumps({"title": "NDJSON 2", "artist_id": 2, "explicit": False}),
+    ]
+    response = client.post(
+        "/api/songs/bulk", content="\n".join(lines), headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 201
+    body = response.json()
+    # las líneas vacías no cuentan en index
+    assert [song["index"] for song in body["songs"]] == [0, 2]
+    assert body["errors"] == [{"index": 1, "errors": [{"type": "json_invalid", "msg": "Línea NDJSON no válida"}]}]
+
+
+def test_bulk_several_batches(client):
+    songs = [{"title": f"Bloque {i}", "artist_id": 1 + i % 5} for i in range(BULK_BATCH_SIZE * 2 + 3)]
+    body = client.post("/api/songs/bulk", json=songs).json()
+    assert body["created"] == len(songs)
+    assert [song["index"] for song in body["songs"]] == list(range(len(songs)))
+
+    last = body["songs"][-1]
+    assert client.get(f"/api/songs/{last['id']}").json()["title"] == songs[last["index"]]["title"]
+
+
+@pytest.mark.parametrize("content, detail", [
+    ("[{", "El cuerpo de la petición no es JSON/NDJSON válido"),
+    ('{"title": "Sola", "artist_id": 1}', "Se esperaba un array de canciones"),
+])
+def test_bulk_invalid_body(client, content, detail):
+    response = client.post("/api/songs/bulk", content=content, headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+
+def test_bulk_nothing_valid(client):
+    body = client.post("/api/songs/bulk", json=[{"title": " ", "artist_id": 1}]).json()
+    assert (body["created"], body["songs"]) == (0, [])
+    assert body["errors"][0]["index"] == 0
+
+
+def new_artist_with_songs(client, count: int) -> tuple[int, list[int]]:
+    location = client.post("/artists/new", data={"name": "Masivo"}, follow_redirects=False).headers["location"]
+    artist_id = int(location.rsplit("/", 1)[1])
+    songs = [{"title": f"Masiva {i}", "artist_id": artist_id, "duration_seconds": 100 + i} for i in range(count)]
+    body = client.post("/api/songs/bulk", json=songs).json()
+    return artist_id, [song["id"] for song in body["songs"]]
+
+
+def test_bulk_patch_songs(client):
+    artist_id, ids = new_artist_with_songs(client, 5)
+    response = client.patch(f"/api/songs?artist_id={artist_id}&min_duration=102", json={"explicit": True})
+    assert response.json() == {"affected": 3}
+    assert [client.get(f"/api/songs/{id}").json()["explicit"] for id in ids] == [None, None, True, True, True]
+
+
+def test_bulk_delete_songs(client):
+    artist_id, ids = new_artist_with_songs(client, 4)
+    response = client.delete(f"/api/songs?artist_id={artist_id}&max_duration=101")
+    assert response.json() == {"affected": 2}
+    assert [client.get(f"/api/songs/{id}").status_code for id in ids] == [404, 404, 200, 200]
+
+
+def test_bulk_concerts(client):
+    artist_id, _ = new_artist_with_songs(client, 0)
+    concert = {"name": "Masivo", "price": 10.0, "date_time": "2028-01-01T20:00:00", "artist_id": artist_id}
+    ids = [client.post("/api/concerts", json=concert).json()["id"] for _ in range(3)]
+
+    assert client.patch(f"/api/concerts?artist_id={artist_id}", json={"status": "cancelled"}).json() == {"affected": 3}
+    assert {client.get(f"/api/concerts/{id}").json()["status"] for id in ids} == {"cancelled"}
+    assert client.delete(f"/api/concerts?artist_id={artist_id}&status=cancelled").json() == {"affected": 3}
+    assert client.get(f"/api/concerts/{ids[0]}").status_code == 404
+
+
+@pytest.mark.parametrize("method, url", [
+    ("PATCH", "/api/songs"), ("DELETE", "/api/songs"), ("PATCH", "/api/concerts"), ("DELETE", "/api/concerts"),
+])
+def test_bulk_write_needs_a_filter(client, method, url):
+    response = client.request(method, url, json={"price": 1.0} if "concerts" in url else {"explicit": True})
+    assert response.status_code == 400
+
+
+def test_bulk_patch_needs_a_field(client):
+    response = client.patch("/api/songs?artist_id=1", json={})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No se ha indicado ningún campo a actualizar"
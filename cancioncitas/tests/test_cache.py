@@ -0,0 +1,64 @@
+"""
+Claves e invalidación de las cachés de respuestas y páginas (app.cache)
+"""
+
+from starlette.requests import Request
+
+from app.cache import ARTISTS, CONCERTS, SONGS, ResponseCache, cache_key
+
+
+def request(query_string: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/songs", "query_string": query_string.encode(), "headers": []})
+
+
+def test_parameter_order_shares_key():
+    assert cache_key(request("artist=X&explicit=true")) == cache_key(request("explicit=true&artist=X"))
+
+
+def test_encoded_separators_do_not_collide():
+    assert cache_key(request("artist=X&explicit=true")) != cache_key(request("artist=X%26explicit%3Dtrue"))
+
+
+def test_repeated_parameters():
+    assert cache_key(request("a=1&a=2")) != cache_key(request("a=1%26a%3D2"))
+    assert cache_key(request("a=2&a=1")) == cache_key(request("a=1&a=2"))
+
+
+def filled_cache() -> ResponseCache:
+    cache = ResponseCache(max_entries=100, ttl_seconds=60)
+    for namespace in (SONGS, CONCERTS, ARTISTS):
+        cache.set(namespace, "/", namespace.encode(), cache.generation(namespace))
+    return cache
+
+
+def test_invalidate_hides_namespace_entries():
+    cache = filled_cache()
+    cache.invalidate(SONGS)
+    assert cache.get(SONGS, "/") is None
+    assert cache.get(CONCERTS, "/") == b"concerts"
+
+
+def test_invalidate_dependent_namespaces():
+    cache = filled_cache()
+    cache.invalidate(ARTISTS)
+    assert [cache.get(namespace, "/") for namespace in (SONGS, CONCERTS, ARTISTS)] == [None, None, None]
+
+
+def test_invalidate_does_not_scan_entries():
+    cache = filled_cache()
+    cache.invalidate(SONGS)
+    # la entrada antigua sigue ocupando sitio hasta que se lee o la expulsa el LRU
+    assert cache.stats()["entries"] == 3
+    assert cache.get(SONGS, "/") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_read_started_before_invalidation_is_not_stored():
+    cache = ResponseCache(max_entries=100, ttl_seconds=60)
+    generation = cache.generation(SONGS)
+    cache.invalidate(SONGS)
+    cache.set(SONGS, "/", b"antigua", generation)
+    assert cache.get(SONGS, "/") is None
+
+    cache.set(SONGS, "/", b"nueva", cache.generation(SONGS))
+    assert cache.get(SONGS, "/") == b"nueva"
@@ -0,0 +1,71 @@
+"""
+API de conciertos: artistas inexistentes, valores nulos y conciertos huérfanos
+"""
+
+import sqlite3
+
+import pytest
+
+from app.pagination import encode_cursor
+from conftest import DB_PATH
+
+UNKNOWN_ARTIST = 999_999
+
+
+def concert_body(artist_id: int) -> dict:
+    return {"name": "Concierto de prueba", "price": 20.0, "date_time": "2027-05-01T21:00:00", "artist_id": artist_id}
+
+
+def new_concert(client) -> int:
+    return client.post("/api/concerts", json=concert_body(1)).json()["id"]
+
+
+@pytest.mark.parametrize("method, url, body", [
+    ("POST", "/api/concerts", concert_body(UNKNOWN_ARTIST)),
+    ("PATCH", "/api/concerts/{id}", {"artist_id": UNKNOWN_ARTIST}),
+    ("PATCH", "/api/concerts?artist_id=1", {"artist_id": UNKNOWN_ARTIST}),
+])
+def test_unknown_artist(client, method, url, body):
+    response = client.request(method, url.format(id=new_concert(client)), json=body)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "El artista indicado no existe"
+
+
+@pytest.mark.parametrize("url", ["/api/concerts/{id}", "/api/concerts?artist_id=1"])
+@pytest.mark.parametrize("field", ["name", "price", "status", "date_time", "artist_id"])
+def test_patch_null_not_nullable_field(client, url, field):
+    response = client.patch(url.format(id=new_concert(client)), json={field: None})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", field]
+
+
+def test_patch_unknown_concert(client):
+    assert client.patch("/api/concerts/999999", json={"price": 10.0}).status_code == 404
+
+
+@pytest.fixture
+def orphan_concert(client):
+    """
+    Concierto con un artista que no existe, insertado sin comprobar las claves
+    foráneas (como con SQLITE_FOREIGN_KEYS=0).
+    """
+    with sqlite3.connect(DB_PATH) as connection:
+        concert_id = connection.execute(
+            "INSERT INTO concerts (name, price, status, is_sold_out, date_time, artist_id) "
+            "VALUES ('Huérfano', 10, 'SCHEDULED', 0, '2027-01-01 21:00:00', ?) RETURNING id",
+            (UNKNOWN_ARTIST,)
+        ).fetchone()[0]
+    yield concert_id
+    with sqlite3.connect(DB_PATH) as connection:
+        connection.execute("DELETE FROM concerts WHERE id = ?", (concert_id,))
+
+
+def test_orphan_concert_reads(client, orphan_concert):
+    assert client.get(f"/api/concerts/{orphan_concert}").status_code == 404
+
+    page = client.get(f"/api/concerts?after={encode_cursor([orphan_concert - 1])}").json()
+    assert orphan_concert not in [concert["id"] for concert in page["items"]]
+
+    exported = client.get("/api/concerts/export")
+    assert exported.status_code == 200
+    assert f'"id":{orphan_concert},' not in exported.text
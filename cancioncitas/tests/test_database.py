@@ -0,0 +1,119 @@
+"""
+Perfil del motor, sesiones, creación del esquema y datos por defecto
+(app.database)
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import ThreadedSession, async_engine, create_schema, engine, seed_defaults, session_scope
+from app.models import Artist, Concert, Song
+
+PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": 1,  # NORMAL
+    "busy_timeout": settings.sqlite_busy_timeout_ms,
+    "mmap_size": settings.sqlite_mmap_size,
+    "cache_size": -settings.sqlite_cache_size_kb,
+    "foreign_keys": int(settings.sqlite_foreign_keys),
+}
+
+DEFAULT_ARTISTS = [
+    "ABBA", "Amaral", "Ludwig van Beethoven", "Joan Manuel Serrat", "Darren Korb", "Michael Jackson", "Nirvana"
+]
+
+
+def test_seed_defaults(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    with engine.begin() as connection:
+        create_schema(connection)
+        seed_defaults(connection)
+        # una segunda llamada no repite los datos
+        seed_defaults(connection)
+
+        assert connection.scalars(select(Artist.name).order_by(Artist.id)).all() == DEFAULT_ARTISTS
+        songs = connection.execute(
+            select(Song.title, Artist.name).join(Artist, Song.artist_id == Artist.id).order_by(Song.id)
+        ).all()
+        assert len(songs) == 7
+        assert songs[0] == ("Mamma Mia", "ABBA")
+        assert songs[-1] == ("Smells Like Teen Spirit", "Nirvana")
+        assert connection.scalar(select(func.count()).select_from(Concert)) == 0
+    engine.dispose()
+
+
+@pytest.mark.parametrize("db_async, session_type", [(True, AsyncSession), (False, ThreadedSession)])
+def test_session_scope(client, monkeypatch, db_async, session_type):
+    monkeypatch.setattr(settings, "db_async", db_async)
+
+    async def read():
+        async with session_scope() as db:
+            assert isinstance(db, session_type)
+            count = await db.scalar(select(func.count()).select_from(Artist))
+            names = await db.scalars(select(Artist.name).order_by(Artist.id).limit(3))
+            result = await db.stream(select(Artist.id).order_by(Artist.id).execution_options(yield_per=2))
+            batches = [batch async for batch in result.partitions()]
+            return count, names.all(), batches
+
+    count, names, batches = client.portal.call(read)
+    assert count >= 3 and len(names) == 3
+    assert [len(batch) for batch in batches[:-1]] == [2] * (len(batches) - 1)
+    assert sum(map(len, batches)) == count
+
+
+@pytest.mark.parametrize("db_async", [True, False])
+def test_session_rollback(client, monkeypatch, db_async):
+    monkeypatch.setattr(settings, "db_async", db_async)
+
+    async def write_and_rollback():
+        async with session_scope() as db:
+            await db.execute(insert(Artist).values(name="Deshecho"))
+            await db.rollback()
+            return await db.scalar(select(func.count()).select_from(Artist).where(Artist.name == "Deshecho"))
+
+    assert client.portal.call(write_and_rollback) == 0
+
+
+def pragma_values(connection) -> dict:
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in PRAGMAS}
+
+
+def test_pragmas_sync_engine(client):
+    with engine.connect() as connection:
+        assert pragma_values(connection) == PRAGMAS
+
+
+def test_pragmas_async_engine(client):
+    async def values():
+        async with async_engine.connect() as connection:
+            return await connection.run_sync(pragma_values)
+
+    assert client.portal.call(values) == PRAGMAS
+
+
+def test_pool_sizing():
+    for pool in (engine.pool, async_engine.sync_engine.pool):
+        assert (pool.size(), pool._max_overflow, pool._timeout) == (
+            settings.db_pool_size, settings.db_max_overflow, settings.db_pool_timeout
+        )
+
+
+@pytest.mark.parametrize("env, echo", [
+    ({"APP_ENV": "production"}, "False"),
+    ({"APP_ENV": "development"}, "True"),
+    ({"APP_ENV": "production", "DB_ECHO": "1"}, "True"),
+])
+def test_echo_profile(env, echo):
+    environment = {key: value for key, value in os.environ.items() if key not in ("APP_ENV", "DB_ECHO")}
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.config import settings; print(settings.db_echo)"],
+        cwd=Path(__file__).parent.parent, env=environment | env, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == echo
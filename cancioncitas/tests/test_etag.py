@@ -0,0 +1,63 @@
+"""
+ETags: huella del despliegue y GET condicionales (app.etag)
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import app
+from app.etag import DEPLOYMENT_FINGERPRINT
+
+PRINT_FINGERPRINT = "from app.etag import DEPLOYMENT_FINGERPRINT; print(DEPLOYMENT_FINGERPRINT)"
+
+
+def fingerprint_of(project: Path) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", PRINT_FINGERPRINT], cwd=project, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def copy_app(target: Path) -> Path:
+    # copia sin conservar las fechas, como un checkout nuevo
+    shutil.copytree(
+        Path(app.__file__).parent, target / "app",
+        copy_function=shutil.copy, ignore=shutil.ignore_patterns("__pycache__")
+    )
+    return target / "app"
+
+
+def test_copy_of_the_same_code_keeps_fingerprint(tmp_path):
+    copy_app(tmp_path)
+    assert fingerprint_of(tmp_path) == DEPLOYMENT_FINGERPRINT
+
+
+def test_changed_template_changes_fingerprint(tmp_path):
+    copied = copy_app(tmp_path)
+    with (copied / "templates" / "home.html").open("a") as template:
+        template.write("\n")
+    assert fingerprint_of(tmp_path) != DEPLOYMENT_FINGERPRINT
+
+
+@pytest.mark.parametrize("url", ["/api/songs/{id}", "/api/concerts/{id}", "/songs/{id}", "/artists/{id}"])
+def test_not_modified_only_for_existing_resource(client, url):
+    response = client.get(url.format(id=1))
+    etag = response.headers["etag"]
+
+    for tag in (etag, "*"):
+        cached = client.get(url.format(id=1), headers={"If-None-Match": tag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.content == b""
+        # misma versión de la tabla, pero el recurso no existe
+        assert client.get(url.format(id=999_999), headers={"If-None-Match": tag}).status_code == 404
+
+
+def test_not_modified_list(client):
+    etag = client.get("/api/songs").headers["etag"]
+    assert client.get("/api/songs", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/songs", headers={"If-None-Match": '"otro"'}).status_code == 200
@@ -0,0 +1,47 @@
+"""
+Exportación NDJSON de canciones, artistas y conciertos (app.export)
+"""
+
+import json
+
+import pytest
+
+from app import export
+from app.models import Song
+from app.queries.songs import song_rows
+from app.schemas import SongResponse
+from conftest import ARTISTS, CONCERTS, SONGS
+
+
+@pytest.mark.parametrize("entity, rows", [("songs", SONGS), ("artists", ARTISTS), ("concerts", CONCERTS)])
+def test_export_every_row(client, entity, rows):
+    response = client.get(f"/api/{entity}/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == f'attachment; filename="{entity}.ndjson"'
+
+    items = [json.loads(line) for line in response.text.splitlines()]
+    ids = [item["id"] for item in items]
+    # en orden de id, sin repetidos (otras pruebas añaden filas)
+    assert ids == sorted(set(ids))
+    assert len(ids) >= rows
+
+
+@pytest.mark.parametrize("entity", ["songs", "concerts"])
+def test_export_matches_api(client, entity):
+    first = json.loads(client.get(f"/api/{entity}/export").text.splitlines()[0])
+    assert first == client.get(f"/api/{entity}/{first['id']}").json()
+
+
+def test_export_in_batches(client, monkeypatch):
+    # un trozo de la respuesta por lote del cursor, con el mismo resultado
+    whole = client.get("/api/songs/export").content
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 7)
+
+    async def chunks():
+        stmt = song_rows().order_by(Song.id)
+        return [chunk async for chunk in export.iter_ndjson(stmt, SongResponse)]
+
+    chunks = client.portal.call(chunks)
+    assert b"".join(chunks) == whole
+    assert all(chunk.count(b"\n") == 7 for chunk in chunks[:-1])
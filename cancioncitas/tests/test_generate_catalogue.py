@@ -0,0 +1,109 @@
+"""
+Generador del catálogo sintético (app.commands.generate_catalogue):
+reproducible con --seed y con el esquema completo al terminar
+"""
+
+import collections
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.commands.generate_catalogue import artist_rows, concert_rows, song_rows
+from app.database import create_schema
+from app.models import ConcertStatus
+
+PROJECT = Path(__file__).parent.parent
+DATES = (datetime(2020, 1, 1), datetime(2030, 1, 1), datetime(2026, 1, 1))
+
+
+def test_same_seed_same_catalogue():
+    assert list(artist_rows(3, 50)) == list(artist_rows(3, 50))
+    assert list(song_rows(3, 200, 50, 1.1)) == list(song_rows(3, 200, 50, 1.1))
+    assert list(concert_rows(3, 200, 50, 1.1, *DATES)) == list(concert_rows(3, 200, 50, 1.1, *DATES))
+    assert list(song_rows(3, 200, 50, 1.1)) != list(song_rows(4, 200, 50, 1.1))
+
+
+def test_tables_are_independent():
+    # cada tabla tiene su generador: más filas no cambian las primeras
+    assert list(song_rows(3, 500, 50, 1.1))[:200] == list(song_rows(3, 200, 50, 1.1))
+    assert list(concert_rows(3, 500, 50, 1.1, *DATES))[:200] == list(concert_rows(3, 200, 50, 1.1, *DATES))
+
+
+def test_songs_per_artist_follow_zipf():
+    counts = collections.Counter(song["artist_id"] for song in song_rows(3, 5000, 100, 1.1))
+    ranked = [count for _, count in counts.most_common()]
+    assert all(1 <= artist_id <= 100 for artist_id in counts)
+    # el artista más prolífico tiene muchas más canciones que la mediana
+    assert ranked[0] > 10 * ranked[len(ranked) // 2]
+
+
+def test_concert_status_by_date():
+    today = DATES[2]
+    for concert in concert_rows(3, 1000, 50, 1.1, *DATES):
+        assert DATES[0] <= concert["date_time"] < DATES[1]
+        if concert["date_time"] < today:
+            assert concert["status"] in (ConcertStatus.COMPLETED, ConcertStatus.CANCELLED)
+        else:
+            assert concert["status"] in (ConcertStatus.SCHEDULED, ConcertStatus.CANCELLED)
+        if concert["status"] == ConcertStatus.CANCELLED:
+            assert not concert["is_sold_out"]
+
+
+def generate(database: Path, *args: str) -> subprocess.CompletedProcess:
+    environment = os.environ | {
+        "DATABASE_URL": f"sqlite:///{database}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+    }
+    return subprocess.run(
+        [sys.executable, "-m", "app.commands.generate_catalogue", "--artists", "30", "--songs", "300",
+         "--concerts", "200", "--batch-size", "64", *args],
+        cwd=PROJECT, env=environment, capture_output=True, text=True
+    )
+
+
+def schema_objects(connection) -> list[tuple]:
+    return connection.exec_driver_sql(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('index', 'trigger') ORDER BY type, name"
+    ).all()
+
+
+def test_command(tmp_path):
+    database = tmp_path / "catalogue.db"
+    assert generate(database, "--seed", "5").returncode == 0
+
+    engine = create_engine(f"sqlite:///{database}")
+    with engine.connect() as connection:
+        counts = [connection.exec_driver_sql(f"SELECT count(*) FROM {name}").scalar()
+                  for name in ("artists", "songs", "concerts")]
+        assert counts == [30, 300, 200]
+        titles = connection.exec_driver_sql("SELECT title FROM songs ORDER BY id").scalars().all()
+        assert titles == [song["title"] for song in song_rows(5, 300, 30, 1.1)]
+
+        # triggers e índices como en un esquema recién creado
+        fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+        with fresh.begin() as fresh_connection:
+            create_schema(fresh_connection)
+            assert schema_objects(connection) == schema_objects(fresh_connection)
+        fresh.dispose()
+
+        # búsqueda y resúmenes reconstruidos con las filas cargadas
+        indexed = connection.exec_driver_sql("SELECT count(*) FROM search_index WHERE kind = 'song'").scalar()
+        assert indexed == 300
+        summarized = connection.exec_driver_sql("SELECT sum(song_count) FROM artist_song_stats").scalar()
+        assert summarized == 300
+    engine.dispose()
+
+    # sin --reset no se mezcla con el catálogo existente
+    refused = generate(database, "--seed", "6")
+    assert refused.returncode != 0
+    assert "--reset" in refused.stderr
+
+    assert generate(database, "--seed", "6", "--reset").returncode == 0
+    with engine.connect() as connection:
+        titles = connection.exec_driver_sql("SELECT title FROM songs ORDER BY id").scalars().all()
+    engine.dispose()
+    assert titles == [song["title"] for song in song_rows(6, 300, 30, 1.1)]
@@ -0,0 +1,53 @@
+"""
+Enteros fuera del rango de INTEGER de SQLite (64 bits con signo): 422 en la
+API, filtro ignorado o error de formulario en la web, nunca un 500
+"""
+
+import re
+
+import pytest
+
+HUGE = 2**70
+
+
+@pytest.mark.parametrize("method, url, body", [
+    ("GET", f"/api/songs/{HUGE}", None),
+    ("GET", f"/api/songs?artist_id={HUGE}", None),
+    ("GET", f"/api/songs?min_duration={HUGE}", None),
+    ("GET", f"/api/songs?max_duration={HUGE}", None),
+    ("DELETE", f"/api/songs?artist_id={HUGE}", None),
+    ("POST", "/api/songs", {"title": "Enorme", "artist_id": HUGE}),
+    ("POST", "/api/songs", {"title": "Enorme", "artist_id": 1, "duration_seconds": HUGE}),
+    ("PATCH", "/api/songs/1", {"artist_id": HUGE}),
+    ("GET", f"/api/concerts/{HUGE}", None),
+    ("DELETE", f"/api/concerts?artist_id={HUGE}", None),
+    ("PATCH", "/api/concerts/1", {"capacity": HUGE}),
+    ("GET", f"/api/stats/concerts/monthly?artist_id={HUGE}", None),
+])
+def test_api_rejects_huge_int(client, method, url, body):
+    assert client.request(method, url, json=body).status_code == 422
+
+
+@pytest.mark.parametrize("query", [f"artist_id={HUGE}", f"min_duration={HUGE}", f"max_duration=-{HUGE}"])
+def test_web_filter_ignores_huge_int(client, query):
+    def song_ids(url):
+        response = client.get(url)
+        assert response.status_code == 200
+        return re.findall(r'href="/songs/(\d+)"', response.text)
+
+    assert song_ids(f"/songs?{query}") == song_ids("/songs")
+
+
+@pytest.mark.parametrize("form, error", [
+    ({"title": "Enorme", "artist_id": str(HUGE)}, "El artista no es válido"),
+    ({"title": "Enorme", "artist_id": "1", "duration_seconds": str(HUGE)}, "La duración debe ser un número válido"),
+])
+def test_web_form_rejects_huge_int(client, form, error):
+    response = client.post("/songs/new", data=form)
+    assert response.status_code == 200
+    assert error in response.text
+
+
+@pytest.mark.parametrize("url", [f"/songs/{HUGE}", f"/artists/{HUGE}", f"/songs?page={HUGE}"])
+def test_web_huge_path_or_page(client, url):
+    assert client.get(url).status_code < 500
@@ -0,0 +1,139 @@
+"""
+Métricas de las peticiones: cabecera Server-Timing, trailer de los listados
+web en streaming y /metrics
+"""
+
+import re
+
+import anyio
+import pytest
+
+from app.config import settings
+from app.main import app
+from app.metrics import LATENCY_BUCKETS, merge_server_timing
+
+
+def timing_parts(header: str) -> dict:
+    return {part.split(";")[0]: float(re.search(r"dur=([\d.]+)", part).group(1)) for part in header.split(", ")}
+
+
+def metric(text: str, name: str, labels: str) -> float:
+    value = re.search(rf"^{name}\{{{re.escape(labels)}\}} ([\d.]+)$", text, re.M)
+    return float(value.group(1)) if value else 0.0
+
+
+def test_server_timing_header(client):
+    response = client.get("/api/songs/1")
+    header = response.headers["server-timing"]
+    assert re.search(r'db;dur=[\d.]+;desc="\d+ consultas?"', header)
+    parts = timing_parts(header)
+    assert set(parts) == {"db", "tpl", "app"}
+    assert 0 < parts["db"] <= parts["app"]
+    assert parts["tpl"] == 0
+
+
+def test_server_timing_counts_template(client, monkeypatch):
+    monkeypatch.setattr(settings, "web_stream_lists", False)
+    parts = timing_parts(client.get("/songs?size=25").headers["server-timing"])
+    assert parts["tpl"] > 0
+    assert parts["db"] + parts["tpl"] <= parts["app"]
+
+
+def test_server_timing_disabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "server_timing_enabled", False)
+    assert "server-timing" not in client.get("/api/songs/1").headers
+
+
+def test_merge_server_timing():
+    headers = merge_server_timing([(b"server-timing", b"cache;desc=HIT")], "app;dur=1.000")
+    assert headers == [(b"server-timing", b"cache;desc=HIT, app;dur=1.000")]
+    assert merge_server_timing([], "app;dur=1.000") == [(b"server-timing", b"app;dur=1.000")]
+
+
+def test_metrics_by_route_template(client):
+    route = 'method="GET",route="/api/songs/{id}"'
+    before = client.get("/metrics").text
+    response = client.get("/api/songs/2")
+    client.get("/api/songs/3")
+    client.get("/no-existe")
+    after = client.get("/metrics").text
+
+    # una serie por plantilla de ruta, no por url
+    requests = [metric(text, "cancioncitas_requests_total", f'{route},status="200"') for text in (before, after)]
+    assert requests[1] - requests[0] == 2
+    assert "/api/songs/2" not in after
+    assert 'route="unmatched",status="404"' in after
+
+    queries = int(re.search(r'desc="(\d+) consulta', response.headers["server-timing"]).group(1))
+    counted = [metric(text, "cancioncitas_db_queries_total", route) for text in (before, after)]
+    assert counted[1] - counted[0] == 2 * queries
+
+
+@pytest.mark.parametrize("name", ["cancioncitas_request_duration_seconds", "cancioncitas_request_db_duration_seconds"])
+def test_metrics_histogram(client, name):
+    client.get("/api/songs/1")
+    text = client.get("/metrics").text
+    route = 'method="GET",route="/api/songs/{id}"'
+    buckets = [int(value) for value in re.findall(rf'^{name}_bucket\{{{re.escape(route)},le="[^"]+"\}} (\d+)$', text, re.M)]
+    count = int(re.search(rf'^{name}_count\{{{re.escape(route)}\}} (\d+)$', text, re.M).group(1))
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets == sorted(buckets) and buckets[-1] == count > 0
+
+
+def asgi_get(client, path: str, query: str, extensions: dict) -> list[dict]:
+    """
+    Petición GET directa a la aplicación (en el bucle de eventos del cliente)
+    con las extensiones ASGI indicadas; devuelve los mensajes enviados.
+    """
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # el cliente sigue conectado hasta que termina la respuesta
+        await anyio.sleep_forever()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"testserver")], "client": ("testclient", 50000),
+        "server": ("testserver", 80), "extensions": extensions,
+    }
+    client.portal.call(app, scope, receive, send)
+    return messages
+
+
+def test_streamed_page_sends_timing_trailer(client):
+    messages = asgi_get(client, "/songs", "size=25", {"http.response.trailers": {}})
+
+    start, trailers = messages[0], messages[-1]
+    assert start["trailers"] is True
+    assert (b"trailer", b"Server-Timing") in start["headers"]
+    assert trailers["type"] == "http.response.trailers"
+    timing = dict(trailers["headers"])[b"server-timing"].decode()
+    assert float(re.search(r"tpl;dur=([\d.]+)", timing).group(1)) > 0
+
+
+def test_no_trailer_without_server_support(client):
+    messages = asgi_get(client, "/songs", "size=25", {})
+    assert not messages[0].get("trailers")
+    assert all(message["type"] != "http.response.trailers" for message in messages)
+
+
+def test_no_trailer_with_content_length(client):
+    messages = asgi_get(client, "/api/songs/1", "", {"http.response.trailers": {}})
+    assert not messages[0].get("trailers")
+    assert messages[-1]["type"] == "http.response.body"
+
+
+def test_streamed_page_render_time_in_metrics(client):
+    client.get("/songs?size=25")
+    count = re.search(
+        r'cancioncitas_request_template_duration_seconds_count\{method="GET",route="/songs"\} (\d+)',
+        client.get("/metrics").text
+    )
+    assert count and int(count.group(1)) > 0
@@ -0,0 +1,66 @@
+"""
+Paginación por cursor de GET /api/songs y GET /api/concerts
+"""
+
+import base64
+import json
+
+import pytest
+
+from conftest import CONCERTS, SONGS
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def all_pages(client, url: str, limit: int) -> list[dict]:
+    items, after = [], None
+    while True:
+        page = client.get(url, params={"limit": limit} | ({"after": after} if after else {})).json()
+        items += page["items"]
+        if not (after := page["next_cursor"]):
+            return items
+
+
+@pytest.mark.parametrize("url, rows", [("/api/songs", SONGS), ("/api/concerts", CONCERTS)])
+def test_pages_cover_every_row_once(client, url, rows):
+    ids = [item["id"] for item in all_pages(client, url, 97)]
+    # en orden de id, sin repetidos (otras pruebas añaden filas)
+    assert ids == sorted(set(ids))
+    assert len(ids) >= rows
+
+
+def test_last_page_has_no_cursor(client):
+    page = client.get("/api/concerts", params={"limit": 500, "after": raw_cursor([10**9])}).json()
+    assert page == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.parametrize("url", ["/api/songs?sort=id", "/api/songs?sort=title", "/api/songs?sort=-duration", "/api/concerts?"])
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    raw_cursor({"id": 1}),
+    raw_cursor([]),
+    raw_cursor([1, 2, 3]),
+    raw_cursor([[1]]),
+    raw_cursor([{"a": 1}]),
+    raw_cursor([[1], 2]),
+    raw_cursor([{"a": 1}, 2]),
+    raw_cursor([True, 1]),
+    raw_cursor([2**70, 1]),
+    raw_cursor([1, 2**70]),
+])
+def test_malformed_cursor(client, url, cursor):
+    response = client.get(f"{url}&after={cursor}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "El cursor de paginación no es válido"
+
+
+@pytest.mark.parametrize("url, cursor", [
+    ("/api/songs?sort=id", [1]),
+    ("/api/songs?sort=title", ["Amor", 1]),
+    ("/api/songs?sort=duration", [200, 1]),
+    ("/api/songs?sort=artist", ["Artista", 1, 1]),
+])
+def test_valid_cursor(client, url, cursor):
+    assert client.get(f"{url}&after={raw_cursor(cursor)}").status_code == 200
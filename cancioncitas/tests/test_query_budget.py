@@ -0,0 +1,219 @@
+"""
+Presupuesto de consultas de cada ruta (app.query_budget)
+
+Con QUERY_BUDGET=raise (ver conftest.py) cada petición que supera el
+presupuesto declarado en su ruta, o que repite la misma sentencia con la forma
+de un N+1, termina con QueryBudgetExceeded y la prueba falla. Los listados se
+piden con la página más grande para que un N+1 por fila o por artista se note.
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Concert
+from app.pagination import MAX_LIMIT, WEB_PAGE_SIZES
+from app.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, query_budget
+from app.schemas import ConcertResponse
+
+LIST_SIZE = max(WEB_PAGE_SIZES)
+
+
+def new_artist(client) -> int:
+    response = client.post("/artists/new", data={"name": "Artista de prueba"}, follow_redirects=False)
+    return int(response.headers["location"].rsplit("/", 1)[1])
+
+
+def new_song(client, artist_id: int = 1) -> int:
+    return client.post("/api/songs", json={"title": "Canción de prueba", "artist_id": artist_id}).json()["id"]
+
+
+def new_concert(client, artist_id: int = 1) -> int:
+    return client.post("/api/concerts", json=concert_body(artist_id)).json()["id"]
+
+
+def concert_body(artist_id: int) -> dict:
+    return {"name": "Concierto de prueba", "price": 20.0, "date_time": "2027-05-01T21:00:00", "artist_id": artist_id}
+
+
+def song_form(artist_id: int = 1) -> dict:
+    return {"title": "Canción de prueba", "artist_id": str(artist_id), "duration_seconds": "200", "explicit": "false"}
+
+
+# ruta -> petición (método, url y argumentos de TestClient.request)
+# las funciones reciben el cliente y crean antes lo que la petición necesite
+CALLS = {
+    "GET /api/songs": [
+        lambda c: ("GET", f"/api/songs?limit={MAX_LIMIT}", {}),
+        lambda c: ("GET", f"/api/songs?limit={MAX_LIMIT}&sort=artist", {}),
+        lambda c: ("GET", "/api/songs?explicit=true&min_duration=100&sort=-duration", {}),
+        lambda c: ("GET", "/api/songs?artist_id=1&sort=title", {}),
+        lambda c: ("GET", f"/api/songs?limit={MAX_LIMIT}&max_duration=300", {}),
+        lambda c: ("GET", "/api/songs", {"params": {"artist": c.get("/api/songs/1").json()["artist"], "sort": "-title"}}),
+    ],
+    "GET /api/songs/export": [lambda c: ("GET", "/api/songs/export", {})],
+    "GET /api/songs/{id}": [lambda c: ("GET", "/api/songs/1", {})],
+    "POST /api/songs": [lambda c: ("POST", "/api/songs", {"json": {"title": "Nueva", "artist_id": 2}})],
+    "POST /api/songs/bulk": [
+        lambda c: ("POST", "/api/songs/bulk", {"json": [{"title": f"Lote {i}", "artist_id": 1 + i % 30} for i in range(2500)]}),
+    ],
+    "PUT /api/songs/{id}": [
+        lambda c: ("PUT", f"/api/songs/{new_song(c)}", {"json": {"title": "Otra", "artist_id": 3, "duration_seconds": 90, "explicit": None}}),
+    ],
+    "PATCH /api/songs": [lambda c: ("PATCH", f"/api/songs?artist_id={new_artist(c)}", {"json": {"explicit": True}})],
+    "PATCH /api/songs/{id}": [lambda c: ("PATCH", f"/api/songs/{new_song(c)}", {"json": {"duration_seconds": 120}})],
+    "DELETE /api/songs": [lambda c: ("DELETE", f"/api/songs?artist_id={new_artist(c)}", {})],
+    "DELETE /api/songs/{id}": [lambda c: ("DELETE", f"/api/songs/{new_song(c)}", {})],
+    "GET /api/concerts": [lambda c: ("GET", f"/api/concerts?limit={MAX_LIMIT}", {})],
+    "GET /api/concerts/export": [lambda c: ("GET", "/api/concerts/export", {})],
+    "GET /api/concerts/{id}": [lambda c: ("GET", "/api/concerts/1", {})],
+    "POST /api/concerts": [lambda c: ("POST", "/api/concerts", {"json": concert_body(2)})],
+    "PATCH /api/concerts": [lambda c: ("PATCH", f"/api/concerts?artist_id={new_artist(c)}", {"json": {"is_sold_out": True}})],
+    "PATCH /api/concerts/{id}": [lambda c: ("PATCH", f"/api/concerts/{new_concert(c)}", {"json": {"price": 35.5, "artist_id": 4}})],
+    "DELETE /api/concerts": [lambda c: ("DELETE", f"/api/concerts?artist_id={new_artist(c)}", {})],
+    "DELETE /api/concerts/{id}": [lambda c: ("DELETE", f"/api/concerts/{new_concert(c)}", {})],
+    "GET /api/artists/export": [lambda c: ("GET", "/api/artists/export", {})],
+    "GET /api/search": [
+        lambda c: ("GET", "/api/search?q=amor", {}),
+        lambda c: ("GET", "/api/search?q=luna&kind=concert", {}),
+    ],
+    "GET /api/cache/stats": [lambda c: ("GET", "/api/cache/stats", {})],
+    "GET /api/stats/songs": [lambda c: ("GET", "/api/stats/songs", {})],
+    "GET /api/stats/concerts/status": [lambda c: ("GET", "/api/stats/concerts/status", {})],
+    "GET /api/stats/concerts/monthly": [
+        lambda c: ("GET", "/api/stats/concerts/monthly", {}),
+        lambda c: ("GET", "/api/stats/concerts/monthly?artist_id=1", {}),
+    ],
+    "GET /metrics": [lambda c: ("GET", "/metrics", {})],
+    "GET /": [lambda c: ("GET", "/", {})],
+    "GET /artists": [
+        lambda c: ("GET", f"/artists?size={LIST_SIZE}", {}),
+        lambda c: ("GET", "/artists?q=amor", {}),
+    ],
+    "GET /artists/new": [lambda c: ("GET", "/artists/new", {})],
+    "POST /artists/new": [lambda c: ("POST", "/artists/new", {"data": {"name": "Nuevo", "birth_date": "01/02/1990"}})],
+    "GET /artists/{artist_id}": [lambda c: ("GET", "/artists/1", {})],
+    "GET /artists/{artist_id}/edit": [lambda c: ("GET", "/artists/1/edit", {})],
+    "POST /artists/{artist_id}/edit": [
+        lambda c: ("POST", f"/artists/{new_artist(c)}/edit", {"data": {"name": "Editado"}}),
+        # formulario con errores: se vuelve a leer el artista
+        lambda c: ("POST", "/artists/1/edit", {"data": {"name": "Editado", "birth_date": "no es una fecha"}}),
+    ],
+    "POST /artists/{artist_id}/delete": [lambda c: ("POST", f"/artists/{new_artist(c)}/delete", {})],
+    "GET /songs": [
+        lambda c: ("GET", f"/songs?size={LIST_SIZE}", {}),
+        lambda c: ("GET", f"/songs?size={LIST_SIZE}&sort=-artist&explicit=false", {}),
+        lambda c: ("GET", "/songs?q=amor", {}),
+    ],
+    "GET /songs/new": [lambda c: ("GET", "/songs/new", {})],
+    "POST /songs/new": [
+        lambda c: ("POST", "/songs/new", {"data": song_form()}),
+        lambda c: ("POST", "/songs/new", {"data": {**song_form(), "title": " "}}),
+    ],
+    "GET /songs/{song_id}": [lambda c: ("GET", "/songs/1", {})],
+    "GET /songs/{song_id}/edit": [lambda c: ("GET", "/songs/1/edit", {})],
+    "POST /songs/{song_id}/edit": [
+        lambda c: ("POST", f"/songs/{new_song(c)}/edit", {"data": song_form(5)}),
+        lambda c: ("POST", "/songs/1/edit", {"data": {**song_form(), "duration_seconds": "mucho"}}),
+    ],
+    "POST /songs/{song_id}/delete": [lambda c: ("POST", f"/songs/{new_song(c)}/delete", {})],
+    "GET /concerts": [
+        lambda c: ("GET", f"/concerts?size={LIST_SIZE}", {}),
+        lambda c: ("GET", "/concerts?q=tour", {}),
+    ],
+}
+
+
+def budgeted_routes() -> set[str]:
+    """
+    Rutas de la aplicación que declaran un presupuesto de consultas.
+    """
+    return {
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        if any(dependency.dependency.__qualname__.startswith("query_budget.") for dependency in route.dependencies)
+        for method in route.methods
+    }
+
+
+def test_every_route_declares_a_budget():
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    assert routes - budgeted_routes() == set()
+
+
+def test_every_budgeted_route_is_called():
+    assert budgeted_routes() - CALLS.keys() == set()
+
+
+@pytest.mark.parametrize(
+    "route, call",
+    [(route, call) for route, calls in CALLS.items() for call in calls],
+    ids=[f"{route} #{i}" for route, calls in CALLS.items() for i in range(len(calls))],
+)
+def test_route_within_budget(client, route, call):
+    method, url, kwargs = call(client)
+    response = client.request(method, url, follow_redirects=False, **kwargs)
+    assert response.status_code < 400, response.text
+
+
+def test_not_modified_within_budget(client):
+    # la dependencia del presupuesto va antes que la del ETag: el 304 también se comprueba
+    etag = client.get("/api/songs/1").headers["etag"]
+    assert client.get("/api/songs/1", headers={"If-None-Match": etag}).status_code == 304
+
+
+# ---------------------------------------------------------------------------
+# el detector falla con un N+1 (p. ej. al quitar un joinedload)
+# ---------------------------------------------------------------------------
+
+def concerts_app() -> FastAPI:
+    """
+    Aplicación mínima con el middleware y una ruta que serializa
+    Concert.artist desde objetos del ORM, con o sin joinedload.
+    """
+    concerts = FastAPI()
+    concerts.add_middleware(QueryBudgetMiddleware)
+
+    @concerts.get("/concerts", dependencies=[Depends(query_budget(1))])
+    def list_concerts(joined: bool):
+        stmt = select(Concert).order_by(Concert.id).limit(50)
+        if joined:
+            stmt = stmt.options(joinedload(Concert.artist))
+        with SessionLocal() as session:
+            return [ConcertResponse.model_validate(concert) for concert in session.scalars(stmt)]
+
+    return concerts
+
+
+def test_joinedload_within_budget(client):
+    with TestClient(concerts_app()) as concerts:
+        assert len(concerts.get("/concerts?joined=true").json()) == 50
+
+
+def test_dropped_joinedload_fails(client):
+    with TestClient(concerts_app()) as concerts:
+        with pytest.raises(QueryBudgetExceeded, match="posible N\\+1"):
+            concerts.get("/concerts?joined=false")
+
+
+def test_undeclared_budget_fails(client):
+    undeclared = FastAPI()
+    undeclared.add_middleware(QueryBudgetMiddleware)
+
+    @undeclared.get("/count")
+    def count():
+        with SessionLocal() as session:
+            return session.scalar(select(Concert.id).limit(1))
+
+    with TestClient(undeclared) as undeclared_client:
+        with pytest.raises(QueryBudgetExceeded, match="sin presupuesto"):
+            undeclared_client.get("/count")
@@ -0,0 +1,60 @@
+"""
+Lecturas por columnas (app.queries): las consultas traen exactamente los
+campos de los esquemas de respuesta y las rutas de lectura no construyen
+entidades ORM
+"""
+
+import pytest
+from sqlalchemy import event, select
+
+from app.database import SessionLocal
+from app.models import Artist, Concert, Song
+from app.queries.artists import artist_rows
+from app.queries.concerts import CONCERT_COLUMNS, concert_rows
+from app.queries.songs import SONG_COLUMNS, song_rows
+from app.schemas import ArtistResponse, ConcertResponse, SongResponse
+
+
+def column_names(stmt) -> list[str]:
+    return [column.name for column in stmt.selected_columns]
+
+
+def test_columns_match_schemas():
+    assert column_names(song_rows()) == list(SongResponse.model_fields)
+    assert column_names(artist_rows()) == list(ArtistResponse.model_fields)
+    assert column_names(concert_rows()) == [name for name in ConcertResponse.model_fields if name != "artist"]
+    assert [column.key for column in SONG_COLUMNS] == [name for name in SongResponse.model_fields if name != "artist"]
+    assert [column.key for column in CONCERT_COLUMNS] == column_names(concert_rows())
+
+
+@pytest.fixture
+def orm_loads():
+    """
+    Entidades ORM construidas desde la base de datos durante la prueba.
+    """
+    loads = []
+
+    def on_load(target, context):
+        loads.append(type(target).__name__)
+
+    for model in (Song, Artist, Concert):
+        event.listen(model, "load", on_load)
+    yield loads
+    for model in (Song, Artist, Concert):
+        event.remove(model, "load", on_load)
+
+
+@pytest.mark.parametrize("url", [
+    "/api/songs", "/api/songs/1", "/api/songs/export", "/api/songs?artist_id=1&sort=title",
+    "/api/concerts", "/api/concerts/1", "/api/concerts/export", "/api/artists/export", "/api/search?q=a",
+    "/songs", "/songs/1", "/songs/1/edit", "/artists", "/artists/1", "/concerts",
+])
+def test_reads_do_not_hydrate_entities(client, orm_loads, url):
+    assert client.get(url).status_code == 200
+    assert orm_loads == []
+
+
+def test_orm_loads_detected(orm_loads):
+    with SessionLocal() as db:
+        db.scalars(select(Song).limit(2)).all()
+    assert orm_loads.count("Song") == 2
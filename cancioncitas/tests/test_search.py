@@ -0,0 +1,64 @@
+"""
+Búsqueda de texto completo (FTS5): /api/search, índice mantenido por
+triggers y búsqueda en los listados web
+"""
+
+import pytest
+
+from app.search import MAX_SEARCH_TERMS, fts_query
+
+
+def search(client, q: str, **params) -> list[dict]:
+    response = client.get("/api/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def found(client, q: str, kind: str, id: int) -> bool:
+    return any(result["id"] == id for result in search(client, q, kind=kind, limit=100))
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("hola", '"hola"*'),
+    ('amor "y" OR (odio', '"amor"* "y"* "OR"* "odio"*'),
+    ("¿? -- *", None),
+    (" ".join(["a"] * 20), " ".join(['"a"*'] * MAX_SEARCH_TERMS)),
+])
+def test_fts_query(q, expected):
+    assert fts_query(q) == expected
+
+
+def test_search_follows_writes(client):
+    location = client.post("/artists/new", data={"name": "Zyxwarbler"}, follow_redirects=False).headers["location"]
+    artist_id = int(location.rsplit("/", 1)[1])
+    song_id = client.post("/api/songs", json={"title": "Quetzalcanción", "artist_id": artist_id}).json()["id"]
+
+    # prefijo, sin distinguir mayúsculas ni tildes
+    assert found(client, "quetzalcancion", "song", song_id)
+    assert found(client, "QUETZ", "song", song_id)
+    # el subtítulo de la canción es el nombre de su artista
+    assert found(client, "zyxwarbler", "song", song_id)
+    assert found(client, "zyxwarbler", "artist", artist_id)
+
+    client.patch(f"/api/songs/{song_id}", json={"title": "Otro título"})
+    assert not found(client, "quetzalcancion", "song", song_id)
+    client.delete(f"/api/songs/{song_id}")
+    assert not found(client, "otro titulo", "song", song_id)
+
+
+def test_search_ranked_and_limited(client):
+    results = search(client, "a", limit=5)
+    assert len(results) == 5
+    assert [result["rank"] for result in results] == sorted(result["rank"] for result in results)
+    assert {result["kind"] for result in search(client, "a", kind="concert")} == {"concert"}
+
+
+def test_search_without_terms(client):
+    assert search(client, "¿?") == []
+    assert client.get("/api/search", params={"q": ""}).status_code == 422
+
+
+def test_web_list_search(client):
+    song = client.get("/api/songs/1").json()
+    page = client.get("/songs", params={"q": song["title"]}).text
+    assert f'href="/songs/{song["id"]}"' in page
@@ -0,0 +1,45 @@
+"""
+Serialización rápida de listados (app.serialization): el mismo JSON que
+Page[schema] serializado por FastAPI
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas import ConcertResponse, Page, SongResponse
+from app.serialization import dump_list, dump_page, list_adapter
+
+SONG = SimpleNamespace(id=1, title='Comillas " y \\ ñ', artist_id=2, artist="Él", duration_seconds=None, explicit=True)
+
+
+@pytest.mark.parametrize("next_cursor", [None, "abc_-"])
+def test_dump_page_matches_page_model(next_cursor):
+    rows = [SONG, SimpleNamespace(**{**vars(SONG), "id": 2, "explicit": None})]
+    items = [SongResponse.model_validate(row, from_attributes=True) for row in rows]
+    expected = Page[SongResponse](items=items, next_cursor=next_cursor)
+    assert json.loads(dump_page(SongResponse, rows, next_cursor)) == expected.model_dump(mode="json")
+
+
+def test_dump_list_empty():
+    assert dump_list(SongResponse, []) == b"[]"
+
+
+def test_adapter_compiled_once():
+    assert list_adapter(SongResponse) is list_adapter(SongResponse)
+
+
+@pytest.mark.parametrize("url, schema", [("/api/songs?limit=30", SongResponse), ("/api/concerts?limit=30", ConcertResponse)])
+def test_api_pages_validate_as_page(client, url, schema):
+    body = client.get(url).json()
+    page = Page[schema].model_validate(body)
+    assert len(page.items) == 30 and page.next_cursor
+    assert body == page.model_dump(mode="json")
+
+
+def test_concert_dates_serialized_like_pydantic(client):
+    concert = client.get("/api/concerts?limit=1").json()["items"][0]
+    assert datetime.fromisoformat(concert["date_time"])
+    assert concert == client.get(f"/api/concerts/{concert['id']}").json()
@@ -0,0 +1,61 @@
+"""
+Escrituras de la API de canciones: artistas inexistentes, valores nulos y
+carga masiva
+"""
+
+import pytest
+
+UNKNOWN_ARTIST = 999_999
+
+
+def new_song(client) -> int:
+    return client.post("/api/songs", json={"title": "Canción de prueba", "artist_id": 1}).json()["id"]
+
+
+@pytest.mark.parametrize("method, url, body", [
+    ("POST", "/api/songs", {"title": "Sin artista", "artist_id": UNKNOWN_ARTIST}),
+    ("PUT", "/api/songs/{id}", {"title": "Sin artista", "artist_id": UNKNOWN_ARTIST, "duration_seconds": None, "explicit": None}),
+    ("PATCH", "/api/songs/{id}", {"artist_id": UNKNOWN_ARTIST}),
+    ("PATCH", "/api/songs?artist_id=1", {"artist_id": UNKNOWN_ARTIST}),
+])
+def test_unknown_artist(client, method, url, body):
+    response = client.request(method, url.format(id=new_song(client)), json=body)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "El artista indicado no existe"
+
+
+@pytest.mark.parametrize("url", ["/api/songs/{id}", "/api/songs?artist_id=1"])
+@pytest.mark.parametrize("field", ["title", "artist_id"])
+def test_patch_null_not_nullable_field(client, url, field):
+    response = client.patch(url.format(id=new_song(client)), json={field: None})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", field]
+
+
+def test_patch_null_nullable_field(client):
+    response = client.patch(f"/api/songs/{new_song(client)}", json={"duration_seconds": None, "explicit": None})
+    assert response.status_code == 200
+    assert response.json()["duration_seconds"] is None
+
+
+def test_bulk_ids_by_index(client):
+    songs = [
+        {"title": "Lote A", "artist_id": 1, "duration_seconds": 100},
+        {"title": "", "artist_id": 1},
+        {"title": "Lote B", "artist_id": UNKNOWN_ARTIST},
+        {"title": "Lote C", "artist_id": 2, "explicit": True},
+        {"title": "Lote A", "artist_id": 1, "duration_seconds": 100},
+        {"title": "Lote D", "artist_id": 3},
+    ]
+    response = client.post("/api/songs/bulk", json=songs)
+    assert response.status_code == 201
+    body = response.json()
+
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert [song["index"] for song in body["songs"]] == [0, 3, 4, 5]
+    assert body["created"] == 4
+    for created in body["songs"]:
+        song = client.get(f"/api/songs/{created['id']}").json()
+        sent = songs[created["index"]]
+        assert (song["title"], song["artist_id"]) == (sent["title"], sent["artist_id"])
+    assert len({song["id"] for song in body["songs"]}) == 4
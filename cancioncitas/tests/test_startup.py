@@ -0,0 +1,70 @@
+"""
+Arranque (lifespan): el esquema y los datos por defecto se preparan una sola
+vez por despliegue, marcada en PRAGMA user_version
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from app.database import engine, init_db, schema_marker
+from app.main import app
+from app.models import Artist, Song
+
+PROJECT = Path(__file__).parent.parent
+
+
+def user_version() -> int:
+    with engine.connect() as connection:
+        return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def run(code: str, database: Path) -> subprocess.Popen:
+    environment = os.environ | {
+        "DATABASE_URL": f"sqlite:///{database}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-c", code], cwd=PROJECT, env=environment, stdout=subprocess.PIPE, text=True
+    )
+
+
+def test_startup_timings(client):
+    startup = app.state.startup
+    assert startup["init_db"] is True
+    assert 0 <= startup["init_db_seconds"] <= startup["total_seconds"]
+    assert startup["templates"] > 0
+
+
+def test_init_db_once_per_deployment(client):
+    assert user_version() == schema_marker()
+    assert init_db() is False
+
+
+def test_init_db_after_new_deployment(client):
+    with engine.connect() as connection:
+        counts = [connection.scalar(select(func.count()).select_from(model)) for model in (Artist, Song)]
+        connection.exec_driver_sql("PRAGMA user_version = 0")
+
+    assert init_db() is True
+    assert user_version() == schema_marker()
+    # con canciones no se vuelven a cargar los datos por defecto
+    with engine.connect() as connection:
+        assert [connection.scalar(select(func.count()).select_from(model)) for model in (Artist, Song)] == counts
+
+
+def test_import_does_not_touch_database(tmp_path):
+    database = tmp_path / "import.db"
+    assert run("import app.main", database).wait() == 0
+    assert not database.exists()
+
+
+def test_concurrent_workers_initialize_once(tmp_path):
+    database = tmp_path / "workers.db"
+    workers = [run("from app.database import init_db; print(init_db())", database) for _ in range(3)]
+    results = sorted(worker.communicate()[0].strip() for worker in workers)
+    assert [worker.returncode for worker in workers] == [0, 0, 0]
+    assert results == ["False", "False", "True"]
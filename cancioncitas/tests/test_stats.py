@@ -0,0 +1,85 @@
+"""
+Estadísticas (/api/stats) sobre las tablas de resumen que mantienen los
+triggers: tras cualquier escritura coinciden con recalcularlas desde cero
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+
+SONG_STATS = """
+SELECT artist_id, count(*), coalesce(sum(duration_seconds), 0), count(duration_seconds)
+FROM songs GROUP BY artist_id ORDER BY artist_id
+"""
+SONG_SUMMARY = """
+SELECT artist_id, song_count, duration_total, duration_count
+FROM artist_song_stats WHERE song_count > 0 ORDER BY artist_id
+"""
+CONCERT_STATS = """
+SELECT artist_id, substr(date_time, 1, 7), status, count(*), coalesce(sum(capacity), 0),
+       round(coalesce(sum(price * coalesce(capacity, 0)), 0), 2)
+FROM concerts GROUP BY artist_id, substr(date_time, 1, 7), status ORDER BY 1, 2, 3
+"""
+CONCERT_SUMMARY = """
+SELECT artist_id, month, status, concert_count, capacity_total, round(revenue_total, 2)
+FROM concert_stats WHERE concert_count > 0 ORDER BY 1, 2, 3
+"""
+
+
+def query(sql: str) -> list[tuple]:
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(text(sql))]
+
+
+def assert_summaries_in_sync():
+    assert query(SONG_SUMMARY) == query(SONG_STATS)
+    assert query(CONCERT_SUMMARY) == query(CONCERT_STATS)
+
+
+def test_summaries_follow_writes(client):
+    assert_summaries_in_sync()
+
+    song = client.post("/api/songs", json={"title": "Estadística", "artist_id": 3, "duration_seconds": 120}).json()
+    client.patch(f"/api/songs/{song['id']}", json={"artist_id": 4, "duration_seconds": None})
+    client.patch("/api/songs?artist_id=5", json={"duration_seconds": 90})
+    client.delete(f"/api/songs/{song['id'] - 1}")
+
+    concert = {"name": "Estadística", "price": 12.5, "capacity": 300, "date_time": "2027-03-01T20:00:00", "artist_id": 3}
+    concert_id = client.post("/api/concerts", json=concert).json()["id"]
+    client.patch(f"/api/concerts/{concert_id}", json={"date_time": "2027-04-01T20:00:00", "status": "cancelled"})
+    client.patch("/api/concerts?artist_id=6", json={"price": 1.0})
+    client.delete(f"/api/concerts/{concert_id - 1}")
+
+    assert_summaries_in_sync()
+
+
+def test_songs_by_artist(client):
+    stats = {row["artist_id"]: row for row in client.get("/api/stats/songs").json()}
+    for artist_id, count, total, known in query(SONG_STATS):
+        row = stats[artist_id]
+        assert (row["song_count"], row["total_duration_seconds"]) == (count, total)
+        assert row["avg_duration_seconds"] == (pytest.approx(total / known) if known else None)
+
+
+def test_concerts_by_status(client):
+    expected = query("""
+        SELECT status, count(*), coalesce(sum(capacity), 0) FROM concerts
+        WHERE artist_id = 2 AND substr(date_time, 1, 7) >= '2024-01' GROUP BY status ORDER BY status
+    """)
+    rows = client.get("/api/stats/concerts/status?artist_id=2&month_from=2024-01").json()
+    assert [(row["status"].upper(), row["concert_count"], row["capacity"]) for row in rows] == expected
+
+
+def test_concerts_by_artist_and_month(client):
+    rows = client.get("/api/stats/concerts/monthly?artist_id=2&status=scheduled").json()
+    expected = query("""
+        SELECT substr(date_time, 1, 7), count(*) FROM concerts
+        WHERE artist_id = 2 AND status = 'SCHEDULED' GROUP BY 1 ORDER BY 1
+    """)
+    assert [(row["month"], row["concert_count"]) for row in rows] == expected
+
+
+@pytest.mark.parametrize("month", ["2024-13", "2024-1", "24-01"])
+def test_invalid_month(client, month):
+    assert client.get(f"/api/stats/concerts/status?month_from={month}").status_code == 422
@@ -0,0 +1,39 @@
+"""
+Entorno de Jinja2 compartido y caché de bytecode de las plantillas
+(app.templating)
+"""
+
+import pytest
+
+from app import fragments, templating
+from app.config import settings
+from app.routers.web import artists, home, songs
+from app.templating import TEMPLATES_DIR, compile_templates, create_environment
+
+
+def test_routers_share_one_environment():
+    assert {id(module.templates) for module in (home, artists, songs, fragments)} == {id(templating.templates)}
+    assert templating.templates.env is templating.environment
+
+
+def test_compile_templates_loads_every_template():
+    names = sorted(path.relative_to(TEMPLATES_DIR).as_posix() for path in TEMPLATES_DIR.rglob("*.html"))
+    assert compile_templates() == len(names)
+    for environment in (templating.environment, templating.async_environment):
+        assert {name for _, name in environment.cache.keys()} >= set(names)
+
+
+@pytest.mark.parametrize("enable_async, pattern", [(False, "__jinja2_*.cache"), (True, "__jinja2_async_*.cache")])
+def test_bytecode_cache_reused(tmp_path, monkeypatch, enable_async, pattern):
+    monkeypatch.setattr(settings, "templates_bytecode_dir", str(tmp_path))
+    create_environment(enable_async).get_template("home.html")
+    assert len(list(tmp_path.glob(pattern))) == 1
+
+    # otro entorno (otro worker, un reinicio) carga el bytecode sin compilar
+    environment = create_environment(enable_async)
+
+    def compile(*args, **kwargs):
+        raise AssertionError("la plantilla se ha vuelto a compilar")
+
+    monkeypatch.setattr(environment, "compile", compile)
+    assert environment.get_template("home.html") is not None
@@ -0,0 +1,68 @@
+"""
+Listados web en streaming (WEB_STREAM_LISTS): la misma página que
+renderizada entera, leída con la sesión de la petición
+"""
+
+import anyio
+import pytest
+from starlette.requests import Request
+
+from app.config import settings
+from app.models import Song
+from app.pagination import WebPager
+
+
+@pytest.mark.parametrize("url", [
+    "/songs?size=25",
+    "/songs?size=25&sort=-title&explicit=true",
+    "/songs?size=25&page=3&q=a",
+    "/artists?size=25",
+    "/concerts?size=25",
+])
+def test_streamed_page_matches_rendered(client, monkeypatch, url):
+    streamed = client.get(url)
+    assert streamed.headers["x-cache"] == "MISS"
+
+    monkeypatch.setattr(settings, "web_stream_lists", False)
+    rendered = client.get(url)
+    assert streamed.text == rendered.text
+
+
+def test_streamed_page_links(client):
+    # los enlaces de la paginación se escriben después de leer las filas
+    page = client.get("/songs?size=25&sort=title").text
+    assert '<a class="page-link" href="/songs?size=25&amp;sort=title&amp;after=' in page
+
+
+def test_streamed_page_links_match_rendered(client, monkeypatch):
+    # también la página anterior (?before=), que se lee entera para darle la vuelta
+    next_page = client.get("/songs?size=25&sort=title").text.split('href="/songs?size=25&amp;sort=title&amp;after=')[1]
+    url = "/songs?size=25&sort=title&after=" + next_page.split('"')[0]
+    second = client.get(url).text
+    previous = "/songs?size=25&sort=title&before=" + second.split("&amp;before=")[1].split('"')[0]
+
+    streamed = [client.get(url).text, client.get(previous).text]
+    monkeypatch.setattr(settings, "web_stream_lists", False)
+    assert streamed == [client.get(url).text, client.get(previous).text]
+
+
+def test_stream_rows_reads_lazily():
+    pager = WebPager(Request({"type": "http", "path": "/songs", "query_string": b"", "headers": []}), 3, 10)
+    pager.keyset(Song.__table__.select(), [Song.id])
+    read = []
+
+    async def items():
+        for id in range(1, 10):
+            read.append(id)
+            yield Song(id=id)
+
+    async def first_rows():
+        rows = pager.stream_rows(items())
+        first = await anext(rows)
+        assert (first.id, read) == (1, [1])
+        return [first.id] + [row.id async for row in rows]
+
+    # se para en la fila size + 1, que sólo indica que hay otra página
+    assert anyio.run(first_rows) == [1, 2, 3]
+    assert read == [1, 2, 3, 4]
+    assert pager.next_url is not None and pager.prev_url is None
@@ -0,0 +1,60 @@
+"""
+Paginación y tamaño de página de los listados web (/songs, /artists, /concerts)
+"""
+
+import html
+import re
+
+import pytest
+
+from app.pagination import WEB_DEFAULT_PAGE_SIZE
+
+
+def row_ids(page: str, entity: str) -> list[int]:
+    return [int(id) for id in re.findall(rf'href="/{entity}/(\d+)" class="btn btn-info"', page)]
+
+
+def link(page: str, label: str) -> str | None:
+    match = re.search(rf'<a class="page-link" href="([^"#]+)">(?:<i [^>]*></i> )?{label}', page)
+    return html.unescape(match.group(1)) if match else None
+
+
+def total(page: str) -> int:
+    return int(re.search(r"(\d+) en total", page).group(1))
+
+
+@pytest.mark.parametrize("entity", ["songs", "artists", "concerts"])
+def test_pages_cover_every_row_once(client, entity):
+    url, ids, pages = f"/{entity}?size=100", [], []
+    while url:
+        page = client.get(url).text
+        pages.append(row_ids(page, entity))
+        ids += pages[-1]
+        url = link(page, "Siguiente")
+
+    assert len(ids) == len(set(ids)) == total(page)
+    assert all(len(rows) == 100 for rows in pages[:-1])
+
+
+def test_previous_page_link(client):
+    first = client.get("/songs?size=25&sort=title").text
+    second = client.get(link(first, "Siguiente")).text
+    assert link(first, "Anterior") is None
+    assert row_ids(client.get(link(second, "Anterior")).text, "songs") == row_ids(first, "songs")
+
+
+@pytest.mark.parametrize("size, expected", [("25", 25), ("200", 200), ("7", WEB_DEFAULT_PAGE_SIZE), ("x", WEB_DEFAULT_PAGE_SIZE)])
+def test_page_size(client, size, expected):
+    page = client.get(f"/artists?size={size}").text
+    assert f"{expected} por página" in page
+    assert len(row_ids(page, "artists")) == min(expected, total(page))
+
+
+def test_numbered_search_pages(client):
+    # los resultados de búsqueda se paginan por número de página
+    first = client.get("/songs?q=a&size=25").text
+    next_url = link(first, "Siguiente")
+    assert "page=2" in next_url
+    second = client.get(next_url).text
+    assert not set(row_ids(first, "songs")) & set(row_ids(second, "songs"))
+    assert "page=1" in link(second, "Anterior")